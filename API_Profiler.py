@@ -0,0 +1,224 @@
+# Razor Enhanced API Profiler
+#
+# What it does:
+# 1. Wraps the Razor Enhanced API objects (Misc, Items, Mobiles, Player, Statics, Journal, Target,
+#    Gumps, Timer, PathFinding and Spells) of the script that imports it.
+# 2. Records, for every API call and the function that made it, how many times it was called,
+#    how long it took (with a latency histogram) and how much of that time was spent blocked in
+#    waits such as Misc.Pause, Target.WaitForTarget and Gumps.WaitForGump.
+# 3. Every few minutes, and once more when the script ends, it shows a summary of the most
+#    expensive calls in the game and writes two files:
+#    - api_profile.csv: one row per call and caller, with the histogram in columns.
+#    - api_profile.folded: "caller;caller;API.Call microseconds" lines that flamegraph.pl
+#      or speedscope can turn into a flame graph.
+#
+# How to use:
+# 1. Place this file in your Razor Enhanced 'Scripts' folder, next to the script to profile.
+# 2. Add this line at the very top of the script (after its header comments):
+#        import API_Profiler
+#    If your Razor Enhanced build does not give scripts access to call frames, use instead:
+#        import API_Profiler; API_Profiler.install(globals())
+# 3. Run the script as usual. Remove the import again when you are done; profiling adds a
+#    small cost to every API call.
+# 4. Only method calls are measured. Reading properties such as Player.Position is not.
+
+import atexit
+import sys
+import time
+
+# --- Configuration ---
+
+# How often (in seconds) to show a summary and rewrite the output files.
+PROFILE_REPORT_INTERVAL = 300
+
+# How many rows the summary shows, most expensive first.
+PROFILE_TOP_ROWS = 15
+
+# Output files, written to Razor Enhanced's working folder.
+PROFILE_CSV_FILE = "api_profile.csv"
+PROFILE_FOLDED_FILE = "api_profile.folded"
+
+# The Razor Enhanced objects to wrap.
+PROFILED_APIS = ["Misc", "Items", "Mobiles", "Player", "Statics", "Journal", "Target",
+                 "Gumps", "Timer", "PathFinding", "Spells"]
+
+# Calls whose time is spent waiting for the game rather than doing work.
+BLOCKING_CALLS = set([
+    "Misc.Pause", "Target.WaitForTarget", "Gumps.WaitForGump", "Items.WaitForContents",
+    "Items.WaitForProps", "Misc.WaitForContext", "Journal.WaitJournal", "PathFinding.RunPath",
+])
+
+# Upper bounds (in milliseconds) of the latency histogram buckets. The last bucket holds the rest.
+HISTOGRAM_BOUNDS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768]
+
+# --- Profiler State ---
+
+# (api call, caller) -> [calls, total_ms, max_ms, histogram counts]
+call_stats = {}
+# "caller;caller;API.Call" -> total microseconds
+folded_stacks = {}
+script_globals = None
+started_at = time.time()
+last_report_at = time.time()
+
+# --- Helper Functions ---
+
+def histogram_bucket(elapsed_ms):
+    """Returns the index of the histogram bucket for a call that took elapsed_ms."""
+    for index, bound in enumerate(HISTOGRAM_BOUNDS):
+        if elapsed_ms < bound:
+            return index
+    return len(HISTOGRAM_BOUNDS)
+
+def caller_stack(frame):
+    """Returns the function names from the script's outermost call down to frame.
+
+    Functions in helper modules the script imports are named "Module.function".
+    """
+    names = []
+    while frame is not None:
+        name = frame.f_code.co_name
+        if frame.f_globals is script_globals:
+            if name == "<module>":
+                names.append("<script>")
+                break
+            names.append(name)
+        elif frame.f_globals is not globals():
+            names.append("{}.{}".format(frame.f_globals.get("__name__", "?"), name))
+        frame = frame.f_back
+    if frame is None:
+        # The call did not come from the script, e.g. while a helper module was being imported.
+        return ["<unknown>"]
+    names.reverse()
+    return names
+
+def record_call(call_name, elapsed_ms, frame):
+    """Adds one call to the statistics and the folded stacks."""
+    stack = caller_stack(frame)
+    key = (call_name, stack[-1])
+    stats = call_stats.get(key)
+    if stats is None:
+        stats = [0, 0.0, 0.0, [0] * (len(HISTOGRAM_BOUNDS) + 1)]
+        call_stats[key] = stats
+    stats[0] += 1
+    stats[1] += elapsed_ms
+    stats[2] = max(stats[2], elapsed_ms)
+    stats[3][histogram_bucket(elapsed_ms)] += 1
+    folded_key = ";".join(stack + [call_name])
+    folded_stacks[folded_key] = folded_stacks.get(folded_key, 0) + int(elapsed_ms * 1000)
+
+def current_frame(depth):
+    """Returns the frame depth levels up, or None if the engine does not expose frames."""
+    try:
+        return sys._getframe(depth + 1)
+    except (AttributeError, ValueError):
+        return None
+
+class ProfiledAPI(object):
+    """Stands in for one Razor Enhanced object and times every method call made through it."""
+
+    def __init__(self, api_name, api):
+        self._api_name = api_name
+        self._api = api
+
+    def __getattr__(self, attribute):
+        value = getattr(self._api, attribute)
+        if not callable(value):
+            return value
+        call_name = "{}.{}".format(self._api_name, attribute)
+
+        def profiled(*args, **kwargs):
+            start = time.time()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                record_call(call_name, (time.time() - start) * 1000.0, current_frame(1))
+                maybe_report()
+        return profiled
+
+def install(namespace):
+    """Wraps the Razor Enhanced objects found in a script's globals."""
+    global script_globals
+    script_globals = namespace
+    for api_name in PROFILED_APIS:
+        api = namespace.get(api_name)
+        if api is not None and not isinstance(api, ProfiledAPI):
+            namespace[api_name] = ProfiledAPI(api_name, api)
+
+def find_importer_globals():
+    """Finds the globals of the script that imported this module."""
+    frame = current_frame(1)
+    while frame is not None:
+        if frame.f_globals is not globals() and "Misc" in frame.f_globals and "Items" in frame.f_globals:
+            return frame.f_globals
+        frame = frame.f_back
+    return None
+
+def write_csv():
+    """Writes one row per API call and caller, with the histogram as the last columns."""
+    header = ["api_call", "caller", "calls", "total_ms", "mean_ms", "max_ms", "blocking"]
+    header += ["lt_{}ms".format(bound) for bound in HISTOGRAM_BOUNDS]
+    header.append("ge_{}ms".format(HISTOGRAM_BOUNDS[-1]))
+    with open(PROFILE_CSV_FILE, "w") as csv_file:
+        csv_file.write(",".join(header) + "\n")
+        for (call_name, caller), (calls, total_ms, max_ms, histogram) in sorted(call_stats.items()):
+            row = [call_name, caller, str(calls), "{:.3f}".format(total_ms),
+                   "{:.3f}".format(total_ms / calls), "{:.3f}".format(max_ms),
+                   "1" if call_name in BLOCKING_CALLS else "0"]
+            row += [str(count) for count in histogram]
+            csv_file.write(",".join(row) + "\n")
+
+def write_folded():
+    """Writes the call stacks in the folded format used by flame graph tools."""
+    with open(PROFILE_FOLDED_FILE, "w") as folded_file:
+        for stack in sorted(folded_stacks):
+            folded_file.write("{} {}\n".format(stack, folded_stacks[stack]))
+
+def say(text, color=78):
+    """Shows a line of the report in the game, or prints it if the script's Misc is not known."""
+    misc = script_globals.get("Misc") if script_globals is not None else None
+    if isinstance(misc, ProfiledAPI):
+        # Use the unwrapped object so the report does not profile itself.
+        misc = misc._api
+    if misc is None:
+        print(text)
+    else:
+        misc.SendMessage(text, color)
+
+def report():
+    """Shows a summary of the most expensive calls and rewrites the output files."""
+    elapsed_s = max(time.time() - started_at, 0.001)
+    blocked_ms = sum(stats[1] for key, stats in call_stats.items() if key[0] in BLOCKING_CALLS)
+    active_ms = sum(stats[1] for key, stats in call_stats.items() if key[0] not in BLOCKING_CALLS)
+    say(">> API profile after {:.0f} s".format(elapsed_s), 68)
+    say("Blocked in waits: {:.0f} ms ({:.1f}%)  Working in API calls: {:.0f} ms ({:.1f}%)".format(
+        blocked_ms, blocked_ms / (elapsed_s * 10.0), active_ms, active_ms / (elapsed_s * 10.0)))
+    say("{:<30} {:<28} {:>8} {:>11} {:>9} {:>9}".format("API call", "Caller", "Calls", "Total ms", "Mean ms", "Max ms"))
+    rows = sorted(call_stats.items(), key=lambda entry: -entry[1][1])
+    for (call_name, caller), (calls, total_ms, max_ms, histogram) in rows[:PROFILE_TOP_ROWS]:
+        say("{:<30} {:<28} {:>8} {:>11.1f} {:>9.2f} {:>9.1f}".format(
+            call_name, caller[:28], calls, total_ms, total_ms / calls, max_ms))
+    try:
+        write_csv()
+        write_folded()
+    except IOError as e:
+        say(">> Could not write the profile files: {}".format(e), 33)
+
+def maybe_report():
+    """Reports if PROFILE_REPORT_INTERVAL has passed since the last report."""
+    global last_report_at
+    if time.time() - last_report_at >= PROFILE_REPORT_INTERVAL:
+        last_report_at = time.time()
+        report()
+
+def final_report():
+    """Reports one last time when the script ends, so short or stopped runs are not lost."""
+    if call_stats:
+        report()
+
+# --- Installation ---
+
+importer_globals = find_importer_globals()
+if importer_globals is not None:
+    install(importer_globals)
+atexit.register(final_report)
@@ -0,0 +1,151 @@
+# Shared Action Pacing
+#
+# What it does:
+# 1. After each action a script sends (a chop, a craft, a smelt, a move), waits only until the
+#    action's result shows up instead of always waiting out a fixed delay.
+# 2. Learns how long each action usually takes and gives up once that time has clearly passed,
+#    never waiting more than PACING_MAX_FACTOR times the delay the script configured.
+# 3. Slows down an action when the server answers it with "You must wait", and speeds it up
+#    again with each time it goes through cleanly.
+#
+# How to use:
+# 1. Place this file in your Razor Enhanced 'Scripts' folder, together with Razor_API.py.
+# 2. In the script, import paced_wait and call it right after sending an action:
+#        from Action_Pacing import paced_wait
+#        paced_wait("chop", ACTION_DELAY, check_chop_result)
+
+import math
+import time
+from collections import deque
+
+from Razor_API import Misc, Journal
+
+# --- Configuration ---
+
+# How often (in milliseconds) to look for an action's result.
+PACING_POLL_DELAY = 100
+
+# Result times remembered per action, and how many are needed before they are trusted.
+PACING_SAMPLES = 20
+PACING_MIN_SAMPLES = 5
+
+# The usual result time is this percentile of the remembered ones. The wait gives up after it
+# times PACING_TIMEOUT_FACTOR plus PACING_MARGIN milliseconds, but never after more than
+# PACING_MAX_FACTOR times the configured delay.
+PACING_PERCENTILE = 0.9
+PACING_TIMEOUT_FACTOR = 1.5
+PACING_MARGIN = 150
+PACING_MAX_FACTOR = 2
+
+# A refused action makes the gap kept after it PACING_BACKOFF times longer. Each clean one
+# shrinks it by PACING_FLOOR_DECAY. Actions whose result cannot be watched keep at least
+# PACING_MIN_DELAY milliseconds.
+PACING_BACKOFF = 1.5
+PACING_FLOOR_DECAY = 0.95
+PACING_MIN_DELAY = 250
+
+# The journal text of a refused action.
+PACING_MUST_WAIT_TEXT = "You must wait"
+
+# --- Pacing State ---
+
+# Action name -> recent result times, current floor and configured delay.
+pacing = {}
+# Timestamp of the newest journal line checked for PACING_MUST_WAIT_TEXT.
+pacing_cursor = None
+# The action sent before the one being waited on.
+last_action = None
+
+# --- Helper Functions ---
+
+def percentile(values, fraction):
+    """Returns the value below which the given fraction of values fall."""
+    ordered = sorted(values)
+    index = int(math.ceil(fraction * len(ordered))) - 1
+    return ordered[min(max(index, 0), len(ordered) - 1)]
+
+def must_wait_seen():
+    """Returns True if the server has asked us to wait since the last call."""
+    global pacing_cursor
+    first_read = pacing_cursor is None
+    seen = False
+    for entry in Journal.GetJournalEntry(pacing_cursor or 0):
+        pacing_cursor = max(pacing_cursor or 0, entry.Timestamp)
+        if PACING_MUST_WAIT_TEXT in entry.Text:
+            seen = True
+    if pacing_cursor is None:
+        pacing_cursor = 0
+    # Lines from before the script started say nothing about our pacing.
+    return seen and not first_read
+
+def get_pacing(action, delay, observed):
+    """Returns the pacing state of an action, creating it the first time it is used."""
+    state = pacing.get(action)
+    if state is None:
+        # An action whose result cannot be watched starts at the configured delay.
+        state = {"samples": deque(maxlen=PACING_SAMPLES), "floor": 0 if observed else delay,
+                 "delay": delay, "last_wait": delay}
+        pacing[action] = state
+    return state
+
+def pacing_timeout(state):
+    """Returns how long to wait for a result before giving up on it."""
+    if len(state["samples"]) < PACING_MIN_SAMPLES:
+        return state["delay"]
+    learned = percentile(state["samples"], PACING_PERCENTILE) * PACING_TIMEOUT_FACTOR + PACING_MARGIN
+    return min(max(learned, state["floor"]), state["delay"] * PACING_MAX_FACTOR)
+
+def back_off(state):
+    """Lengthens the gap kept after an action the server refused, but never past the cap."""
+    state["floor"] = min(max(state["floor"] * PACING_BACKOFF, state["last_wait"] + PACING_MARGIN),
+                         state["delay"] * PACING_MAX_FACTOR)
+
+# --- Paced Wait ---
+
+def paced_wait(action, delay, check=None):
+    """Waits after sending an action and returns its result.
+
+    check() is polled until it returns something other than None, which is returned.
+    Returns "must_wait" if the server refused the action, or None on timeout.
+    Without a check, only the learned delay is waited out.
+    """
+    global last_action
+    # This action has only just been sent, so a refusal already in the journal answers the
+    # action before it. Slow that one down, not this one.
+    if must_wait_seen() and last_action in pacing:
+        back_off(pacing[last_action])
+    last_action = action
+
+    state = get_pacing(action, delay, check is not None)
+    timeout = pacing_timeout(state) if check is not None else state["floor"]
+    started = time.time()
+    result = None
+    while True:
+        if must_wait_seen():
+            result = "must_wait"
+            break
+        if check is not None:
+            result = check()
+            if result is not None:
+                break
+        if (time.time() - started) * 1000.0 >= timeout:
+            break
+        Misc.Pause(PACING_POLL_DELAY)
+    waited = (time.time() - started) * 1000.0
+
+    if result == "must_wait":
+        # The gap before this action was too short. The check may have read the refusal
+        # first; skip past it so it is not charged to this action twice.
+        must_wait_seen()
+        back_off(state)
+    else:
+        if result is not None:
+            state["samples"].append(waited)
+        lowest = PACING_MIN_DELAY if check is None else 0
+        state["floor"] = max(lowest, state["floor"] * PACING_FLOOR_DECAY)
+
+    if waited < state["floor"]:
+        Misc.Pause(int(state["floor"] - waited))
+        waited = state["floor"]
+    state["last_wait"] = waited
+    return result
@@ -12,9 +12,20 @@ Razor Enhanced API.
 '''
 
 # --- Imports ---
+import bisect
+import json
+import os
+import time
+from collections import OrderedDict
 from System.Collections.Generic import List
 from System import Int32, Byte
 
+# Journal_Matching.py and Razor_API.py go in the same Scripts folder; the helper module
+# gets the Razor Enhanced objects from this script, so install them before importing it
+import Razor_API
+Razor_API.install(globals())
+from Journal_Matching import compile_journal_outcomes, sync_journal_cursor, poll_journal
+
 ## Script options ##
 # Change to the name that you want to rename the tamed animals to
 renameTamedAnimalsTo = 'bacon'
@@ -43,6 +54,19 @@ enablePeacemaking = False
 defendYourself = True
 # True or False to track the animal being tamed
 enableFollowAnimal = True
+# Minutes to skip an animal after giving up on it, by reason. 0 == skip it for good
+# (animals you have owned give no skill gain when tamed again)
+blacklistMinutes = {
+    'tamed': 0,
+    'released': 0,
+    'failed': 60,       # tried maximumTameAttempts times
+    'unreachable': 10,  # could not get close enough
+    'ignored': 30,      # already tame, or out of reach when the tame was tried
+}
+# Most animals to remember. The one left alone longest is forgotten first
+blacklistSize = 500
+# File the blacklist is saved to so it lasts between runs. Set to '' to not save it
+blacklistFile = 'Auto_tamer_blacklist.json'
 # Change depending on the latency to your UO shard
 journalEntryDelayMilliseconds = 100
 targetClearDelayMilliseconds = 100
@@ -139,19 +163,115 @@ tameable_data = {
     0x006A: 120.0, # shadow wyrm
 }
 
-# --- Timers ---
-recently_tamed_serials = []
+# --- Blacklist ---
+# Serial -> (reason, expiry time or 0 for never), least recently used first.
+# Blacklisted animals are also passed to Misc.IgnoreObject so the animal filter skips them.
+tameBlacklist = OrderedDict()
 
+def LoadBlacklist():
+    if not blacklistFile or not os.path.exists(blacklistFile):
+        return
+    try:
+        with open(blacklistFile) as saved:
+            for serial, reason, expiry in json.load(saved):
+                tameBlacklist[serial] = (reason, expiry)
+        Misc.SendMessage("Loaded %d blacklisted animals" % len(tameBlacklist), 90)
+    except Exception as e:
+        Misc.SendMessage("Could not read %s: %s" % (blacklistFile, e), 33)
 
-def GetAnimalsInSkillRange(min_difficulty, max_offset):
-    animal_ids = List[Int32]()
+def SaveBlacklist():
+    if not blacklistFile:
+        return
+    try:
+        with open(blacklistFile, 'w') as saved:
+            json.dump([[serial, reason, expiry] for serial, (reason, expiry) in tameBlacklist.items()], saved)
+    except Exception as e:
+        Misc.SendMessage("Could not save %s: %s" % (blacklistFile, e), 33)
+
+def Blacklist(serial, reason):
+    minutes = blacklistMinutes.get(reason, 0)
+    expiry = time.time() + minutes * 60 if minutes > 0 else 0
+    tameBlacklist[serial] = (reason, expiry)
+    tameBlacklist.move_to_end(serial)
+    Misc.IgnoreObject(serial)
+    while len(tameBlacklist) > blacklistSize:
+        forgotten, entry = tameBlacklist.popitem(last=False)
+        Misc.UnIgnoreObject(forgotten)
+    SaveBlacklist()
+
+def PruneBlacklist():
+    # Gives expired animals another chance
+    now = time.time()
+    expired = [serial for serial, (reason, expiry) in tameBlacklist.items() if expiry and expiry <= now]
+    for serial in expired:
+        del tameBlacklist[serial]
+        Misc.UnIgnoreObject(serial)
+    if expired:
+        SaveBlacklist()
+
+def IsBlacklisted(serial):
+    if serial not in tameBlacklist:
+        return False
+    tameBlacklist.move_to_end(serial)
+    return True
+
+def ApplyBlacklist():
+    # Misc.ClearIgnore() forgets every ignored object, so ignore the blacklist again
+    PruneBlacklist()
+    for serial in tameBlacklist:
+        Misc.IgnoreObject(serial)
+
+# --- Journal Matching ---
+# Journal lines that end a taming attempt, grouped by result.
+tameOutcomes = {
+    'success': ["It seems to accept you as master", "That wasn't even challenging"],
+    'ignore': ["already tame", "too far away"],
+    'failure': ["You fail to tame the", "You must wait"],
+}
+def WaitForJournalOutcome(matcher, timeoutMilliseconds):
+    # Returns as soon as a new journal line matches a result, or None after the timeout.
+    waited = 0
+    while True:
+        result = poll_journal(matcher)
+        if result is not None or waited >= timeoutMilliseconds:
+            return result
+        Misc.Pause(journalEntryDelayMilliseconds)
+        waited += journalEntryDelayMilliseconds
+
+tameMatcher = compile_journal_outcomes(tameOutcomes)
+
+
+# --- Animal Filter ---
+# Tameable bodies sorted by difficulty, with the difficulties in the same order for bisect.
+sortedTameables = sorted(tameable_data.items(), key=lambda entry: entry[1])
+sortedDifficulties = [difficulty for body_id, difficulty in sortedTameables]
+# The animal filter in use, and the slice of sortedTameables its bodies came from.
+animalFilter = None
+animalFilterRange = None
+
+def GetAnimalFilter(min_difficulty, max_offset):
+    # Only builds a new filter when the skill moves the top of the range past another difficulty
+    global animalFilter, animalFilterRange
     current_skill = Player.GetSkillValue('Animal Taming')
     max_difficulty = current_skill + max_offset
+    first = bisect.bisect_left(sortedDifficulties, min_difficulty)
+    last = bisect.bisect_right(sortedDifficulties, max_difficulty)
+    if animalFilter is not None and animalFilterRange == (first, last):
+        return animalFilter
     Misc.SendMessage("Current Taming: %.1f. Targeting difficulty range: %.1f to %.1f" % (current_skill, min_difficulty, max_difficulty), 90)
-    for body_id, tame_diff in tameable_data.items():
-        if tame_diff >= min_difficulty and tame_diff <= max_difficulty:
-            animal_ids.Add(body_id)
-    return animal_ids
+    animal_ids = List[Int32]()
+    for body_id, tame_diff in sortedTameables[first:last]:
+        animal_ids.Add(body_id)
+    animalFilter = Mobiles.Filter()
+    animalFilter.Enabled = True
+    animalFilter.Bodies = animal_ids
+    animalFilter.RangeMin = 0
+    animalFilter.RangeMax = 12
+    animalFilter.IsHuman = 0
+    animalFilter.IsGhost = 0
+    animalFilter.CheckIgnoreObject = True
+    animalFilterRange = (first, last)
+    return animalFilter
 
 def FindBandage():
     return Items.FindByID(0x0E21, -1, Player.Backpack.Serial)
@@ -164,19 +284,12 @@ def FindInstrument():
     return None
 
 def FindAnimalToTame():
-    global minimumTamingDifficulty, recently_tamed_serials, maximumDifficultyOffset
-    animalFilter = Mobiles.Filter()
-    animalFilter.Enabled = True
-    animalFilter.Bodies = GetAnimalsInSkillRange(minimumTamingDifficulty, maximumDifficultyOffset)
-    animalFilter.RangeMin = 0
-    animalFilter.RangeMax = 12
-    animalFilter.IsHuman = 0
-    animalFilter.IsGhost = 0
-    animalFilter.CheckIgnoreObject = True
-    tameableMobiles = Mobiles.ApplyFilter(animalFilter)
+    global minimumTamingDifficulty, maximumDifficultyOffset
+    PruneBlacklist()
+    tameableMobiles = Mobiles.ApplyFilter(GetAnimalFilter(minimumTamingDifficulty, maximumDifficultyOffset))
     valid_mobiles = []
     for mobile in tameableMobiles:
-        if not (mobile.Name in petsToIgnore or mobile.Serial in recently_tamed_serials):
+        if not (mobile.Name in petsToIgnore or IsBlacklisted(mobile.Serial)):
             valid_mobiles.append(mobile)
     if not valid_mobiles:
         return None
@@ -273,7 +386,7 @@ def HandleAttackers():
 
 def TrainAnimalTaming():
     global renameTamedAnimalsTo, numberOfFollowersToKeep, maximumTameAttempts
-    global enablePeacemaking, enableFollowAnimal, healUsing, recently_tamed_serials, defendYourself
+    global enablePeacemaking, enableFollowAnimal, healUsing, defendYourself
 
     if Player.GetRealSkillValue('Animal Taming') >= Player.GetSkillCap('Animal Taming'):
         Misc.SendMessage("You've already maxed out Animal Taming!", 65)
@@ -287,6 +400,8 @@ def TrainAnimalTaming():
 
     Journal.Clear()
     Misc.ClearIgnore()
+    LoadBlacklist()
+    ApplyBlacklist()
     Player.SetWarMode(False)
     
     last_health = Player.Hits
@@ -309,7 +424,7 @@ def TrainAnimalTaming():
             animalBeingTamed = None
             continue
         if animalBeingTamed and maximumTameAttempts > 0 and timesTried >= maximumTameAttempts:
-            Misc.IgnoreObject(animalBeingTamed)
+            Blacklist(animalBeingTamed.Serial, 'failed')
             animalBeingTamed = None
             timesTried = 0
             continue
@@ -334,16 +449,16 @@ def TrainAnimalTaming():
         if Player.DistanceTo(animalBeingTamed) > 2:
             if enableFollowAnimal:
                 if not FollowMobile(animalBeingTamed, 2):
-                    Misc.IgnoreObject(animalBeingTamed)
+                    Blacklist(animalBeingTamed.Serial, 'unreachable')
                     animalBeingTamed = None
                     continue
             else:
-                Misc.IgnoreObject(animalBeingTamed)
+                Blacklist(animalBeingTamed.Serial, 'unreachable')
                 animalBeingTamed = None
                 continue
         
         if not Timer.Check('animalTamingTimer'):
-            Journal.Clear()
+            sync_journal_cursor()
             Player.UseSkill('Animal Taming')
             Target.WaitForTarget(2000, True)
             Target.TargetExecute(animalBeingTamed)
@@ -352,29 +467,19 @@ def TrainAnimalTaming():
             max_wait_ms = 15000
             wait_interval_ms = 500
             time_waited = 0
-            tame_result = "in_progress"
+            tame_result = None
             
-            while tame_result == "in_progress" and time_waited < max_wait_ms:
-                if Journal.Search("It seems to accept you as master") or Journal.Search("That wasn't even challenging"):
-                    tame_result = "success"
-                    continue
-                elif Journal.Search("You fail to tame the") or Journal.Search("You must wait") or Journal.Search("already tame") or Journal.Search("too far away"):
-                    tame_result = "failure"
-                    continue
+            while tame_result is None and time_waited < max_wait_ms:
+                tame_result = WaitForJournalOutcome(tameMatcher, wait_interval_ms)
+                time_waited += wait_interval_ms
                 
-                if Player.DistanceTo(animalBeingTamed) > 4:
+                if tame_result is None and Player.DistanceTo(animalBeingTamed) > 4:
                     Player.PathFindTo(animalBeingTamed.Position.X, animalBeingTamed.Position.Y, animalBeingTamed.Position.Z)
-                    Misc.Pause(wait_interval_ms) 
-                
-                Misc.Pause(wait_interval_ms)
-                time_waited += wait_interval_ms
             
             if tame_result == "success":
                 tamed_serial = animalBeingTamed.Serial
                 Misc.Pause(2500) 
-                recently_tamed_serials.append(tamed_serial)
-                if len(recently_tamed_serials) > 50:
-                    recently_tamed_serials.pop(0)
+                Blacklist(tamed_serial, 'tamed')
                 if animalBeingTamed.Name != renameTamedAnimalsTo:
                     Misc.PetRename(animalBeingTamed, renameTamedAnimalsTo)
                     Misc.Pause(1000)
@@ -396,12 +501,13 @@ def TrainAnimalTaming():
                             if Gumps.WaitForGump(release_gump_id, 3000):
                                 Gumps.SendAction(release_gump_id, 2)
                                 Misc.Pause(1500)
-                Misc.IgnoreObject(tamed_serial)
+                                Blacklist(tamed_serial, 'released')
                 animalBeingTamed = None
-            else:
-                if Journal.Search("already tame") or Journal.Search("too far away"):
-                    Misc.IgnoreObject(animalBeingTamed)
+            elif tame_result == "ignore":
+                Blacklist(animalBeingTamed.Serial, 'ignored')
                 animalBeingTamed = None
+            # After a failed attempt keep working on the same animal, so timesTried counts
+            # towards maximumTameAttempts
             Timer.Create('animalTamingTimer', 2000)
         
 # Start Animal Taming
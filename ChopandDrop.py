@@ -3,21 +3,31 @@
 # What it does:
 # 1. Prompts you to target your axe and a weapon for combat.
 # 2. If attacked, it automatically equips your weapon and waits for the fight to end.
-# 3. Scans for the nearest tree, pathfinds to it, and chops it.
+# 3. Scans for trees, plans a short walking route through them, and chops each one in turn.
 # 4. After each successful chop, it drops the logs on the ground next to you.
 # 5. When a tree is depleted, it finds the next one and continues.
-# 6. Remembers which trees are depleted to avoid getting stuck.
+# 6. Remembers which trees are depleted (also across restarts) and skips them until they grow back.
 # 7. Automatically finds and equips a new axe if your current one breaks.
 # 8. Stops automatically if you run out of axes.
+# 9. Remembers where trees are in a local file, so each part of the forest is only scanned once.
 #
 # How to use:
-# 1. Place this script in your Razor Enhanced 'Scripts' folder.
+# 1. Place this script in your Razor Enhanced 'Scripts' folder. Action_Pacing.py, Gathering.py,
+#    Journal_Matching.py, Walkability.py and Razor_API.py go in the same folder.
 # 2. Have one or more axes and a weapon in your backpack.
 # 3. Stand in a forested area and run the script. It will prompt you for your items.
 # 4. To stop, you must manually stop it from the Razor Enhanced scripts tab.
 
 import sys
-import math
+
+# The helper modules below get the Razor Enhanced objects from this script.
+import Razor_API
+Razor_API.install(globals())
+from Action_Pacing import paced_wait
+from Journal_Matching import compile_journal_outcomes, sync_journal_cursor, poll_journal
+from Gathering import (DepletedRegistry, tree_index, load_tree_index, save_tree_index,
+                       scan_tree_ring, tree_scan_done, find_trees_in_range, plan_route)
+from Walkability import is_walkable, find_walkable_neighbor
 
 # --- Configuration ---
 
@@ -25,18 +35,37 @@ import math
 AXE_GRAPHICS = [0x0F49, 0x0F47, 0x0F45, 0x13FB]
 LOG_GRAPHIC = 0x1BDD
 
-# The radius (in tiles) around the player to scan for trees.
-TREE_SEARCH_RADIUS = 15
+# While a chop is under way, the next route is scanned this many rings at a time.
+TREE_SCAN_RINGS_PER_STEP = 3
+
+# Trees outside these boundaries are never chopped, given as the (west, north, east, south)
+# edges of the area to stay in, e.g. (None, 1260, 1658, None). None chops trees anywhere.
+TREE_BOUNDS = None
+
+# How trees are searched for, remembered and routed through is set in Gathering.py.
+
+# Depleted trees are skipped until they have had time to grow back. The list is saved to
+# disk so a restarted script does not walk back to trees it already emptied. Trees that
+# cannot be reached are skipped for longer, since that rarely changes.
+DEPLETED_TREES_FILE = "depleted_trees.json"
+DEPLETED_TREES_MAX = 2000
+TREE_RESPAWN_MINUTES = 20
+UNREACHABLE_TREE_MINUTES = 240
 
 # Delay in milliseconds after each chop attempt.
 ACTION_DELAY = 3500
 
-# A list of static tile IDs for various tree types.
-TREE_GRAPHICS = [
-    0x0CCA, 0x0CCB, 0x0CCC, 0x0CCD, 0x0CD0, 0x0CD3, 0x0CD6, 0x0CD8,
-    0x0CDA, 0x0CDD, 0x0CE0, 0x0CE3, 0x0CE6, 0x0D43, 0x0D59, 0x0D70,
-    0x0D85, 0x0D94, 0x0D98, 0x0DA4, 0x0DA8
-]
+# Delays are learned while the script runs: after each action the script waits only until
+# its result shows up, and never more than twice the delay configured above. How the delays
+# are learned is set in Action_Pacing.py.
+
+# Journal lines that end a chop, grouped by result.
+CHOP_OUTCOMES = {
+    "logs": ["You put some logs", "You chop some"],
+    "failed": ["fail to produce any useable wood"],
+    "depleted": ["There are no logs left", "That is too far away", "There's not enough wood here to harvest"],
+    "must_wait": ["You must wait"],
+}
 
 # --- Helper Functions ---
 
@@ -74,45 +103,67 @@ def handle_combat(weapon_serial):
     return new_axe_serial
 
 
-def find_walkable_neighbor(x, y):
-    """Finds a walkable tile adjacent to the target coordinates."""
-    neighbors = [(0, -1), (1, 0), (0, 1), (-1, 0), (-1, -1), (1, -1), (1, 1), (-1, 1)]
-    for dx, dy in neighbors:
-        check_x, check_y = x + dx, y + dy
-        land_id = Statics.GetLandID(check_x, check_y, Player.Map)
-        if not Statics.GetLandFlag(land_id, 'Impassable'):
-            statics_at_neighbor = Statics.GetStaticsTileInfo(check_x, check_y, Player.Map)
-            is_blocked = False
-            for static_item in statics_at_neighbor:
-                if Statics.GetTileFlag(static_item.StaticID, 'Impassable'):
-                    is_blocked = True
+def left_backpack(serial):
+    """Returns True once an item is no longer directly in the backpack, otherwise None."""
+    item = Items.FindBySerial(serial)
+    if item is None or item.Container != Player.Backpack.Serial:
+        return True
+    return None
+
+# --- Target Prefetch ---
+
+# The tree after the current one, where to stand next to it and the path there. It is worked
+# out one small step at a time while waiting on chops, and is only good while we stand still.
+prefetch = {}
+
+def prefetch_step(route):
+    """Does the next small step of planning the walk to the tree after route[0]."""
+    origin = (Player.Map, Player.Position.X, Player.Position.Y)
+    if prefetch.get("origin") != origin:
+        prefetch.clear()
+        prefetch["origin"] = origin
+    if "route" not in prefetch:
+        # The rest of the current route, or a fresh one if this is its last tree.
+        rest = [tree for tree in route[1:] if not depleted_trees.is_depleted(origin[0], tree[0], tree[1])]
+        if rest:
+            prefetch["route"] = rest
+        elif "scan" not in prefetch:
+            prefetch["scan"] = {"radius": 0, "trees": [], "known_blocks": len(tree_index)}
+        elif not tree_scan_done(prefetch["scan"]["radius"], prefetch["scan"]["trees"]):
+            # Only a few rings per step, so a chop result is never left waiting on a whole scan.
+            scan = prefetch["scan"]
+            for step in range(TREE_SCAN_RINGS_PER_STEP):
+                if tree_scan_done(scan["radius"], scan["trees"]):
                     break
-            if not is_blocked:
-                return (check_x, check_y)
-    return (None, None)
-
-def find_closest_tree(ignore_list):
-    """Finds the closest reachable tree that is not on the ignore list."""
-    closest_tree = None
-    min_dist = float('inf')
-    tree_x, tree_y = 0, 0
-    for x in range(Player.Position.X - TREE_SEARCH_RADIUS, Player.Position.X + TREE_SEARCH_RADIUS + 1):
-        for y in range(Player.Position.Y - TREE_SEARCH_RADIUS, Player.Position.Y + TREE_SEARCH_RADIUS + 1):
-            if (x, y) in ignore_list:
-                continue
-            tile_info_list = Statics.GetStaticsTileInfo(x, y, Player.Map)
-            for tile in tile_info_list:
-                if tile.StaticID in TREE_GRAPHICS:
-                    dist = math.sqrt((Player.Position.X - x)**2 + (Player.Position.Y - y)**2)
-                    if dist < min_dist:
-                        min_dist = dist
-                        closest_tree = tile
-                        tree_x = x
-                        tree_y = y
-    if closest_tree:
-        return (closest_tree, tree_x, tree_y)
-    else:
-        return (None, 0, 0)
+                scan_tree_ring(origin[0], origin[1], origin[2], scan["radius"], scan["trees"], depleted_trees, TREE_BOUNDS)
+                scan["radius"] += 1
+        else:
+            scan = prefetch.pop("scan")
+            if len(tree_index) != scan["known_blocks"]:
+                save_tree_index()
+            trees = [tree for tree in scan["trees"] if tree[:2] != route[0][:2]]
+            prefetch["route"] = plan_route(origin[1:], trees)
+    elif prefetch["route"] and "walk_to" not in prefetch:
+        next_tree = prefetch["route"][0]
+        prefetch["walk_to"] = find_walkable_neighbor(next_tree[0], next_tree[1])
+    elif prefetch["route"] and "path" not in prefetch:
+        walk_to_x, walk_to_y = prefetch["walk_to"]
+        prefetch["path"] = PathFinding.GetPath(walk_to_x, walk_to_y, True) if walk_to_x is not None else None
+
+def take_prefetch():
+    """Returns what was prefetched and starts over, or None if it is missing or we have moved."""
+    planned = dict(prefetch)
+    prefetch.clear()
+    if "route" not in planned or planned["origin"] != (Player.Map, Player.Position.X, Player.Position.Y):
+        return None
+    return planned
+
+def chop_result(route):
+    """Returns how the last chop went, or None after doing one step of prefetching."""
+    result = poll_journal(chop_matcher)
+    if result is None:
+        prefetch_step(route)
+    return result
 
 # --- Main Script ---
 
@@ -132,7 +183,11 @@ if weapon_serial == 0:
     Misc.SendMessage(">> Canceled. No weapon selected.", 33)
     sys.exit()
 
-depleted_trees = []
+load_tree_index()
+depleted_trees = DepletedRegistry(DEPLETED_TREES_FILE, DEPLETED_TREES_MAX, TREE_RESPAWN_MINUTES, "tree")
+depleted_trees.load()
+chop_matcher = compile_journal_outcomes(CHOP_OUTCOMES)
+route = []
 
 # Main Loop
 while True:
@@ -147,21 +202,38 @@ while True:
             Misc.SendMessage(">> No more axes found! Stopping script.", 33)
             break
             
-    # Find the next tree to chop
-    tree, tree_x, tree_y = find_closest_tree(depleted_trees)
-    if tree is None:
-        Misc.SendMessage(">> No more trees found in range. Stopping script.", 33)
-        break
-
-    # Pathfind to a walkable spot next to the tree
-    walk_to_x, walk_to_y = find_walkable_neighbor(tree_x, tree_y)
+    # Find the next tree to chop, dropping trees that were emptied since the route was planned.
+    while route and depleted_trees.is_depleted(Player.Map, route[0][0], route[0][1]):
+        route.pop(0)
+    planned = take_prefetch()
+    if not route:
+        if planned is not None and planned["route"]:
+            route = planned["route"]
+        else:
+            route = plan_route((Player.Position.X, Player.Position.Y), find_trees_in_range(depleted_trees, TREE_BOUNDS))
+        if not route:
+            Misc.SendMessage(">> No more trees found in range. Stopping script.", 33)
+            break
+        Misc.SendMessage(">> Planned a route through {} trees.".format(len(route)), 68)
+    # The tree stays at the head of the route until it is marked depleted.
+    tree_x, tree_y, tree_id, tree_z = route[0]
+
+    # Pathfind to a walkable spot next to the tree.
+    # Use the spot and path worked out while chopping the last tree, if they are for this one.
+    if planned is not None and planned["route"][:1] == route[:1] and "walk_to" in planned:
+        walk_to_x, walk_to_y = planned["walk_to"]
+        path = planned.get("path")
+    else:
+        walk_to_x, walk_to_y = find_walkable_neighbor(tree_x, tree_y)
+        path = None
     if walk_to_x is None:
-        depleted_trees.append((tree_x, tree_y))
+        depleted_trees.mark(tree_x, tree_y, UNREACHABLE_TREE_MINUTES)
         continue
 
-    path = PathFinding.GetPath(walk_to_x, walk_to_y, True)
+    if path is None:
+        path = PathFinding.GetPath(walk_to_x, walk_to_y, True)
     if not path or not PathFinding.RunPath(path, 15.0, False, False):
-        depleted_trees.append((tree_x, tree_y))
+        depleted_trees.mark(tree_x, tree_y, UNREACHABLE_TREE_MINUTES)
         continue
         
     Misc.Pause(500)
@@ -178,23 +250,20 @@ while True:
             Misc.SendMessage(">> Axe broke, finding new tree.", 138)
             break
 
-        Journal.Clear()
+        sync_journal_cursor()
         Items.UseItem(axe_serial)
         if Target.WaitForTarget(2000):
-            Target.TargetExecute(tree_x, tree_y, tree.StaticZ, tree.StaticID)
+            Target.TargetExecute(tree_x, tree_y, tree_z, tree_id)
         else:
             Misc.SendMessage(">> Error: Timed out waiting for target.", 33)
-            depleted_trees.append((tree_x, tree_y))
+            depleted_trees.mark(tree_x, tree_y)
             break
 
-        Misc.Pause(ACTION_DELAY)
-        
-        # Check for messages indicating the tree is depleted
-        if (Journal.Search("There are no logs left") or 
-                Journal.Search("That is too far away") or 
-                Journal.Search("There's not enough wood here to harvest")):
+        # Stop waiting as soon as the journal shows how the chop went, and plan the walk
+        # to the next tree in the meantime.
+        if paced_wait("chop", ACTION_DELAY, lambda: chop_result(route)) == "depleted":
             Misc.SendMessage(">> Tree depleted. Finding new tree.", 78)
-            depleted_trees.append((tree_x, tree_y))
+            depleted_trees.mark(tree_x, tree_y)
             break # Exit inner loop to find a new tree
         else:
             # If the chop was successful, find and drop the logs.
@@ -214,9 +283,14 @@ while True:
                     drop_x = Player.Position.X + dx
                     drop_y = Player.Position.Y + dy
                     drop_z = Player.Position.Z
+
+                    # Logs cannot be dropped on blocked tiles, so don't waste a move on them.
+                    if not is_walkable(drop_x, drop_y):
+                        continue
                     
                     Items.MoveOnGround(logs.Serial, 0, drop_x, drop_y, drop_z)
-                    Misc.Pause(1200) # Give server time to process the move and update client
+                    # Give the server time to process the move, but no longer than it needs.
+                    paced_wait("drop", 1200, lambda: left_backpack(logs.Serial))
                     
                     # Check if the specific log item is still in the backpack
                     item_check = Items.FindBySerial(logs.Serial)
@@ -229,4 +303,5 @@ while True:
                     Misc.SendMessage(">> Could not drop logs. All adjacent tiles may be blocked.", 33)
 
 
+depleted_trees.save_if_changed()
 Misc.SendMessage(">> Lumberjacking script finished.", 68)
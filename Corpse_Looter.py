@@ -1,10 +1,39 @@
 # Simple Imbuing Material Looter for Razor Enhanced
 # Auto-loots gold, gems, and items with "major magic" or "artifact" for unraveling
+# What gets looted can be changed with a loot_rules.json file (see LOOT RULES below)
+# Needs Action_Pacing.py and Razor_API.py in the same Scripts folder
+
+import json
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+
+# Helper modules get the Razor Enhanced objects from here, so this goes before them
+import Razor_API
+Razor_API.install(globals())
+from Action_Pacing import paced_wait
 
 # Configuration
-LOOT_DELAY = 500  # Delay between looting items in milliseconds
+LOOT_DELAY = 500  # Longest wait after looting an item in milliseconds (the real wait is learned)
 MAX_LOOT_ATTEMPTS = 20  # Maximum items to loot per corpse
 CORPSE_TIMEOUT = 5000  # How long to wait for corpse contents to load
+PROPS_TIMEOUT = 3000  # Longest wait for the properties of a corpse's items, in milliseconds
+PROPS_REQUEST_TIMEOUT = 1  # Wait used only to ask for an item's properties, so all are asked at once
+PROPS_POLL_DELAY = 50  # How often to look for properties that have arrived
+PROPS_CACHE_SIZE = 1000  # How many items' properties to remember
+CORPSE_RANGE = 2  # Only corpses within this many tiles are looted
+PROCESSED_CORPSE_TTL = 600  # Seconds to remember a looted corpse (corpses decay before then)
+PROCESSED_CORPSE_LIMIT = 200  # Most looted corpses to remember at once
+IDLE_DELAY = 250  # Pause between searches when there is nothing to loot
+CORPSE_SCAN_INTERVAL = 1000  # How often to search for new corpses while standing still, in milliseconds (moving searches at once)
+KNAPSACK_HEADROOM = 50  # When you can carry fewer than this many more stones, loot only the most valuable set that fits
+DEFAULT_LOOT_VALUE = 1  # Value of one unit of an item matched by a rule without a "value"
+
+# Delays are learned while the script runs: after each action the script waits only until
+# its result shows up, and never more than twice the delay configured above. How the delays
+# are learned is set in Action_Pacing.py.
 
 # Gem ItemIDs (common gems in UO)
 GEM_IDS = [
@@ -27,77 +56,317 @@ GEM_IDS = [
     0x3196   # Perfect Emerald
 ]
 
-def is_imbuing_material(item):
-    """Check if item has 'major magic', 'artifact', is gold, or is a gem"""
+# Weight of one unit of stackable loot, in stones. Item.Weight stays 0 until an item's
+# properties have loaded, and gold and gems matched by ItemID never wait for them.
+UNIT_WEIGHTS = {gem_id: 0.1 for gem_id in GEM_IDS}
+UNIT_WEIGHTS[0x0EED] = 0.02  # Gold
+
+# LOOT RULES
+# An item is looted when it matches any rule and no "exclude" rule. A rule matches when all
+# of the conditions it lists hold:
+#   "item_ids":  ItemIDs (numbers, or strings like "0x0EED")
+#   "hues":      hues
+#   "props":     regular expressions that must all be found in the item's properties (case is ignored)
+#   "min_props": lowest values for numeric properties, e.g. {"luck": 100, "lower reagent cost": 15}
+#   "exclude":   true to never loot matching items
+#   "value":     what one unit is worth to you (a stack counts every unit). Once you are within
+#                KNAPSACK_HEADROOM stones of your maximum weight, only the set of items with the
+#                highest total value that still fits is looted
+# The rule's "name" is shown for every looted item and must be unique. If LOOT_RULES_FILE exists,
+# its list of rules is used instead of DEFAULT_LOOT_RULES (or the defaults, if a rule is invalid).
+LOOT_RULES_FILE = "loot_rules.json"
+DEFAULT_LOOT_RULES = [
+    {"name": "Gold", "item_ids": [0x0EED], "value": 1},
+    {"name": "Gem", "item_ids": GEM_IDS, "value": 150},
+    {"name": "Major Magic", "props": ["major magic"], "value": 1000},
+    {"name": "Artifact", "props": ["artifact"], "value": 5000},
+]
+
+def item_looted(serial):
+    """Return True once an item has reached the backpack, otherwise None"""
+    moved = Items.FindBySerial(serial)
+    if moved is None or moved.RootContainer == Player.Backpack.Serial:
+        return True
+    return None
+
+# Property cache
+# Serial -> property text of items already seen, least recently used first.
+props_cache = OrderedDict()
+
+def needs_props(item):
+    """Return True if an item can only be judged by its properties"""
+    if not loot_rules["uses_props"]:
+        return False
+    # Items matched by an ID rule are looted without waiting, unless an exclusion needs props
+    return loot_rules["props_exclusions"] or item.ItemID not in loot_rules["quick_ids"]
+
+def needs_weight(item):
+    """Return True if an item's weight can only be read from its properties"""
+    return item.ItemID not in UNIT_WEIGHTS and not item.PropsUpdated
+
+def request_props(items):
+    """Ask for the properties of every item not seen before, without waiting for any of them"""
+    for item in items:
+        if (needs_props(item) or needs_weight(item)) and item.Serial not in props_cache and not item.PropsUpdated:
+            Items.WaitForProps(item, PROPS_REQUEST_TIMEOUT)
+
+def cached_props(item):
+    """Return an item's property text, or None if its properties have not arrived yet"""
+    all_props = props_cache.get(item.Serial)
+    if all_props is not None:
+        props_cache.move_to_end(item.Serial)
+        return all_props
+    if not item.PropsUpdated:
+        return None
+    
+    # Join all properties into one string for easier searching
+    all_props = ' '.join(Items.GetPropStringList(item)).lower()
+    props_cache[item.Serial] = all_props
+    if len(props_cache) > PROPS_CACHE_SIZE:
+        props_cache.popitem(last=False)
+    return all_props
+
+# Weight cache
+# Serial -> weight in stones of items already judged, least recently used first.
+weight_cache = OrderedDict()
+
+# Loot rules, compiled once at startup
+loot_rules = None
+# Inline flags in a rule pattern, e.g. (?s) or (?ix)
+INLINE_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
+def load_loot_rules():
+    """Read the rule file if there is one, otherwise use the default rules"""
+    if not os.path.exists(LOOT_RULES_FILE):
+        return DEFAULT_LOOT_RULES
     try:
-        # Always loot gold
-        if item.ItemID == 0x0EED:  # Gold pile
-            return True, "Gold"
-        
-        # Check gems by ItemID
-        if item.ItemID in GEM_IDS:
-            return True, "Gem"
-        
-        # Wait for item properties to load if not already loaded
-        if not item.PropsUpdated:
-            Items.WaitForProps(item, 1000)
-        
-        # Get item properties as text
-        props = Items.GetPropStringList(item)
-        if not props:
-            return False, "No properties"
-        
-        # Join all properties into one string for easier searching
-        all_props = ' '.join(props).lower()
+        with open(LOOT_RULES_FILE) as rule_file:
+            rules = json.load(rule_file)
+        Misc.SendMessage(f"Loaded {len(rules)} loot rules from {LOOT_RULES_FILE}", 88)
+        return rules
+    except Exception as e:
+        Misc.SendMessage(f"Could not read {LOOT_RULES_FILE}, using default rules: {str(e)}", 33)
+        return DEFAULT_LOOT_RULES
+
+def to_number(value):
+    """Turn a rule value like 3822 or "0x0EEE" into a number"""
+    return int(value, 0) if isinstance(value, str) else int(value)
+
+def compile_loot_rules(rules):
+    """Turn rule dictionaries into sets and regexes that are quick to check. Raises ValueError or re.error for a bad rule"""
+    compiled = {"loot": [], "exclude": [], "quick_ids": set(), "props_exclusions": False, "values": {}}
+    prop_patterns = []
+    if not isinstance(rules, list):
+        raise ValueError(f"the rules must be a list, not {type(rules).__name__}")
+    for index, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            raise ValueError(f"rule {index + 1} must be an object, not {type(rule).__name__}")
+        if not isinstance(rule.get("min_props", {}), dict):
+            raise ValueError(f"min_props of rule {index + 1} must be an object")
+        checks = {
+            "name": rule.get("name", f"Rule {index + 1}"),
+            "item_ids": frozenset(to_number(i) for i in rule["item_ids"]) if "item_ids" in rule else None,
+            "hues": frozenset(to_number(h) for h in rule["hues"]) if "hues" in rule else None,
+            "props": [re.compile(pattern, re.IGNORECASE) for pattern in rule.get("props", [])],
+            "min_props": [(re.compile(re.escape(name) + r"\s*:?\s*\+?(\d+)", re.IGNORECASE), threshold)
+                          for name, threshold in rule.get("min_props", {}).items()],
+        }
+        # Rules are told apart by name (the value of what they loot is looked up by it)
+        if any(checks["name"] == other["name"] for other in compiled["loot"] + compiled["exclude"]):
+            raise ValueError(f"two rules are named {checks['name']}")
+        checks["uses_props"] = bool(checks["props"] or checks["min_props"])
+        prop_patterns += [pattern.pattern for pattern in checks["props"]]
+        prop_patterns += [pattern.pattern for pattern, threshold in checks["min_props"]]
+        if rule.get("exclude"):
+            compiled["exclude"].append(checks)
+            compiled["props_exclusions"] = compiled["props_exclusions"] or checks["uses_props"]
+        else:
+            compiled["loot"].append(checks)
+            compiled["values"][checks["name"]] = rule.get("value", DEFAULT_LOOT_VALUE)
+            if checks["item_ids"] is not None and checks["hues"] is None and not checks["uses_props"]:
+                compiled["quick_ids"].update(checks["item_ids"])
+    compiled["quick_ids"] = frozenset(compiled["quick_ids"])
+    compiled["uses_props"] = bool(prop_patterns)
+    # Every property pattern in one regex, so most items are ruled out with a single search.
+    # A pattern with inline flags such as (?s) would change or break the others, so then every
+    # rule is checked on its own instead.
+    compiled["props_pattern"] = None
+    if prop_patterns and not any(INLINE_FLAGS.search(p) for p in prop_patterns):
+        compiled["props_pattern"] = re.compile("|".join(f"(?:{p})" for p in prop_patterns), re.IGNORECASE)
+    return compiled
+
+def compile_loot_rules_or_default(rules):
+    """Compile the rules, falling back to DEFAULT_LOOT_RULES if one of them is invalid"""
+    try:
+        return compile_loot_rules(rules)
+    except (re.error, ValueError, TypeError, KeyError) as e:
+        Misc.SendMessage(f"Invalid loot rule in {LOOT_RULES_FILE}, using default rules: {str(e)}", 33)
+        return compile_loot_rules(DEFAULT_LOOT_RULES)
+
+def rule_matches(checks, item, all_props, props_hit):
+    """Return True if an item meets every condition of a compiled rule"""
+    if checks["item_ids"] is not None and item.ItemID not in checks["item_ids"]:
+        return False
+    if checks["hues"] is not None and item.Hue not in checks["hues"]:
+        return False
+    if checks["uses_props"]:
+        if not props_hit:
+            return False
+        for pattern in checks["props"]:
+            if not pattern.search(all_props):
+                return False
+        for pattern, threshold in checks["min_props"]:
+            found = pattern.search(all_props)
+            if not found or int(found.group(1)) < threshold:
+                return False
+    return True
+
+def is_imbuing_material(item, all_props=None):
+    """Check the item against the loot rules. Returns whether to loot it and the rule that decided"""
+    try:
+        # One search tells whether any property rule can match at all
+        prefilter = loot_rules["props_pattern"]
+        props_hit = bool(all_props and loot_rules["uses_props"] and (prefilter is None or prefilter.search(all_props)))
         
-        # Check for "major magic"
-        if 'major magic' in all_props:
-            return True, "Major Magic"
+        for checks in loot_rules["exclude"]:
+            if rule_matches(checks, item, all_props, props_hit):
+                return False, f"Excluded by {checks['name']}"
         
-        # Check for "artifact"
-        if 'artifact' in all_props:
-            return True, "Artifact"
+        for checks in loot_rules["loot"]:
+            if rule_matches(checks, item, all_props, props_hit):
+                return True, checks["name"]
         
-        return False, "Not major magic or artifact"
+        return False, "No properties" if not all_props and needs_props(item) else "No rule matched"
         
     except Exception as e:
         Misc.SendMessage(f"Error checking item: {str(e)}", 33)
         return False, f"Error: {str(e)}"
 
-def loot_corpse(corpse):
-    """Loot imbuing materials from a corpse"""
+def loot_item(item, reason):
+    """Move an item to the backpack. Returns True if it was looted"""
     try:
-        Misc.SendMessage(f"Examining corpse: 0x{corpse.Serial:08X}", 88)
+        # Move item to backpack
+        Items.Move(item, Player.Backpack, -1)
+        paced_wait("loot", LOOT_DELAY, lambda: item_looted(item.Serial))
         
-        # Wait for corpse contents to load
-        Items.WaitForContents(corpse, CORPSE_TIMEOUT)
+        item_name = item.Name if item.Name else f"ItemID: 0x{item.ItemID:04X}"
+        Misc.SendMessage(f"Looted for imbuing: {item_name} ({reason})", 68)
+        return True
         
-        if not corpse.Contains:
-            Misc.SendMessage("Corpse is empty or contents not loaded", 33)
-            return
+    except Exception as e:
+        Misc.SendMessage(f"Failed to loot {item.Name}: {str(e)}", 33)
+        return False
+
+def matching_items(corpse):
+    """Yield (item, rule name) for each item in a corpse that should be looted, as soon as it can be judged"""
+    # Wait for corpse contents to load
+    Items.WaitForContents(corpse, CORPSE_TIMEOUT)
+    
+    if not corpse.Contains:
+        Misc.SendMessage("Corpse is empty or contents not loaded", 33)
+        return
+    
+    # Ask for every item's properties at once, then check each item as soon as they
+    # arrive. Gold, gems and items seen before need no waiting.
+    pending = list(corpse.Contains)
+    request_props(pending)
+    started = time.time()
+    
+    while pending:
+        waiting = []
+        for item in pending:
+            all_props = None
+            if needs_props(item):
+                all_props = cached_props(item)
+                if all_props is None:
+                    waiting.append(item)
+                    continue
+            
+            is_imbuing, reason = is_imbuing_material(item, all_props)
+            if is_imbuing:
+                # The weight of anything but gold and gems comes with the properties
+                if needs_weight(item):
+                    waiting.append(item)
+                    continue
+                item_weight(item)
+                yield item, reason
         
+        pending = waiting
+        if pending and (time.time() - started) * 1000.0 >= PROPS_TIMEOUT:
+            Misc.SendMessage(f"Properties did not load for {len(pending)} items", 33)
+            break
+        if pending:
+            Misc.Pause(PROPS_POLL_DELAY)
+
+def free_weight():
+    """Return how many more stones the player can carry"""
+    return Player.MaxWeight - Player.Weight
+
+def item_weight(item):
+    """Return the weight of an item (the whole stack) in stones, worked out once per item"""
+    weight = weight_cache.get(item.Serial)
+    if weight is not None:
+        weight_cache.move_to_end(item.Serial)
+        return weight
+    unit_weight = UNIT_WEIGHTS.get(item.ItemID)
+    if unit_weight is not None:
+        weight = unit_weight * max(item.Amount, 1)
+    else:
+        # matching_items only passes items on once their properties (and so Item.Weight) have loaded
+        weight = max(float(item.Weight), 0.0)
+    weight_cache[item.Serial] = weight
+    if len(weight_cache) > PROPS_CACHE_SIZE:
+        weight_cache.popitem(last=False)
+    return weight
+
+def loot_value(item, reason):
+    """Return what an item is worth by the rule that matched it"""
+    return loot_rules["values"].get(reason, DEFAULT_LOOT_VALUE) * max(item.Amount, 1)
+
+def choose_loot(candidates, capacity):
+    """Return the (item, reason) pairs with the highest total value that weigh at most capacity stones"""
+    # 0/1 knapsack over tenths of a stone
+    units = int(capacity * 10)
+    if units <= 0:
+        return []
+    weights = [max(1, int(math.ceil(item_weight(item) * 10))) for item, reason in candidates]
+    values = [loot_value(item, reason) for item, reason in candidates]
+    best = [0] * (units + 1)
+    taken = []
+    for index, weight in enumerate(weights):
+        took = bytearray(units + 1)
+        for room in range(units, weight - 1, -1):
+            with_item = best[room - weight] + values[index]
+            if with_item > best[room]:
+                best[room] = with_item
+                took[room] = 1
+        taken.append(took)
+    
+    # Walk back from the full capacity to find which items were taken
+    chosen = []
+    room = units
+    for index in range(len(candidates) - 1, -1, -1):
+        if taken[index][room]:
+            chosen.append(candidates[index])
+            room -= weights[index]
+    return chosen
+
+def loot_corpse(corpse):
+    """Loot imbuing materials from a corpse"""
+    try:
+        Misc.SendMessage(f"Examining corpse: 0x{corpse.Serial:08X}", 88)
         looted_count = 0
         
-        # Check each item in the corpse
-        for item in corpse.Contains:
+        # Check each item in the corpse as soon as it can be judged
+        for item, reason in matching_items(corpse):
             if looted_count >= MAX_LOOT_ATTEMPTS:
                 Misc.SendMessage("Max loot attempts reached", 33)
                 break
-            
-            is_imbuing, reason = is_imbuing_material(item)
-            
-            if is_imbuing:
-                try:
-                    # Move item to backpack
-                    Items.Move(item, Player.Backpack, -1)
-                    Misc.Pause(LOOT_DELAY)
-                    
-                    looted_count += 1
-                    item_name = item.Name if item.Name else f"ItemID: 0x{item.ItemID:04X}"
-                    Misc.SendMessage(f"Looted for imbuing: {item_name} ({reason})", 68)
-                    
-                except Exception as e:
-                    Misc.SendMessage(f"Failed to loot {item.Name}: {str(e)}", 33)
+            if item_weight(item) > free_weight():
+                Misc.SendMessage(f"Too heavy to loot: {item.Name} ({reason})", 33)
+                continue
+            if loot_item(item, reason):
+                looted_count += 1
         
         if looted_count == 0:
             Misc.SendMessage("No imbuing materials found in corpse", 88)
@@ -107,49 +376,177 @@ def loot_corpse(corpse):
     except Exception as e:
         Misc.SendMessage(f"Error looting corpse: {str(e)}", 33)
 
-def find_open_corpse():
-    """Find an open corpse container"""
+def loot_by_value(corpses):
+    """Loot the most valuable set of items from several corpses that still fits in the backpack.
+    Returns the serials of the corpses that still hold loot that was left behind"""
+    # Corpses are only done with once everything worth looting has been taken from them
+    left_behind = set(corpse.Serial for corpse in corpses)
     try:
-        # Create filter for corpses
+        candidates = []
+        # Item serial -> serial of the corpse it is in, to keep to MAX_LOOT_ATTEMPTS per corpse
+        corpse_of = {}
+        for corpse in corpses:
+            Misc.SendMessage(f"Examining corpse: 0x{corpse.Serial:08X}", 88)
+            for item, reason in matching_items(corpse):
+                candidates.append((item, reason))
+                corpse_of[item.Serial] = corpse.Serial
+        
+        chosen = choose_loot(candidates, free_weight())
+        # Best value per stone first
+        chosen.sort(key=lambda pair: -loot_value(*pair) / max(item_weight(pair[0]), 0.1))
+        looted_count = 0
+        looted_per_corpse = {}
+        looted_serials = set()
+        for item, reason in chosen:
+            corpse_serial = corpse_of[item.Serial]
+            if looted_per_corpse.get(corpse_serial, 0) >= MAX_LOOT_ATTEMPTS:
+                continue
+            if loot_item(item, reason):
+                looted_count += 1
+                looted_per_corpse[corpse_serial] = looted_per_corpse.get(corpse_serial, 0) + 1
+                looted_serials.add(item.Serial)
+        left_behind = set(corpse_of[item.Serial] for item, reason in candidates
+                          if item.Serial not in looted_serials)
+        
+        if any(count >= MAX_LOOT_ATTEMPTS for count in looted_per_corpse.values()):
+            Misc.SendMessage("Max loot attempts reached", 33)
+        Misc.SendMessage(f"Backpack nearly full: looted the best {looted_count} of {len(candidates)} items "
+                         f"from {len(corpses)} corpses", 68)
+            
+    except Exception as e:
+        Misc.SendMessage(f"Error looting corpses: {str(e)}", 33)
+    return left_behind
+
+# Corpse queue
+# The corpse search, built once and reused on every pass.
+corpse_filter = None
+# Serial -> time a corpse was looted, oldest first.
+processed_corpses = OrderedDict()
+# Serial -> free weight when a corpse was left with loot still in it. It is only looked at
+# again once more can be carried.
+picked_over_corpses = {}
+# When and where the last corpse search was made.
+last_corpse_scan = 0
+last_scan_position = None
+
+def get_corpse_filter():
+    """Return the filter for nearby corpses, creating it the first time"""
+    global corpse_filter
+    if corpse_filter is None:
         corpse_filter = Items.Filter()
         corpse_filter.Enabled = True
         corpse_filter.OnGround = 1
         corpse_filter.IsCorpse = 1
-        corpse_filter.RangeMax = 2  # Only corpses within 2 tiles
-        
-        # Get all nearby corpses
-        corpses = Items.ApplyFilter(corpse_filter)
-        
-        # Look for corpses that have been recently opened (have contents loaded)
-        for corpse in corpses:
+        corpse_filter.RangeMax = CORPSE_RANGE
+    return corpse_filter
+
+def forget_old_corpses():
+    """Drop looted corpses that are older than the TTL or past the size limit"""
+    cutoff = time.time() - PROCESSED_CORPSE_TTL
+    while processed_corpses:
+        serial, looted_at = next(iter(processed_corpses.items()))
+        if looted_at >= cutoff and len(processed_corpses) <= PROCESSED_CORPSE_LIMIT:
+            break
+        processed_corpses.popitem(last=False)
+
+def mark_processed(serial):
+    """Remember a corpse as looted"""
+    processed_corpses[serial] = time.time()
+    processed_corpses.move_to_end(serial)
+    forget_old_corpses()
+
+def corpse_scan_due():
+    """True when the player has moved or CORPSE_SCAN_INTERVAL has passed since the last search"""
+    global last_corpse_scan, last_scan_position
+    position = (Player.Map, Player.Position.X, Player.Position.Y)
+    now = time.time()
+    if position == last_scan_position and (now - last_corpse_scan) * 1000 < CORPSE_SCAN_INTERVAL:
+        return False
+    last_corpse_scan = now
+    last_scan_position = position
+    return True
+
+def queue_new_corpses(pending):
+    """Add open corpses that are neither looted nor queued yet to the pending set"""
+    # Between searches the pending set is kept current by next_corpse.
+    if not corpse_scan_due():
+        return
+    try:
+        carry = free_weight()
+        in_reach = set()
+        for corpse in Items.ApplyFilter(get_corpse_filter()):
+            in_reach.add(corpse.Serial)
+            if corpse.Serial in pending or corpse.Serial in processed_corpses:
+                continue
+            if picked_over_corpses.get(corpse.Serial, -1) >= carry:
+                continue
             # Check if corpse is already opened by looking for contents
             if corpse.Contains and len(corpse.Contains) > 0:
-                return corpse
-        
-        return None
-        
+                pending.add(corpse.Serial)
+        for serial in list(picked_over_corpses):
+            if serial not in in_reach:
+                del picked_over_corpses[serial]
     except Exception as e:
         Misc.SendMessage(f"Error finding corpse: {str(e)}", 33)
+
+def next_corpse(pending):
+    """Take the nearest pending corpse that is still in reach, or None"""
+    nearest = None
+    for serial in list(pending):
+        corpse = Items.FindBySerial(serial)
+        if corpse is None:
+            # Decayed or already gone
+            pending.discard(serial)
+            continue
+        distance = Player.DistanceTo(corpse)
+        if distance > CORPSE_RANGE:
+            continue
+        if nearest is None or distance < nearest[0]:
+            nearest = (distance, corpse)
+    if nearest is None:
         return None
+    pending.discard(nearest[1].Serial)
+    return nearest[1]
 
 def main():
     """Main script loop"""
+    global loot_rules
     Misc.SendMessage("Imbuing Material Looter started!", 68)
+    loot_rules = compile_loot_rules_or_default(load_loot_rules())
     Misc.SendMessage("Auto-looting major magic and artifact items for unraveling.", 88)
     
-    last_looted_corpse = None
+    # Serials of open corpses waiting to be looted
+    pending = set()
     
     while True:
         try:
-            # Find an open corpse
-            corpse = find_open_corpse()
+            # Queue newly opened corpses and loot the nearest one
+            queue_new_corpses(pending)
+            corpse = next_corpse(pending)
             
-            if corpse and corpse.Serial != last_looted_corpse:
+            if corpse and free_weight() <= KNAPSACK_HEADROOM:
+                # Nearly full: choose from every open corpse in reach at once
+                corpses = [corpse]
+                while True:
+                    corpse = next_corpse(pending)
+                    if corpse is None:
+                        break
+                    corpses.append(corpse)
+                left_behind = loot_by_value(corpses)
+                # Corpses with loot left in them are looked at again once more can be carried
+                carry = free_weight()
+                for corpse in corpses:
+                    if corpse.Serial in left_behind:
+                        picked_over_corpses[corpse.Serial] = carry
+                    else:
+                        picked_over_corpses.pop(corpse.Serial, None)
+                        mark_processed(corpse.Serial)
+            elif corpse:
                 loot_corpse(corpse)
-                last_looted_corpse = corpse.Serial
-                
-            # Small delay to prevent excessive CPU usage
-            Misc.Pause(250)
+                mark_processed(corpse.Serial)
+            else:
+                # Small delay to prevent excessive CPU usage
+                Misc.Pause(IDLE_DELAY)
             
         except KeyboardInterrupt:
             Misc.SendMessage("Script stopped by user", 33)
@@ -2,13 +2,15 @@
 #
 # What it does:
 # 1. Scans for cotton plants as items on the ground.
-# 2. Finds the nearest plant, walks to it, and picks it repeatedly.
+# 2. Plans a short walking route through the plants in range, walks to each one, and picks it repeatedly.
 # 3. After a successful pick, it loots the spawned cotton bale from the ground.
 # 4. When a plant is picked, its ID changes, so the script automatically finds the next valid plant.
 # 5. Stops automatically when you get too heavy.
+# 6. Remembers depleted plants (also across restarts) and skips them until they grow back.
 #
 # How to use:
-# 1. Place this script in your Razor Enhanced 'Scripts' folder.
+# 1. Place this script in your Razor Enhanced 'Scripts' folder. Action_Pacing.py, Gathering.py,
+#    Walkability.py and Razor_API.py go in the same folder.
 # 2. Stand in an area with cotton plants.
 # 3. Run the script.
 # 4. To stop, you must manually stop it from the Razor Enhanced scripts tab.
@@ -16,6 +18,13 @@
 import sys
 import math
 
+# The helper modules below get the Razor Enhanced objects from this script.
+import Razor_API
+Razor_API.install(globals())
+from Action_Pacing import paced_wait
+from Gathering import DepletedRegistry, plan_route
+from Walkability import find_walkable_neighbor
+
 # --- Configuration ---
 
 # Item IDs
@@ -29,33 +38,33 @@ COTTON_PLANT_GRAPHICS = [0x0C51, 0x0C52, 0x0C53, 0x0C54]
 # The radius (in tiles) around the player to scan for plants.
 PLANT_SEARCH_RADIUS = 18
 
+# How the walking route through the plants is planned is set in Gathering.py.
+
+# Depleted plants are skipped until they have had time to grow back. The list is saved to
+# disk so a restarted script does not walk back to plants it already emptied. Plants that
+# cannot be reached are skipped for longer, since that rarely changes.
+DEPLETED_PLANTS_FILE = "depleted_plants.json"
+DEPLETED_PLANTS_MAX = 500
+PLANT_RESPAWN_MINUTES = 10
+UNREACHABLE_PLANT_MINUTES = 120
+
 # The script will stop if your weight is this close to your maximum weight.
 WEIGHT_LIMIT_OFFSET = 10
 
 # Delay in milliseconds after each picking attempt.
 ACTION_DELAY = 1500
 
+# Delays are learned while the script runs: after each action the script waits only until
+# its result shows up, and never more than twice the delay configured above. How the delays
+# are learned is set in Action_Pacing.py.
+
 # --- Helper Functions ---
 
-def find_walkable_neighbor(x, y):
-    """Finds a walkable tile adjacent to the target coordinates."""
-    neighbors = [(0, -1), (1, 0), (0, 1), (-1, 0), (-1, -1), (1, -1), (1, 1), (-1, 1)]
-    for dx, dy in neighbors:
-        check_x, check_y = x + dx, y + dy
-        land_id = Statics.GetLandID(check_x, check_y, Player.Map)
-        if not Statics.GetLandFlag(land_id, 'Impassable'):
-            statics_at_neighbor = Statics.GetStaticsTileInfo(check_x, check_y, Player.Map)
-            is_blocked = False
-            for static_item in statics_at_neighbor:
-                if Statics.GetTileFlag(static_item.StaticID, 'Impassable'):
-                    is_blocked = True
-                    break
-            if not is_blocked:
-                return (check_x, check_y)
-    return (None, None)
-
-def find_closest_plant():
-    """Finds the closest reachable cotton plant."""
+def find_plants_in_range():
+    """Finds every cotton plant in range that is not depleted.
+
+    Returns a list of (x, y, plant) tuples.
+    """
     # Use an Item filter to find plants on the ground.
     plant_filter = Items.Filter()
     plant_filter.OnGround = 1 # We only want items on the ground
@@ -65,22 +74,48 @@ def find_closest_plant():
         
     ground_plants = Items.ApplyFilter(plant_filter)
     
-    closest_plant = None
-    min_dist = float('inf')
-    
+    plants_in_range = []
     for plant in ground_plants:
-        dist = Player.DistanceTo(plant)
-        if dist < min_dist:
-            min_dist = dist
-            closest_plant = plant
+        if depleted_plants.is_depleted(Player.Map, plant.Position.X, plant.Position.Y):
+            continue
+        plants_in_range.append((plant.Position.X, plant.Position.Y, plant))
             
-    return closest_plant
+    return plants_in_range
+
+def is_plant_pickable(plant):
+    """Returns True if the plant still exists, has not changed into a picked plant and is not depleted."""
+    current = Items.FindBySerial(plant.Serial)
+    if current is None or current.ItemID not in COTTON_PLANT_GRAPHICS:
+        return False
+    return not depleted_plants.is_depleted(Player.Map, current.Position.X, current.Position.Y)
+
+def find_cotton_bale():
+    """Returns a cotton bale lying within 2 tiles, or None."""
+    bale_filter = Items.Filter()
+    bale_filter.Graphics.Add(COTTON_ITEM_ID)
+    bale_filter.OnGround = 1
+    bale_filter.RangeMax = 2 # Search within 2 tiles
+    bale_list = Items.ApplyFilter(bale_filter)
+    if len(bale_list) > 0:
+        return bale_list[0]
+    return None
+
+def bale_picked_up(serial):
+    """Returns True once a bale is no longer on the ground, otherwise None."""
+    bale = Items.FindBySerial(serial)
+    if bale is None or not bale.OnGround:
+        return True
+    return None
 
 # --- Main Script ---
 
 Misc.SendMessage(">> Starting Cotton Picking Script...", 68)
 Misc.Pause(2000) # Initial pause for client to settle
 
+depleted_plants = DepletedRegistry(DEPLETED_PLANTS_FILE, DEPLETED_PLANTS_MAX, PLANT_RESPAWN_MINUTES, "plant")
+depleted_plants.load()
+route = []
+
 # Main Loop
 while True:
     # Check player weight at the start of each loop.
@@ -88,26 +123,31 @@ while True:
         Misc.SendMessage(">> You are too heavy! Stopping script.", 33)
         break
             
-    # Find the next plant to pick
-    plant = find_closest_plant()
-    if plant is None:
-        Misc.SendMessage(">> No more cotton plants found in range. Stopping script.", 33)
-        break
-
-    plant_x = plant.Position.X
-    plant_y = plant.Position.Y
+    # Find the next plant to pick, dropping plants that were picked since the route was planned.
+    while route and not is_plant_pickable(route[0][2]):
+        route.pop(0)
+    if not route:
+        route = plan_route((Player.Position.X, Player.Position.Y), find_plants_in_range())
+        if not route:
+            Misc.SendMessage(">> No more cotton plants found in range. Stopping script.", 33)
+            break
+        Misc.SendMessage(">> Planned a route through {} plants.".format(len(route)), 68)
+    # The plant stays at the head of the route until it is picked or given up on.
+    plant_x, plant_y, plant = route[0]
 
     # Pathfind to a walkable spot next to the plant
     walk_to_x, walk_to_y = find_walkable_neighbor(plant_x, plant_y)
     if walk_to_x is None:
         # This case is unlikely but good for safety.
         Misc.SendMessage(">> No walkable spot found near the plant.", 138)
+        depleted_plants.mark(plant_x, plant_y, UNREACHABLE_PLANT_MINUTES)
         Misc.Pause(1000)
         continue
 
     path = PathFinding.GetPath(walk_to_x, walk_to_y, True)
     if not path or not PathFinding.RunPath(path, 15.0, False, False):
         Misc.SendMessage(">> Path to plant failed. Finding new plant.", 138)
+        depleted_plants.mark(plant_x, plant_y, UNREACHABLE_PLANT_MINUTES)
         continue
         
     Misc.Pause(500)
@@ -119,25 +159,22 @@ while True:
             Misc.SendMessage(">> Overweight, stopping pick on this plant.", 68)
             break
         
-        # Double-click the plant to pick it.
+        # Double-click the plant to pick it, then wait for the spawned bale to show success.
         Items.UseItem(plant.Serial)
-        Misc.Pause(ACTION_DELAY)
-        
-        # Check for the spawned bale to determine success.
-        bale_filter = Items.Filter()
-        bale_filter.Graphics.Add(COTTON_ITEM_ID)
-        bale_filter.OnGround = 1
-        bale_filter.RangeMax = 2 # Search within 2 tiles
-        bale_list = Items.ApplyFilter(bale_filter)
-
-        if len(bale_list) > 0:
+        bale = paced_wait("pick", ACTION_DELAY, find_cotton_bale)
+        if bale == "must_wait":
+            continue
+
+        if bale is not None:
             # Success! A bale was created.
             Misc.SendMessage(">> Found cotton bale. Picking it up...", 78)
-            Items.Move(bale_list[0].Serial, Player.Backpack.Serial, 0)
-            Misc.Pause(1000) # Pause after looting before trying again
+            Items.Move(bale.Serial, Player.Backpack.Serial, 0)
+            paced_wait("loot", 1000, lambda: bale_picked_up(bale.Serial))
         else:
             # Failure. No bale was created, so the plant must be empty.
             Misc.SendMessage(">> Plant is depleted. Finding new plant.", 78)
+            depleted_plants.mark(plant_x, plant_y)
             break # Exit inner loop to find a new plant
 
+depleted_plants.save_if_changed()
 Misc.SendMessage(">> Cotton picking script finished.", 68)
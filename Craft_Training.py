@@ -0,0 +1,187 @@
+# Shared Crafting Helpers for the Training Scripts
+#
+# What it does:
+# 1. Keeps the crafting gump of each tool open between crafts and presses "Make Last" when the
+#    same item is crafted again, so a craft costs as few gump round trips as possible.
+# 2. Learns the weight of one unit of an item from how much your weight changes when moving it.
+# 3. Picks the item that trains a crafting skill fastest at your current skill level, from the
+#    craft_min/craft_max range of each item in a training plan.
+#
+# How to use:
+# 1. Place this file in your Razor Enhanced 'Scripts' folder, together with Razor_API.py.
+# 2. Smith_Smelt.py and Train_Carpenter.py import it; there is nothing to run.
+
+import bisect
+
+from Razor_API import Misc, Items, Player, Journal, Gumps
+
+# --- Configuration ---
+
+# The "Make Last" button on the crafting gump. When the same item is crafted again, this
+# button is pressed instead of going through the category page first.
+MAKE_LAST_BUTTON_ID = 21
+
+# How long (in milliseconds) to wait for the crafting gump to open or change page, and how
+# long to wait for it to come back by itself after a craft before opening it again.
+GUMP_TIMEOUT = 2000
+GUMP_RETURN_TIMEOUT = 500
+
+# Journal text the server shows when a skill goes up. The item is only re-planned then.
+SKILL_GAIN_TEXT = "Your skill in"
+
+# --- Craft Session ---
+
+# Tool ItemID -> the crafting gump it opens, the category page it is on and the last
+# (category, item) buttons pressed. Kept while the gump stays open between crafts.
+craft_sessions = {}
+
+def open_craft_session(tool_serial):
+    """Returns the crafting session for a tool, opening its gump only if it is not already open."""
+    tool = Items.FindBySerial(tool_serial)
+    if tool is None:
+        return None
+    session = craft_sessions.setdefault(tool.ItemID, {"gump_id": 0, "category": None, "last_made": None})
+    # After a craft the server sends the gump back by itself.
+    if session["gump_id"] and Gumps.WaitForGump(session["gump_id"], GUMP_RETURN_TIMEOUT):
+        return session
+    Items.UseItem(tool_serial)
+    if not Gumps.WaitForGump(session["gump_id"], GUMP_TIMEOUT):
+        return None
+    session["gump_id"] = Gumps.CurrentGump()
+    # A freshly opened gump may be on any page.
+    session["category"] = None
+    return session
+
+def send_craft(tool_serial, details):
+    """Presses the buttons to craft an item. Returns False if the gump could not be used."""
+    session = open_craft_session(tool_serial)
+    if session is None:
+        return False
+    buttons = (details["category_gump"], details["item_gump"])
+    if session["last_made"] == buttons:
+        Gumps.SendAction(session["gump_id"], MAKE_LAST_BUTTON_ID)
+        return True
+    if session["category"] != details["category_gump"]:
+        Gumps.SendAction(session["gump_id"], details["category_gump"])
+        if not Gumps.WaitForGump(session["gump_id"], GUMP_TIMEOUT):
+            session["gump_id"] = 0
+            return False
+        session["category"] = details["category_gump"]
+    Gumps.SendAction(session["gump_id"], details["item_gump"])
+    session["last_made"] = buttons
+    return True
+
+# --- Unit Weights ---
+
+# ItemID -> the weight of one unit in stones, measured from Player.Weight. The weight is a
+# whole number of stones, so each measurement allows one stone more than the change seen.
+# That keeps every measurement at or above the real weight, and the smallest one is the closest.
+unit_weights = {}
+
+def measure_unit_weight(item_id, units, weight_change):
+    """Records the weight of one unit from how much your weight changed by moving or smelting some of them."""
+    # Player.Weight can lag behind the change. An unchanged weight tells us nothing.
+    if units <= 0 or weight_change <= 0:
+        return
+    measured = (weight_change + 1.0) / units
+    unit_weights[item_id] = min(unit_weights.get(item_id, measured), measured)
+
+# --- Skill Planner ---
+
+class SkillPlanner(object):
+    """Picks the item to craft from a training plan, following the RunUO/ServUO skill check.
+
+    material_key is the training plan entry with the materials one craft uses ("ingots", "boards").
+    The other settings are the script's USE_SKILL_PLANNER and PLAN_ values.
+    """
+
+    def __init__(self, skill_name, training_plan, material_key, use_planner=True, objective="time",
+                 craft_seconds=3.0, total_skill_room=0.5, failure_gain_bonus=0.0):
+        self.skill_name = skill_name
+        self.training_plan = training_plan
+        self.material_key = material_key
+        self.use_planner = use_planner
+        self.objective = objective
+        self.craft_seconds = craft_seconds
+        self.total_skill_room = total_skill_room
+        self.failure_gain_bonus = failure_gain_bonus
+        # The best item from each skill level on: plan_starts[i] is where plan_names[i] takes over.
+        self.plan_starts = []
+        self.plan_names = []
+        # The item picked last time, and the journal position where skill gains were last looked for.
+        self.planned_item = (None, None)
+        self.skill_gain_cursor = None
+
+    def gain_chance(self, skill, cap, success_chance, succeeded):
+        """Returns the chance of a 0.1 gain on one attempt, following the RunUO/ServUO skill check."""
+        chance = (self.total_skill_room + (cap - skill) / cap) / 2.0
+        chance += (1.0 - success_chance) * (0.5 if succeeded else self.failure_gain_bonus)
+        return max(chance / 2.0, 0.01)
+
+    def recipe_score(self, details, skill, cap):
+        """Returns the expected skill gained per second (or per unit of material) crafting an item at this skill."""
+        low, high = details["craft_min"], details["craft_max"]
+        if skill < low or skill >= high:
+            return 0.0
+        success = (skill - low) / (high - low)
+        gain = 0.1 * (success * self.gain_chance(skill, cap, success, True) +
+                      (1.0 - success) * self.gain_chance(skill, cap, success, False))
+        if self.objective == "materials":
+            # A failed craft loses about half of the materials.
+            return gain / (details[self.material_key] * (success + (1.0 - success) / 2.0))
+        return gain / details.get("seconds", self.craft_seconds)
+
+    def build_plan(self, cap):
+        """Scores every item at each 0.1 of skill and keeps the points where the best item changes."""
+        del self.plan_starts[:]
+        del self.plan_names[:]
+        lowest = min(details["craft_min"] for details in self.training_plan.values())
+        for tenths in range(int(lowest * 10), int(cap * 10)):
+            skill = tenths / 10.0
+            best_score, best_name = max((self.recipe_score(details, skill, cap), name)
+                                        for name, details in self.training_plan.items())
+            if best_score <= 0.0:
+                best_name = None
+            if not self.plan_names or self.plan_names[-1] != best_name:
+                self.plan_starts.append(skill)
+                self.plan_names.append(best_name)
+        self.plan_starts.append(cap)
+        self.plan_names.append(None)
+
+    def plan_item(self, skill):
+        """Returns the name of the best item to craft at this skill from the built plan, or None."""
+        index = bisect.bisect_right(self.plan_starts, skill) - 1
+        return self.plan_names[index] if index >= 0 else None
+
+    def skill_gained(self):
+        """Returns True if a skill went up since the last call (or on the first call)."""
+        gained = self.skill_gain_cursor is None
+        for entry in Journal.GetJournalEntry(self.skill_gain_cursor or 0):
+            self.skill_gain_cursor = max(self.skill_gain_cursor or 0, entry.Timestamp)
+            if SKILL_GAIN_TEXT in entry.Text:
+                gained = True
+        if self.skill_gain_cursor is None:
+            self.skill_gain_cursor = 0
+        return gained
+
+    def get_item_to_craft(self):
+        """Determines which item to craft based on current skill. Only looks again after a skill gain."""
+        if not self.skill_gained():
+            return self.planned_item
+        current_skill = Player.GetRealSkillValue(self.skill_name)
+        item_name, details = None, None
+        if self.use_planner:
+            if not self.plan_starts:
+                self.build_plan(Player.GetSkillCap(self.skill_name))
+            item_name = self.plan_item(current_skill)
+            if item_name is not None:
+                details = self.training_plan[item_name]
+        else:
+            for name, band in self.training_plan.items():
+                if current_skill >= band["min_skill"] and current_skill < band["max_skill"]:
+                    item_name, details = name, band
+                    break
+        if item_name is not None and item_name != self.planned_item[0]:
+            Misc.SendMessage(">> Skill is {:.1f}. Next item: {}".format(current_skill, item_name), 68)
+        self.planned_item = (item_name, details)
+        return self.planned_item
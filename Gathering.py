@@ -0,0 +1,350 @@
+# Shared Gathering Helpers for the Lumberjacking and Picking Scripts
+#
+# What it does:
+# 1. Remembers where trees are in a local file, so each part of the world is only scanned once,
+#    in small blocks, the first time it comes into range.
+# 2. Finds the nearest trees ring by ring outward from the player, skipping depleted trees and
+#    any past the boundaries a script sets.
+# 3. Remembers depleted trees or plants (also across restarts) and skips them until they grow back.
+#    The list is written to disk at most once every DEPLETED_SAVE_INTERVAL seconds.
+# 4. Plans a short walking route through the trees or plants in range.
+#
+# How to use:
+# 1. Place this file in your Razor Enhanced 'Scripts' folder, together with Razor_API.py.
+# 2. Lumberjacking_auto.py, ChopandDrop.py, Train_Lumberjacking.py and Cotton_Picking.py
+#    import it; there is nothing to run.
+
+import os
+import json
+import time
+from collections import OrderedDict
+
+from Razor_API import Misc, Player, Statics
+
+# --- Configuration ---
+
+# A list of static tile IDs for various tree types.
+TREE_GRAPHICS = [
+    0x0CCA, 0x0CCB, 0x0CCC, 0x0CCD, 0x0CD0, 0x0CD3, 0x0CD6, 0x0CD8,
+    0x0CDA, 0x0CDD, 0x0CE0, 0x0CE3, 0x0CE6, 0x0D43, 0x0D59, 0x0D70,
+    0x0D85, 0x0D94, 0x0D98, 0x0DA4, 0x0DA8
+]
+
+# The radius (in tiles) around the player to scan for trees. The search walks outward
+# ring by ring and stops once it has found enough trees for a full route (ROUTE_MAX_STOPS).
+# If nothing is found within TREE_SEARCH_RADIUS, it keeps widening up to
+# TREE_SEARCH_MAX_RADIUS and stops at the first ring with a usable tree.
+TREE_SEARCH_RADIUS = 15
+TREE_SEARCH_MAX_RADIUS = 20
+
+# The file where tree locations are remembered between runs. The world is scanned
+# once, in 8x8 tile blocks, the first time each block comes into range.
+# Set USE_TREE_INDEX to False to query the world directly on every search instead.
+USE_TREE_INDEX = True
+TREE_INDEX_FILE = "tree_index.json"
+TREE_INDEX_BLOCK_SIZE = 8
+
+# Trees and plants in range are visited in a planned order that keeps total walking short,
+# instead of always walking to whichever one is nearest right now. Longer routes take longer to plan.
+ROUTE_MAX_STOPS = 40
+ROUTE_MAX_PASSES = 10
+
+# Depleted trees and plants are written to disk at most this often (in seconds), instead of
+# after every one. Stopping a script can lose the ones marked since the last save.
+DEPLETED_SAVE_INTERVAL = 60
+
+# --- Tree Index ---
+
+# Trees found so far, keyed by (map, block_x, block_y) -> {(x, y): (static_id, static_z)}.
+tree_index = {}
+
+def load_tree_index():
+    """Loads the tree index saved by earlier runs, if there is one."""
+    tree_index.clear()
+    if not os.path.exists(TREE_INDEX_FILE):
+        return
+    try:
+        with open(TREE_INDEX_FILE, "r") as index_file:
+            saved = json.load(index_file)
+    except (IOError, ValueError):
+        Misc.SendMessage(">> Tree index file is unreadable. Rebuilding it.", 138)
+        return
+    # An index built with a different tree list would hide or invent trees, so start over.
+    if saved.get("graphics") != sorted(TREE_GRAPHICS):
+        Misc.SendMessage(">> Tree list changed since the index was saved. Rebuilding it.", 138)
+        return
+    for key, trees in saved["blocks"].items():
+        map_id, block_x, block_y = [int(part) for part in key.split(",")]
+        tree_index[(map_id, block_x, block_y)] = dict(
+            ((x, y), (static_id, static_z)) for x, y, static_id, static_z in trees
+        )
+    Misc.SendMessage(">> Loaded tree index ({} blocks).".format(len(tree_index)), 68)
+
+def save_tree_index():
+    """Writes the tree index to disk so the next run does not have to scan again."""
+    blocks = {}
+    for (map_id, block_x, block_y), trees in tree_index.items():
+        blocks["{},{},{}".format(map_id, block_x, block_y)] = [
+            [x, y, static_id, static_z] for (x, y), (static_id, static_z) in trees.items()
+        ]
+    try:
+        with open(TREE_INDEX_FILE, "w") as index_file:
+            json.dump({"graphics": sorted(TREE_GRAPHICS), "blocks": blocks}, index_file)
+    except IOError:
+        Misc.SendMessage(">> Could not save the tree index.", 33)
+
+def index_tree_block(map_id, block_x, block_y):
+    """Scans one block of the world for trees and adds it to the index."""
+    trees = {}
+    start_x = block_x * TREE_INDEX_BLOCK_SIZE
+    start_y = block_y * TREE_INDEX_BLOCK_SIZE
+    for x in range(start_x, start_x + TREE_INDEX_BLOCK_SIZE):
+        for y in range(start_y, start_y + TREE_INDEX_BLOCK_SIZE):
+            for tile in Statics.GetStaticsTileInfo(x, y, map_id):
+                if tile.StaticID in TREE_GRAPHICS:
+                    trees[(x, y)] = (tile.StaticID, tile.StaticZ)
+                    break
+    tree_index[(map_id, block_x, block_y)] = trees
+    return trees
+
+def get_tree_at(map_id, x, y):
+    """Returns (static_id, static_z) of the tree on a tile, or None if there is no tree."""
+    if not USE_TREE_INDEX:
+        for tile in Statics.GetStaticsTileInfo(x, y, map_id):
+            if tile.StaticID in TREE_GRAPHICS:
+                return (tile.StaticID, tile.StaticZ)
+        return None
+    block_x = x // TREE_INDEX_BLOCK_SIZE
+    block_y = y // TREE_INDEX_BLOCK_SIZE
+    trees = tree_index.get((map_id, block_x, block_y))
+    if trees is None:
+        trees = index_tree_block(map_id, block_x, block_y)
+    return trees.get((x, y))
+
+# --- Depleted Registry ---
+
+class DepletedRegistry(object):
+    """Remembers depleted trees or plants until they grow back, also across restarts.
+
+    noun names what is remembered in messages ("tree", "plant"). The other settings are the
+    script's DEPLETED_ and RESPAWN_MINUTES values.
+    """
+
+    def __init__(self, file_name, max_entries, respawn_minutes, noun):
+        self.file_name = file_name
+        self.max_entries = max_entries
+        self.respawn_minutes = respawn_minutes
+        self.noun = noun
+        # Keyed by (map, x, y) -> time (in seconds) when it can be gathered again, oldest first.
+        self.entries = OrderedDict()
+        # Whether entries changed since the last save, and when that save was.
+        self.dirty = False
+        self.saved_at = time.time()
+
+    def load(self):
+        """Loads the entries saved by earlier runs, skipping any that have grown back."""
+        if not os.path.exists(self.file_name):
+            return
+        try:
+            with open(self.file_name, "r") as depleted_file:
+                saved = json.load(depleted_file)
+        except (IOError, ValueError):
+            Misc.SendMessage(">> Depleted {} file is unreadable. Starting fresh.".format(self.noun), 138)
+            return
+        now = time.time()
+        for key, expires in sorted(saved.items(), key=lambda entry: entry[1]):
+            if expires > now:
+                map_id, x, y = [int(part) for part in key.split(",")]
+                self.entries[(map_id, x, y)] = expires
+        Misc.SendMessage(">> Remembered {} depleted {}s.".format(len(self.entries), self.noun), 68)
+
+    def save(self):
+        """Writes the entries that have not grown back yet to disk."""
+        now = time.time()
+        saved = {}
+        for (map_id, x, y), expires in self.entries.items():
+            if expires > now:
+                saved["{},{},{}".format(map_id, x, y)] = expires
+        try:
+            with open(self.file_name, "w") as depleted_file:
+                json.dump(saved, depleted_file)
+        except IOError:
+            Misc.SendMessage(">> Could not save the depleted {} list.".format(self.noun), 33)
+        self.dirty = False
+        self.saved_at = now
+
+    def save_if_changed(self):
+        """Writes the entries to disk if any were marked since the last save."""
+        if self.dirty:
+            self.save()
+
+    def mark(self, x, y, minutes=None):
+        """Skips the tree or plant at (x, y) for the given number of minutes (the respawn time by default)."""
+        if minutes is None:
+            minutes = self.respawn_minutes
+        key = (Player.Map, x, y)
+        self.entries.pop(key, None)
+        self.entries[key] = time.time() + minutes * 60
+        # Forget the oldest entries first once the list is full.
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.dirty = True
+        if time.time() - self.saved_at >= DEPLETED_SAVE_INTERVAL:
+            self.save()
+
+    def is_depleted(self, map_id, x, y):
+        """Returns True if the tree or plant at (x, y) is depleted and has not grown back yet."""
+        expires = self.entries.get((map_id, x, y))
+        if expires is None:
+            return False
+        if expires <= time.time():
+            del self.entries[(map_id, x, y)]
+            return False
+        return True
+
+# --- Tree Search ---
+
+def ring_tiles(center_x, center_y, radius):
+    """Yields every tile exactly `radius` steps (UO distance) away from the center."""
+    if radius == 0:
+        yield (center_x, center_y)
+        return
+    for dx in range(-radius, radius + 1):
+        yield (center_x + dx, center_y - radius)
+        yield (center_x + dx, center_y + radius)
+    for dy in range(-radius + 1, radius):
+        yield (center_x - radius, center_y + dy)
+        yield (center_x + radius, center_y + dy)
+
+def in_bounds(x, y, bounds):
+    """Returns True if (x, y) is inside bounds, a (west, north, east, south) tuple where None is no limit."""
+    if bounds is None:
+        return True
+    west, north, east, south = bounds
+    if west is not None and x < west:
+        return False
+    if north is not None and y < north:
+        return False
+    if east is not None and x > east:
+        return False
+    if south is not None and y > south:
+        return False
+    return True
+
+def scan_tree_ring(map_id, center_x, center_y, radius, trees_in_range, depleted, bounds=None):
+    """Adds the usable trees on one ring around the center to trees_in_range."""
+    for x, y in ring_tiles(center_x, center_y, radius):
+        if depleted.is_depleted(map_id, x, y) or not in_bounds(x, y, bounds):
+            continue
+        tree = get_tree_at(map_id, x, y)
+        if tree is not None:
+            trees_in_range.append((x, y, tree[0], tree[1]))
+
+def tree_scan_done(radius, trees_in_range):
+    """Returns True once a scan that has reached radius has found enough trees or gone far enough."""
+    # The route never has more stops, so farther rings would be scanned for nothing.
+    if len(trees_in_range) >= ROUTE_MAX_STOPS or radius > TREE_SEARCH_MAX_RADIUS:
+        return True
+    return radius > TREE_SEARCH_RADIUS and bool(trees_in_range)
+
+def find_trees_in_range(depleted, bounds=None):
+    """Finds the nearest trees that are not depleted or past the boundaries, enough for a full route.
+
+    Rings are scanned outward until ROUTE_MAX_STOPS trees have been found or the search radius
+    is reached. If there are none by then, the search keeps widening and stops at the first
+    ring with a tree. Returns a list of (x, y, static_id, static_z).
+    """
+    map_id = Player.Map
+    player_x = Player.Position.X
+    player_y = Player.Position.Y
+    known_blocks = len(tree_index)
+
+    trees_in_range = []
+    radius = 0
+    while not tree_scan_done(radius, trees_in_range):
+        if radius == TREE_SEARCH_RADIUS + 1:
+            Misc.SendMessage(">> No trees within {} tiles. Widening the search...".format(TREE_SEARCH_RADIUS), 138)
+        scan_tree_ring(map_id, player_x, player_y, radius, trees_in_range, depleted, bounds)
+        radius += 1
+
+    if len(tree_index) != known_blocks:
+        save_tree_index()
+    return trees_in_range
+
+# --- Route Planner ---
+
+def tile_distance(a, b):
+    """Returns the UO walking distance between two (x, y, ...) tuples."""
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+def two_opt_pass(points):
+    """Reverses any stretch of the route that makes it shorter. points[0] is the fixed start."""
+    improved = False
+    last = len(points) - 1
+    for i in range(1, last):
+        for j in range(i + 1, last + 1):
+            before = tile_distance(points[i - 1], points[i])
+            after = tile_distance(points[i - 1], points[j])
+            if j < last:
+                before += tile_distance(points[j], points[j + 1])
+                after += tile_distance(points[i], points[j + 1])
+            if after < before:
+                points[i:j + 1] = points[i:j + 1][::-1]
+                improved = True
+    return improved
+
+def or_opt_pass(points):
+    """Moves runs of 1 to 3 stops to wherever they make the route shorter."""
+    improved = False
+    for run_length in (1, 2, 3):
+        i = 1
+        while i + run_length <= len(points):
+            end = i + run_length - 1
+            prev_stop = points[i - 1]
+            next_stop = points[end + 1] if end + 1 < len(points) else None
+            # How much shorter the route gets by taking the run out.
+            saved = tile_distance(prev_stop, points[i])
+            if next_stop is not None:
+                saved += tile_distance(points[end], next_stop) - tile_distance(prev_stop, next_stop)
+            best_cost, best_k = saved, None
+            for k in range(len(points)):
+                if i - 1 <= k <= end:
+                    continue
+                after_k = points[k + 1] if k + 1 < len(points) else None
+                cost = tile_distance(points[k], points[i])
+                if after_k is not None:
+                    cost += tile_distance(points[end], after_k) - tile_distance(points[k], after_k)
+                if cost < best_cost:
+                    best_cost, best_k = cost, k
+            if best_k is not None:
+                run = points[i:end + 1]
+                del points[i:end + 1]
+                insert_at = best_k + 1 if best_k < i else best_k + 1 - run_length
+                points[insert_at:insert_at] = run
+                improved = True
+            i += 1
+    return improved
+
+def plan_route(start, stops):
+    """Orders the stops so that walking through all of them from `start` is as short as possible.
+
+    Builds a nearest-neighbour route, then refines it with 2-opt and Or-opt moves.
+    Each stop is a tuple whose first two values are its X and Y coordinates.
+    """
+    remaining = list(stops)
+    route = []
+    current = start
+    while remaining and len(route) < ROUTE_MAX_STOPS:
+        nearest = min(remaining, key=lambda stop: tile_distance(current, stop))
+        remaining.remove(nearest)
+        route.append(nearest)
+        current = nearest
+
+    points = [start] + route
+    for _ in range(ROUTE_MAX_PASSES):
+        improved = two_opt_pass(points)
+        if or_opt_pass(points):
+            improved = True
+        if not improved:
+            break
+    return points[1:]
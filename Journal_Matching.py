@@ -0,0 +1,51 @@
+# Shared Journal Matching
+#
+# What it does:
+# 1. Turns a table of journal texts, grouped by result, into one pattern that tells which
+#    result a journal line belongs to.
+# 2. Reads only the journal lines added since the last read, so the journal never has to be
+#    cleared or searched from the start again.
+#
+# How to use:
+# 1. Place this file in your Razor Enhanced 'Scripts' folder, together with Razor_API.py.
+# 2. In the script, compile its outcome table once and poll it after sending an action:
+#        from Journal_Matching import compile_journal_outcomes, sync_journal_cursor, poll_journal
+#        chop_matcher = compile_journal_outcomes(CHOP_OUTCOMES)
+#        sync_journal_cursor()
+#        paced_wait("chop", ACTION_DELAY, lambda: poll_journal(chop_matcher))
+
+import re
+
+from Razor_API import Journal
+
+# --- Journal Cursor ---
+
+# Timestamp of the newest journal line already read. Only lines after it are matched.
+journal_cursor = 0
+
+# --- Helper Functions ---
+
+def compile_journal_outcomes(outcomes):
+    """Compiles a {result: [texts]} table into one pattern with a named group per result."""
+    groups = []
+    for result, texts in outcomes.items():
+        groups.append("(?P<{}>{})".format(result, "|".join(re.escape(text) for text in texts)))
+    return re.compile("|".join(groups))
+
+def sync_journal_cursor():
+    """Marks every line already in the journal as read."""
+    global journal_cursor
+    for entry in Journal.GetJournalEntry(journal_cursor):
+        journal_cursor = max(journal_cursor, entry.Timestamp)
+
+def poll_journal(matcher):
+    """Reads the journal lines added since the last call and returns the first result matched, or None."""
+    global journal_cursor
+    result = None
+    for entry in Journal.GetJournalEntry(journal_cursor):
+        journal_cursor = max(journal_cursor, entry.Timestamp)
+        if result is None:
+            match = matcher.search(entry.Text)
+            if match:
+                result = match.lastgroup
+    return result
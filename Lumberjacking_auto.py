@@ -3,21 +3,31 @@
 # What it does:
 # 1. Prompts you to target your axe to ensure a stable start.
 # 2. Uses the robust PathFinding module for all movement.
-# 3. Scans for the nearest tree, ignoring any trees outside the defined boundaries.
-# 4. Remembers which trees are depleted to avoid getting stuck.
+# 3. Scans for trees, ignoring any outside the defined boundaries, and plans a short walking route through them.
+# 4. Remembers which trees are depleted (also across restarts) and skips them until they grow back.
 # 5. Automatically finds and equips a new axe if your current one breaks.
 # 6. When your backpack is full, it makes boards. If still full, it runs to your house and deposits.
 # 7. After depositing, it returns to a static, safe spot in the forest.
 # 8. If attacked, it will flee to your house for safety.
+# 9. Remembers where trees are in a local file, so each part of the forest is only scanned once.
 #
 # How to use:
 # 1. IMPORTANT: Fill out the house and forest coordinates in the Configuration section.
-# 2. Place this script in your Razor Enhanced 'Scripts' folder.
+# 2. Place this script in your Razor Enhanced 'Scripts' folder. Action_Pacing.py, Gathering.py,
+#    Journal_Matching.py, Walkability.py and Razor_API.py go in the same folder.
 # 3. Stand in a forested area and run the script. It will prompt you for your axe.
 # 4. To stop, you must manually stop it from the Razor Enhanced scripts tab.
 
 import sys
-import math
+
+# The helper modules below get the Razor Enhanced objects from this script.
+import Razor_API
+Razor_API.install(globals())
+from Action_Pacing import paced_wait
+from Journal_Matching import compile_journal_outcomes, sync_journal_cursor, poll_journal
+from Gathering import (DepletedRegistry, tree_index, load_tree_index, save_tree_index,
+                       scan_tree_ring, tree_scan_done, find_trees_in_range, plan_route)
+from Walkability import find_walkable_neighbor
 
 # --- Configuration ---
 
@@ -41,8 +51,22 @@ AXE_GRAPHICS = [0x0F49, 0x0F47, 0x0F45, 0x13FB]
 LOG_GRAPHIC = 0x1BDD
 BOARD_GRAPHIC = 0x1BD7
 
-# The radius (in tiles) around the player to scan for trees.
-TREE_SEARCH_RADIUS = 15
+# While a chop is under way, the next route is scanned this many rings at a time.
+TREE_SCAN_RINGS_PER_STEP = 3
+
+# Trees outside these boundaries are never chopped, given as the (west, north, east, south)
+# edges of the area to stay in. Use None for a side without a boundary.
+TREE_BOUNDS = (None, 1260, 1658, None)
+
+# How trees are searched for, remembered and routed through is set in Gathering.py.
+
+# Depleted trees are skipped until they have had time to grow back. The list is saved to
+# disk so a restarted script does not walk back to trees it already emptied. Trees that
+# cannot be reached are skipped for longer, since that rarely changes.
+DEPLETED_TREES_FILE = "depleted_trees.json"
+DEPLETED_TREES_MAX = 2000
+TREE_RESPAWN_MINUTES = 20
+UNREACHABLE_TREE_MINUTES = 240
 
 # The script will stop if your weight is this close to your maximum weight.
 WEIGHT_LIMIT_OFFSET = 25
@@ -50,16 +74,21 @@ WEIGHT_LIMIT_OFFSET = 25
 # Delay in milliseconds after each chop/craft attempt.
 ACTION_DELAY = 3500
 
+# Delays are learned while the script runs: after each action the script waits only until
+# its result shows up, and never more than twice the delay configured above. How the delays
+# are learned is set in Action_Pacing.py.
+
+# Journal lines that end a chop, grouped by result.
+CHOP_OUTCOMES = {
+    "logs": ["You put some logs", "You chop some"],
+    "failed": ["fail to produce any useable wood"],
+    "depleted": ["There are no logs left", "That is too far away", "There's not enough wood here to harvest"],
+    "must_wait": ["You must wait"],
+}
+
 # The time (in milliseconds) to wait for your character to walk back from the house.
 RETURN_WALK_TIMEOUT = 30000
 
-# A list of static tile IDs for various tree types.
-TREE_GRAPHICS = [
-    0x0CCA, 0x0CCB, 0x0CCC, 0x0CCD, 0x0CD0, 0x0CD3, 0x0CD6, 0x0CD8,
-    0x0CDA, 0x0CDD, 0x0CE0, 0x0CE3, 0x0CE6, 0x0D43, 0x0D59, 0x0D70,
-    0x0D85, 0x0D94, 0x0D98, 0x0DA4, 0x0DA8
-]
-
 # --- Helper Functions ---
 
 def find_and_equip_new_axe():
@@ -91,61 +120,12 @@ def make_boards(axe_serial):
         Items.UseItem(axe_serial)
         if Target.WaitForTarget(2000):
             Target.TargetExecute(logs.Serial)
-            Misc.Pause(ACTION_DELAY)
+            paced_wait("boards", ACTION_DELAY, lambda: True if Items.FindBySerial(logs.Serial) is None else None)
         else:
             Misc.SendMessage(">> Error waiting for target on logs.", 33)
             break
     return axe_serial
 
-def find_walkable_neighbor(x, y):
-    """Finds a walkable tile adjacent to the target coordinates."""
-    neighbors = [(0, -1), (1, 0), (0, 1), (-1, 0), (-1, -1), (1, -1), (1, 1), (-1, 1)]
-    for dx, dy in neighbors:
-        check_x, check_y = x + dx, y + dy
-        land_id = Statics.GetLandID(check_x, check_y, Player.Map)
-        if not Statics.GetLandFlag(land_id, 'Impassable'):
-            statics_at_neighbor = Statics.GetStaticsTileInfo(check_x, check_y, Player.Map)
-            is_blocked = False
-            for static_item in statics_at_neighbor:
-                if Statics.GetTileFlag(static_item.StaticID, 'Impassable'):
-                    is_blocked = True
-                    break
-            if not is_blocked:
-                return (check_x, check_y)
-    return (None, None)
-
-def find_closest_tree(ignore_list):
-    """Finds the closest reachable tree that is not on the ignore list or past the boundaries."""
-    closest_tree = None
-    min_dist = float('inf')
-    tree_x, tree_y = 0, 0
-    for x in range(Player.Position.X - TREE_SEARCH_RADIUS, Player.Position.X + TREE_SEARCH_RADIUS + 1):
-        for y in range(Player.Position.Y - TREE_SEARCH_RADIUS, Player.Position.Y + TREE_SEARCH_RADIUS + 1):
-            if (x, y) in ignore_list:
-                continue
-            
-            # Check if the tree is past our hard X-coordinate boundary.
-            if x >= 1659:
-                continue # This tree is too far east, skip it.
-                
-            # NEW: Check if the tree is past our hard Y-coordinate boundary.
-            if y < 1260:
-                continue # This tree is too far south, skip it.
-
-            tile_info_list = Statics.GetStaticsTileInfo(x, y, Player.Map)
-            for tile in tile_info_list:
-                if tile.StaticID in TREE_GRAPHICS:
-                    dist = math.sqrt((Player.Position.X - x)**2 + (Player.Position.Y - y)**2)
-                    if dist < min_dist:
-                        min_dist = dist
-                        closest_tree = tile
-                        tree_x = x
-                        tree_y = y
-    if closest_tree:
-        return (closest_tree, tree_x, tree_y)
-    else:
-        return (None, 0, 0)
-
 def go_to_house_and_deposit(crate_serial):
     """Goes to the house, deposits resources, and returns to a static forest spot."""
     Misc.SendMessage(">> Full! Running to the house.", 68)
@@ -230,8 +210,64 @@ def check_health_and_flee():
             Misc.Pause(500)
             
         Misc.SendMessage(">> Arrived at house safely. Stopping script.", 68)
+        depleted_trees.save_if_changed()
         sys.exit() # Stop the script for safety
 
+# --- Target Prefetch ---
+
+# The tree after the current one, where to stand next to it and the path there. It is worked
+# out one small step at a time while waiting on chops, and is only good while we stand still.
+prefetch = {}
+
+def prefetch_step(route):
+    """Does the next small step of planning the walk to the tree after route[0]."""
+    origin = (Player.Map, Player.Position.X, Player.Position.Y)
+    if prefetch.get("origin") != origin:
+        prefetch.clear()
+        prefetch["origin"] = origin
+    if "route" not in prefetch:
+        # The rest of the current route, or a fresh one if this is its last tree.
+        rest = [tree for tree in route[1:] if not depleted_trees.is_depleted(origin[0], tree[0], tree[1])]
+        if rest:
+            prefetch["route"] = rest
+        elif "scan" not in prefetch:
+            prefetch["scan"] = {"radius": 0, "trees": [], "known_blocks": len(tree_index)}
+        elif not tree_scan_done(prefetch["scan"]["radius"], prefetch["scan"]["trees"]):
+            # Only a few rings per step, so a chop result is never left waiting on a whole scan.
+            scan = prefetch["scan"]
+            for step in range(TREE_SCAN_RINGS_PER_STEP):
+                if tree_scan_done(scan["radius"], scan["trees"]):
+                    break
+                scan_tree_ring(origin[0], origin[1], origin[2], scan["radius"], scan["trees"], depleted_trees, TREE_BOUNDS)
+                scan["radius"] += 1
+        else:
+            scan = prefetch.pop("scan")
+            if len(tree_index) != scan["known_blocks"]:
+                save_tree_index()
+            trees = [tree for tree in scan["trees"] if tree[:2] != route[0][:2]]
+            prefetch["route"] = plan_route(origin[1:], trees)
+    elif prefetch["route"] and "walk_to" not in prefetch:
+        next_tree = prefetch["route"][0]
+        prefetch["walk_to"] = find_walkable_neighbor(next_tree[0], next_tree[1])
+    elif prefetch["route"] and "path" not in prefetch:
+        walk_to_x, walk_to_y = prefetch["walk_to"]
+        prefetch["path"] = PathFinding.GetPath(walk_to_x, walk_to_y, True) if walk_to_x is not None else None
+
+def take_prefetch():
+    """Returns what was prefetched and starts over, or None if it is missing or we have moved."""
+    planned = dict(prefetch)
+    prefetch.clear()
+    if "route" not in planned or planned["origin"] != (Player.Map, Player.Position.X, Player.Position.Y):
+        return None
+    return planned
+
+def chop_result(route):
+    """Returns how the last chop went, or None after doing one step of prefetching."""
+    result = poll_journal(chop_matcher)
+    if result is None:
+        prefetch_step(route)
+    return result
+
 # --- Main Script ---
 
 Misc.SendMessage(">> Starting Lumberjacking Script...", 68)
@@ -244,7 +280,11 @@ if axe_serial == 0:
     Misc.SendMessage(">> Canceled. No axe selected.", 33)
     sys.exit()
 
-depleted_trees = []
+load_tree_index()
+depleted_trees = DepletedRegistry(DEPLETED_TREES_FILE, DEPLETED_TREES_MAX, TREE_RESPAWN_MINUTES, "tree")
+depleted_trees.load()
+chop_matcher = compile_journal_outcomes(CHOP_OUTCOMES)
+route = []
 
 # Main Loop
 while True:
@@ -265,22 +305,41 @@ while True:
         if Player.Weight >= (Player.MaxWeight - WEIGHT_LIMIT_OFFSET):
             if not go_to_house_and_deposit(CRATE_SERIAL):
                 break # Stop if banking fails
+            route = [] # We are somewhere else now, so plan a fresh route.
         continue
 
-    tree, tree_x, tree_y = find_closest_tree(depleted_trees)
-    if tree is None:
-        Misc.SendMessage(">> No more trees found in range. Returning to house.", 33)
-        go_home_and_finish(CRATE_SERIAL, axe_serial)
-        break
-
-    walk_to_x, walk_to_y = find_walkable_neighbor(tree_x, tree_y)
+    # Drop trees from the route that were emptied or given up on since it was planned.
+    while route and depleted_trees.is_depleted(Player.Map, route[0][0], route[0][1]):
+        route.pop(0)
+    planned = take_prefetch()
+    if not route:
+        if planned is not None and planned["route"]:
+            route = planned["route"]
+        else:
+            route = plan_route((Player.Position.X, Player.Position.Y), find_trees_in_range(depleted_trees, TREE_BOUNDS))
+        if not route:
+            Misc.SendMessage(">> No more trees found in range. Returning to house.", 33)
+            go_home_and_finish(CRATE_SERIAL, axe_serial)
+            break
+        Misc.SendMessage(">> Planned a route through {} trees.".format(len(route)), 68)
+    # The tree stays at the head of the route until it is marked depleted.
+    tree_x, tree_y, tree_id, tree_z = route[0]
+
+    # Use the spot and path worked out while chopping the last tree, if they are for this one.
+    if planned is not None and planned["route"][:1] == route[:1] and "walk_to" in planned:
+        walk_to_x, walk_to_y = planned["walk_to"]
+        path = planned.get("path")
+    else:
+        walk_to_x, walk_to_y = find_walkable_neighbor(tree_x, tree_y)
+        path = None
     if walk_to_x is None:
-        depleted_trees.append((tree_x, tree_y))
+        depleted_trees.mark(tree_x, tree_y, UNREACHABLE_TREE_MINUTES)
         continue
 
-    path = PathFinding.GetPath(walk_to_x, walk_to_y, True)
+    if path is None:
+        path = PathFinding.GetPath(walk_to_x, walk_to_y, True)
     if not path or not PathFinding.RunPath(path, 15.0, False, False):
-        depleted_trees.append((tree_x, tree_y))
+        depleted_trees.mark(tree_x, tree_y, UNREACHABLE_TREE_MINUTES)
         continue
         
     Misc.Pause(500)
@@ -295,24 +354,22 @@ while True:
             Misc.SendMessage(">> Axe broke, stopping chop on this tree.", 138)
             break # Exit inner loop to find a new axe
 
-        Journal.Clear()
+        sync_journal_cursor()
         Items.UseItem(axe_serial)
         if Target.WaitForTarget(2000):
-            Target.TargetExecute(tree_x, tree_y, tree.StaticZ, tree.StaticID)
+            Target.TargetExecute(tree_x, tree_y, tree_z, tree_id)
         else:
             Misc.SendMessage(">> Error: Timed out waiting for target.", 33)
-            depleted_trees.append((tree_x, tree_y))
+            depleted_trees.mark(tree_x, tree_y)
             break
 
-        Misc.Pause(ACTION_DELAY)
-        
-        # Check journal messages to see if the tree is depleted
-        if (Journal.Search("There are no logs left") or 
-                Journal.Search("That is too far away") or 
-                Journal.Search("There's not enough wood here to harvest")):
+        # Stop waiting as soon as the journal shows how the chop went, and plan the walk
+        # to the next tree in the meantime.
+        if paced_wait("chop", ACTION_DELAY, lambda: chop_result(route)) == "depleted":
             Misc.SendMessage(">> Tree depleted. Finding new tree.", 78)
-            depleted_trees.append((tree_x, tree_y))
+            depleted_trees.mark(tree_x, tree_y)
             break # Exit inner loop to find a new tree
 
+depleted_trees.save_if_changed()
 Misc.SendMessage(">> Lumberjacking script finished.", 68)
 
@@ -3,16 +3,25 @@
 # What it does:
 # 1. Prompts you to target a container that holds your ore.
 # 2. Prompts you to target a nearby forge.
-# 3. Scans the container for all known ore types.
-# 4. Smelts every piece of ore, one stack at a time, until the container is empty.
-# 5. Skips ore piles that are too small to be smelted.
+# 3. Reads the container (and any bags inside it) once and notes every pile of known ore.
+# 4. Merges piles of the same ore into one, so every pile is big enough to smelt.
+# 5. Smelts every piece of ore, largest pile first, until the container is empty.
+# 6. Skips ore that is too small to be smelted even after merging, or that will not smelt
+#    after a few tries.
 #
 # How to use:
 # 1. Place this script in your Razor Enhanced 'Scripts' folder.
+#    Action_Pacing.py, Journal_Matching.py and Razor_API.py go in the same folder.
 # 2. Stand near a forge.
 # 3. Have a container filled with various types of ore.
 # 4. Run the script and follow the prompts.
 
+# The helper modules below get the Razor Enhanced objects from this script.
+import Razor_API
+Razor_API.install(globals())
+from Action_Pacing import paced_wait
+from Journal_Matching import compile_journal_outcomes, sync_journal_cursor, poll_journal
+
 # --- Configuration ---
 
 # This list defines all the ore types the script will look for.
@@ -65,11 +74,114 @@ ore_types = [
     ( 'Valorite Ore', 0x19BA, 0x08ab )
 ]
 
+# Ore name for each (ItemID, Hue) above.
+ore_names = dict(((ore_id, ore_hue), ore_name) for ore_name, ore_id, ore_hue in ore_types)
+
+# Also smelt ore kept in bags inside the ore container. The container is only read once,
+# at the start, so this costs very little. Set to False to only use the top level.
+SEARCH_SUBCONTAINERS = True
+
+# How long (in milliseconds) to wait for a container's contents to load.
+CONTENTS_TIMEOUT = 1000
+
+# The smallest pile of each ore graphic that a forge will smelt. Anything not listed
+# can be smelted one piece at a time.
+MIN_SMELT_AMOUNT = {0x19B7: 2}
+
+# Longest wait (in milliseconds) for one pile to be moved onto another, and how many
+# times to try before leaving the piles as they are.
+MERGE_DELAY = 1000
+MERGE_ATTEMPTS = 3
 
 # Delay in milliseconds after each smelt action.
-# Increase this if you get "You must wait..." messages.
+# This is the longest wait; the script learns how fast your server really is.
 SMELT_DELAY = 2000
 
+# How many times a smelt may go unanswered or be refused before the pile is skipped.
+SMELT_ATTEMPTS = 3
+
+# Journal lines that end a smelt attempt without the pile going away, grouped by result.
+SMELT_OUTCOMES = {
+    "too_small": ["There is not enough"],
+    "must_wait": ["You must wait"],
+}
+
+# Delays are learned while the script runs: after each action the script waits only until
+# its result shows up, and never more than twice the delay configured above. How the delays
+# are learned is set in Action_Pacing.py.
+
+# --- Helper Functions ---
+
+smelt_matcher = compile_journal_outcomes(SMELT_OUTCOMES)
+
+def smelt_result(ore_serial, ore_amount):
+    """Returns "too_small", "must_wait" or "smelted" once the forge has answered, otherwise None."""
+    result = poll_journal(smelt_matcher)
+    if result is not None:
+        return result
+    ore = Items.FindBySerial(ore_serial)
+    if ore is None or ore.Amount != ore_amount:
+        return "smelted"
+    return None
+
+def take_snapshot(container_serial):
+    """Reads the container once and returns {(ItemID, Hue): {serial: amount}} for all known ore in it."""
+    ore_keys = set((ore_id, ore_hue) for ore_name, ore_id, ore_hue in ore_types)
+    snapshot = {}
+    pending = [Items.FindBySerial(container_serial)]
+    while pending:
+        container = pending.pop()
+        if not container.Contains:
+            Items.WaitForContents(container, CONTENTS_TIMEOUT)
+        for item in container.Contains:
+            key = (item.ItemID, item.Hue)
+            if key in ore_keys:
+                snapshot.setdefault(key, {})[item.Serial] = item.Amount
+            elif SEARCH_SUBCONTAINERS and item.IsContainer:
+                pending.append(item)
+    return snapshot
+
+def forget_pile(snapshot, key, serial):
+    """Removes one ore pile from the snapshot, and its ore type once no piles are left."""
+    piles = snapshot[key]
+    piles.pop(serial, None)
+    if not piles:
+        del snapshot[key]
+
+def update_pile(snapshot, key, serial):
+    """Re-reads one ore pile after smelting it and updates the snapshot to match."""
+    ore = Items.FindBySerial(serial)
+    if ore is None or ore.Amount <= 0:
+        forget_pile(snapshot, key, serial)
+    else:
+        snapshot[key][serial] = ore.Amount
+
+def consolidate_piles(snapshot):
+    """Moves all piles of each ore type onto its largest pile and updates the snapshot."""
+    for key, piles in list(snapshot.items()):
+        ordered = sorted(piles, key=piles.get, reverse=True)
+        largest = ordered[0]
+        for serial in ordered[1:]:
+            for attempt in range(MERGE_ATTEMPTS):
+                Items.Move(serial, largest, -1)
+                if paced_wait("merge", MERGE_DELAY, lambda: True if Items.FindBySerial(serial) is None else None):
+                    break
+            update_pile(snapshot, key, serial)
+        update_pile(snapshot, key, largest)
+
+def build_smelt_queue(snapshot):
+    """Returns the (key, serial) of every pile big enough to smelt, largest first."""
+    queue = []
+    for key, piles in list(snapshot.items()):
+        for serial, amount in list(piles.items()):
+            if amount < MIN_SMELT_AMOUNT.get(key[0], 1):
+                Misc.SendMessage(">> Only {} {}, too little to smelt. Skipping it.".format(amount, ore_names[key]), 138)
+                forget_pile(snapshot, key, serial)
+            else:
+                queue.append((amount, key, serial))
+    queue.sort(reverse=True)
+    return [(key, serial) for amount, key, serial in queue]
+
 # --- Script Start ---
 
 Misc.SendMessage(">> Starting Ore Smelting Script...", 68)
@@ -97,43 +209,58 @@ if forge_serial == 0:
 Misc.SendMessage(">> Beginning smelting process...", 68)
 Misc.Pause(1000)
 
-for ore_name, ore_id, ore_hue in ore_types:
-    while True:
-        # Find a stack of the current ore type in the container
-        # The 'False' flag prevents it from looking in sub-containers, which is faster.
-        # Change to 'True' if your ore is in bags inside the main container.
-        ore_stack = Items.FindByID(ore_id, ore_hue, ore_container_serial, False)
-        
-        # If no more stacks of this type are found, move to the next ore type
-        if ore_stack is None:
+# Read the container once. The snapshot is kept up to date as piles are smelted,
+# so the container never has to be searched again.
+snapshot = take_snapshot(ore_container_serial)
+Misc.SendMessage(">> Found {} ore piles.".format(sum(len(piles) for piles in snapshot.values())), 68)
+
+# Merge small piles first, so the forge never turns a pile away for being too small.
+consolidate_piles(snapshot)
+smelt_queue = build_smelt_queue(snapshot)
+Misc.SendMessage(">> Smelting {} ore piles.".format(len(smelt_queue)), 68)
+
+for key, ore_serial in smelt_queue:
+    ore_name = ore_names[key]
+    # Keep going until the pile is gone. A failed smelt only burns part of it away.
+    failed_attempts = 0
+    while ore_serial in snapshot.get(key, {}):
+        ore_amount = snapshot[key][ore_serial]
+        if ore_amount < MIN_SMELT_AMOUNT.get(key[0], 1):
+            forget_pile(snapshot, key, ore_serial)
+            break
+        if failed_attempts >= SMELT_ATTEMPTS:
+            Misc.SendMessage(">> Could not smelt {} after {} tries. Skipping it.".format(ore_name, SMELT_ATTEMPTS), 33)
+            forget_pile(snapshot, key, ore_serial)
             break
             
         Misc.SendMessage(">> Smelting {}...".format(ore_name), 78)
         
         # Smelting process: Double-click the ore, then target the forge.
-        Items.UseItem(ore_stack)
+        sync_journal_cursor()
+        Items.UseItem(ore_serial)
         
         # Wait for the target cursor to appear
         if Target.WaitForTarget(2000):
             Target.TargetExecute(forge_serial)
             
-            # Add a brief pause to allow the server to send a journal message
-            Misc.Pause(500)
+            # Wait until the pile shrinks or the server says it is too small.
+            result = paced_wait("smelt", SMELT_DELAY, lambda: smelt_result(ore_serial, ore_amount))
             
             # Check if the ore pile was too small
-            if Journal.Search("There is not enough"):
-                Misc.SendMessage(">> Not enough ore in this pile. Ignoring it.", 138)
-                Misc.IgnoreObject(ore_stack) # Ignore this specific small pile
-                continue # Continue to the next iteration of the while loop to find another stack
-                
-            # Pause to allow the server to process a successful smelt
-            Misc.Pause(SMELT_DELAY)
+            if result == "too_small":
+                Misc.SendMessage(">> Not enough ore in this pile. Skipping it.", 138)
+                forget_pile(snapshot, key, ore_serial) # Skip this specific small pile
+                break # Continue with the next pile
+
+            # No answer, or the server refused: try again, but only SMELT_ATTEMPTS times.
+            if result != "smelted":
+                failed_attempts += 1
+
+            # The pile is either gone or smaller now (a failed smelt burns some of it away).
+            update_pile(snapshot, key, ore_serial)
         else:
             Misc.SendMessage(">> Error: Timed out waiting for target after using ore.", 33)
-            # We break the inner loop to avoid getting stuck on this ore type
-            break
+            failed_attempts += 1
 
-# Clean up any items that were ignored during the process
-Misc.ClearIgnore()
 Misc.SendMessage(">> Ore smelting script finished.", 68)
 # --- Script End ---
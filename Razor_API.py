@@ -0,0 +1,37 @@
+# Razor Enhanced API Access for Helper Modules
+#
+# What it does:
+# 1. Razor Enhanced only hands its API objects (Misc, Items, Mobiles, Player, Statics, Journal,
+#    Target, Gumps, Timer, PathFinding and Spells) to the script it runs, not to the modules
+#    that script imports. The script passes them to this module, which offers them for import,
+#    so shared helper modules can write:
+#        from Razor_API import Misc, Player
+#
+# How to use:
+# 1. Place this file in your Razor Enhanced 'Scripts' folder, next to the helper modules that use it.
+# 2. Add these lines to the script before it imports any helper module:
+#        import Razor_API
+#        Razor_API.install(globals())
+#    Helper modules take the objects when they are imported, so a helper imported before
+#    install() is left without them.
+# 3. When profiling, import API_Profiler before these lines so the helpers use the
+#    profiled objects too.
+
+# --- Configuration ---
+
+# The Razor Enhanced objects offered to helper modules.
+API_NAMES = ["Misc", "Items", "Mobiles", "Player", "Statics", "Journal", "Target",
+             "Gumps", "Timer", "PathFinding", "Spells"]
+
+# --- API Objects ---
+
+Misc = Items = Mobiles = Player = Statics = Journal = Target = None
+Gumps = Timer = PathFinding = Spells = None
+
+# --- Helper Functions ---
+
+def install(namespace):
+    """Takes the Razor Enhanced objects from a script's globals."""
+    for api_name in API_NAMES:
+        if namespace.get(api_name) is not None:
+            globals()[api_name] = namespace[api_name]
@@ -0,0 +1,1920 @@
+# Offline Razor Enhanced Simulator
+#
+# What it does:
+# 1. Provides pure-Python stand-ins for the Razor Enhanced API (Misc, Items, Mobiles, Player,
+#    Statics, Journal, Target, Gumps, Timer, PathFinding and Spells).
+# 2. Builds a small simulated world with a forest, cotton plants, ore, a forge, crafting tools,
+#    animals to tame and corpses to loot.
+# 3. Runs any script from this folder unmodified against that world on a virtual clock, so a
+#    Misc.Pause(3500) costs no real time.
+# 4. Reports simulated resources per hour and how often each API call was made, so changes
+#    to a script can be benchmarked on any machine.
+#
+# How to use:
+# 1. This runs on a normal Python 3 install (for example on Linux). It does not need Razor
+#    Enhanced or Ultima Online.
+# 2. Run: python Razor_Simulator.py Lumberjacking_auto.py --hours 2
+# 3. Use --seed to make runs repeatable, --skill "Blacksmith=75" to change starting skills
+#    and --verbose to see the script's messages and the journal as they happen.
+# 4. Files a script saves (tree index, depleted lists, ...) go to a temporary folder unless
+#    you pass --state-dir, which lets you benchmark a "second run" with warm caches.
+# 5. The default world is the same for every version of a script. Use --scenario to stock it
+#    differently (see SCENARIOS below); it can be given more than once.
+
+import argparse
+import ast
+import builtins
+import heapq
+import math
+import os
+import random
+import re
+import tempfile
+import time as real_time
+import types
+
+# --- Configuration ---
+
+# Where the player starts. Lumberjacking_auto.py only chops trees west of X 1659 and
+# south of Y 1260, so the forest is laid out around this spot.
+START_X = 1645
+START_Y = 1272
+
+# The fixed serial of the simulated player and the first serial handed out to items/mobiles.
+PLAYER_SERIAL = 0x00001000
+FIRST_ITEM_SERIAL = 0x40000000
+FIRST_MOBILE_SERIAL = 0x00002000
+
+# Server timings (in milliseconds of virtual time).
+SERVER_LATENCY = 120        # Delay before the server answers any request.
+CHOP_TIME = 1600            # One swing of an axe.
+PICK_TIME = 900             # Picking a cotton plant.
+SMELT_ORE_TIME = 700        # Smelting a pile of ore at a forge.
+CRAFT_TIME = 2200           # Crafting one item.
+SMELT_ITEM_TIME = 600       # Melting a crafted item down.
+TAME_TICK_TIME = 3000       # Animal taming takes three of these ticks.
+SKILL_DELAY = 10000         # Delay after using a skill before another can be used.
+DRAG_COOLDOWN = 400         # Minimum time between two item moves.
+PROPS_LATENCY = (150, 450)  # How long an item takes to report its properties once asked.
+STEP_TIME = 200             # Running one tile.
+BANDAGE_TIME = 5000         # How long a bandage takes to heal.
+
+# How much a successful harvest yields and how long the resource takes to come back.
+LOGS_PER_CHOP = 10
+LOGS_PER_TREE = (30, 60)
+TREE_RESPAWN = 20 * 60 * 1000
+COTTON_PER_PLANT = (2, 4)
+PLANT_RESPAWN = 10 * 60 * 1000
+CORPSE_INTERVAL = 15000
+CORPSE_WAVE_INTERVAL = 60000
+CORPSE_WAVE = (5, 10)  # Corpses dropped at once, as when farming with area damage.
+CORPSE_DECAY = 5 * 60 * 1000
+
+# Optional ways to stock the world, chosen with --scenario. Older versions of a script may not
+# handle them, so none of them is on by default.
+SCENARIOS = {
+    "corpse-waves": "Corpse_Looter's corpses arrive in waves of several at once every minute, "
+                    "as when farming with area damage, instead of one at a time.",
+    "ore-bags": "Ore_Smelter's ore is spread over bags inside the crate, with lone small ores "
+                "that must be merged before they can be smelted.",
+    "restock": "Smith_Smelt's ingots wait in a crate next to the anvil, and the board crate "
+               "holds 20000 boards, so restocks are exercised.",
+}
+
+# Tool durability.
+AXE_USES = 300
+CRAFT_TOOL_USES = 60
+
+# Stop the run if the script makes this many API calls, even if virtual time is left.
+# This protects against scripts stuck in a loop that never pauses.
+MAX_API_CALLS = 20000000
+
+# Gump ids used by the simulated server.
+CRAFT_GUMP_ID = 0x38920ABD
+RELEASE_GUMP_ID = 0x0D01621A
+
+# Buttons of the crafting gump that are not recipes.
+MAKE_LAST_BUTTON_ID = 21
+DEFAULT_SMELT_BUTTON_ID = 27
+
+# Item IDs the simulated world knows about.
+LOG_ID = 0x1BDD
+BOARD_ID = 0x1BD7
+INGOT_ID = 0x1BF2
+GOLD_ID = 0x0EED
+BANDAGE_ID = 0x0E21
+COTTON_ID = 0x0DF9
+COTTON_PLANT_IDS = [0x0C51, 0x0C52, 0x0C53, 0x0C54]
+PICKED_PLANT_ID = 0x0C55
+AXE_IDS = [0x0F49, 0x0F47, 0x0F45, 0x13FB, 0x0F43]
+SMITH_TOOL_IDS = [0x13E3, 0x0FB4]
+CARPENTRY_TOOL_IDS = [0x1034]
+ORE_IDS = [0x19B7, 0x19B8, 0x19B9, 0x19BA]
+# Ingots smelted per ore, by ore graphic.
+INGOTS_PER_ORE = {0x19B9: 2.0, 0x19B8: 1.0, 0x19BA: 1.0, 0x19B7: 0.5}
+GEM_IDS = [0x0F0F, 0x0F10, 0x0F11, 0x0F15, 0x0F16, 0x0F18, 0x0F21, 0x0F25, 0x0F26]
+FORGE_ID = 0x0FB1
+CRATE_ID = 0x0E3D
+BAG_ID = 0x0E76
+POUCH_ID = 0x0E79
+TRASH_BARREL_ID = 0x0E77
+BACKPACK_ID = 0x0E75
+CORPSE_ID = 0x2006
+WEAPON_ID = 0x13FF
+SAMPLE_SMELT_ID = 0x0F52
+
+STACKABLE_IDS = set([LOG_ID, BOARD_ID, INGOT_ID, GOLD_ID, BANDAGE_ID, COTTON_ID] + ORE_IDS + GEM_IDS)
+CONTAINER_IDS = set([CRATE_ID, BAG_ID, POUCH_ID, TRASH_BARREL_ID, BACKPACK_ID, CORPSE_ID])
+
+# Weight of one unit of an item, in stones. Anything not listed weighs 1 stone.
+ITEM_WEIGHTS = {
+    LOG_ID: 1.0, BOARD_ID: 0.1, INGOT_ID: 0.1, GOLD_ID: 0.02, BANDAGE_ID: 0.1, COTTON_ID: 1.0,
+    0x19B9: 12.0, 0x19B8: 7.0, 0x19BA: 7.0, 0x19B7: 2.0,
+    BACKPACK_ID: 0.0, BAG_ID: 1.0, POUCH_ID: 1.0, CORPSE_ID: 0.0,
+    0x0F49: 4.0, 0x0F47: 4.0, 0x0F45: 4.0, 0x13FB: 4.0, 0x0F43: 4.0,
+    # Smithing training items.
+    0x0F5C: 14.0, 0x143B: 10.0, 0x1441: 8.0, 0x0F61: 7.0, 0x13B6: 5.0,
+    0x1413: 2.0, 0x1414: 2.0, 0x1410: 5.0, 0x1411: 7.0, 0x1415: 10.0,
+}
+
+# Land and static graphics used to build the map.
+GRASS_LAND_ID = 0x0003
+WATER_LAND_ID = 0x00A8
+ROCK_STATIC_ID = 0x1363
+TREE_STATIC_IDS = [0x0CCA, 0x0CCD, 0x0CD0, 0x0CD3, 0x0CD6, 0x0CD8, 0x0CDA, 0x0CDD, 0x0CE0, 0x0CE3]
+
+# Animal bodies used when a script does not define its own tameable_data table.
+DEFAULT_TAMEABLES = {0x00D9: 0.0, 0x00C9: 10.0, 0x00CF: 20.0, 0x00D2: 40.0, 0x00D3: 50.0, 0x00D4: 70.0}
+TAMEABLE_COUNT = 8
+
+# Properties given to the items found in simulated corpses.
+CORPSE_ITEM_PROPS = [
+    ["Minor Magic Item"],
+    ["Lesser Magic Item"],
+    ["Greater Magic Item"],
+    ["Major Magic Item", "Lower Mana Cost 8%"],
+    ["Legendary Artifact", "Hit Chance Increase 15%"],
+]
+
+# --- Simulation Core ---
+
+class SimulationFinished(BaseException):
+    """Raised inside the script when the simulated time or call budget runs out.
+
+    It derives from BaseException so that scripts catching Exception do not swallow it.
+    """
+
+
+class VirtualClock(object):
+    """A millisecond clock that only moves when the script waits, plus a queue of server events."""
+
+    def __init__(self, limit_ms):
+        self.now = 0
+        self.limit = limit_ms
+        self.events = []
+        self.sequence = 0
+
+    def schedule(self, delay_ms, callback):
+        """Runs callback once delay_ms of virtual time has passed."""
+        self.sequence += 1
+        heapq.heappush(self.events, (self.now + max(0, int(delay_ms)), self.sequence, callback))
+
+    def advance(self, ms):
+        """Moves the clock forward, running every event that falls due on the way."""
+        self.advance_to(self.now + max(0, int(ms)))
+
+    def advance_to(self, target):
+        while self.events and self.events[0][0] <= target:
+            due, _, callback = heapq.heappop(self.events)
+            self.now = max(self.now, due)
+            self.check_limit()
+            callback()
+        self.now = max(self.now, target)
+        self.check_limit()
+
+    def wait_until(self, condition, timeout_ms):
+        """Advances until condition() is true or timeout_ms passes. Returns the final condition."""
+        deadline = self.now + max(0, int(timeout_ms))
+        while not condition():
+            if not self.events or self.events[0][0] > deadline:
+                self.advance_to(deadline)
+                return condition()
+            self.advance_to(self.events[0][0])
+        return True
+
+    def check_limit(self):
+        if self.now >= self.limit:
+            raise SimulationFinished("time limit reached")
+
+
+class Point3D(object):
+    def __init__(self, x, y, z=0):
+        self.X = x
+        self.Y = y
+        self.Z = z
+
+    def __repr__(self):
+        return "Point3D({}, {}, {})".format(self.X, self.Y, self.Z)
+
+
+class StaticTile(object):
+    def __init__(self, static_id, z=0):
+        self.StaticID = static_id
+        self.StaticZ = z
+        self.StaticHue = 0
+
+
+class JournalEntry(object):
+    def __init__(self, text, timestamp, name="System", serial=0, entry_type="System", color=0):
+        self.Text = text
+        self.Timestamp = timestamp
+        self.Name = name
+        self.Serial = serial
+        self.Type = entry_type
+        self.Color = color
+
+
+class ContextEntry(object):
+    def __init__(self, response, entry):
+        self.Response = response
+        self.Entry = entry
+
+
+class GenericList(list):
+    """Stands in for System.Collections.Generic.List[T]."""
+
+    def __class_getitem__(cls, item_type):
+        return cls
+
+    def Add(self, value):
+        self.append(value)
+
+    def Contains(self, value):
+        return value in self
+
+    @property
+    def Count(self):
+        return len(self)
+
+
+class Item(object):
+    """A simulated item. Attribute names follow the Razor Enhanced Item class."""
+
+    def __init__(self, world, serial, item_id, amount=1, hue=0, name=None):
+        self._world = world
+        self.Serial = serial
+        self.ItemID = item_id
+        self.Hue = hue
+        self.Amount = amount
+        self.Name = name or "item 0x{:04X}".format(item_id)
+        self.parent = 0
+        self.children = []
+        self.x = 0
+        self.y = 0
+        self.z = 0
+        self.props = [self.Name]
+        self.props_ready_at = 0
+        self.uses = 0
+        self.layer = None
+
+    @property
+    def Container(self):
+        return self.parent
+
+    @property
+    def RootContainer(self):
+        item = self
+        while item.parent and item.parent in self._world.items:
+            item = self._world.items[item.parent]
+        return item.Serial
+
+    @property
+    def Contains(self):
+        return list(self.children)
+
+    @property
+    def IsContainer(self):
+        return self.ItemID in CONTAINER_IDS
+
+    @property
+    def IsCorpse(self):
+        return self.ItemID == CORPSE_ID
+
+    @property
+    def OnGround(self):
+        return self.parent == 0
+
+    @property
+    def Position(self):
+        if self.parent == 0:
+            return Point3D(self.x, self.y, self.z)
+        root = self._world.items.get(self.RootContainer)
+        if root is not None and root.parent == 0:
+            return Point3D(root.x, root.y, root.z)
+        return self._world.player_position()
+
+    @property
+    def Weight(self):
+        weight = ITEM_WEIGHTS.get(self.ItemID, 1.0) * self.Amount
+        for child in self.children:
+            weight += child.Weight
+        return weight
+
+    @property
+    def PropsUpdated(self):
+        return self._world.clock.now >= self.props_ready_at
+
+    @property
+    def Deleted(self):
+        return self.Serial not in self._world.items
+
+    def __repr__(self):
+        return "<Item 0x{:08X} id=0x{:04X} x{}>".format(self.Serial, self.ItemID, self.Amount)
+
+
+class Mobile(object):
+    """A simulated creature. Attribute names follow the Razor Enhanced Mobile class."""
+
+    def __init__(self, world, serial, body, name, x, y, difficulty):
+        self._world = world
+        self.Serial = serial
+        self.Body = body
+        self.Name = name
+        self.x = x
+        self.y = y
+        self.difficulty = difficulty
+        self.Hits = 25
+        self.HitsMax = 25
+        self.WarMode = False
+        self.Notoriety = 3
+        self.IsHuman = False
+        self.IsGhost = False
+        self.owner = 0
+        self.owners = 0
+
+    @property
+    def Position(self):
+        return Point3D(self.x, self.y, 0)
+
+    @property
+    def MobileID(self):
+        return self.Body
+
+    def __repr__(self):
+        return "<Mobile 0x{:08X} body=0x{:04X} {}>".format(self.Serial, self.Body, self.Name)
+
+
+class World(object):
+    """Holds the whole simulated state and the server-side game rules."""
+
+    def __init__(self, rng, clock, tables, verbose=False):
+        self.rng = rng
+        self.clock = clock
+        self.tables = tables
+        self.verbose = verbose
+        self.items = {}
+        self.mobiles = {}
+        self.next_item_serial = FIRST_ITEM_SERIAL
+        self.next_mobile_serial = FIRST_MOBILE_SERIAL
+        self.statics = {}
+        self.water = set()
+        self.trees = {}
+        self.journal = []
+        self.messages = []
+        self.ignored = set()
+        self.timers = {}
+        self.tally = {}
+        self.api_calls = {}
+        self.total_calls = 0
+        self.prompt_answers = {}
+        self.last_message = ""
+
+        # Player state.
+        self.x = START_X
+        self.y = START_Y
+        self.walk = None
+        self.map_id = 0
+        self.hits = 100
+        self.hits_max = 100
+        self.mana = 100
+        self.mana_max = 100
+        self.strength = 100
+        self.followers = 0
+        self.war_mode = False
+        self.skills = {
+            "Lumberjacking": 60.0, "Blacksmith": 42.0, "Carpentry": 35.0,
+            "Animal Taming": 45.0, "Mining": 80.0, "Healing": 60.0, "Magery": 80.0,
+        }
+        self.skill_cap = 100.0
+        self.skill_busy_until = 0
+        self.action_busy_until = 0
+        self.spell_busy_until = 0
+        self.drag_ready_at = 0
+        self.equipped = {}
+
+        # Client state.
+        self.target_mode = None
+        self.gumps = {}
+        self.last_gump = 0
+        self.craft = {"tool": None, "category": None, "last_recipe": None}
+        self.context_target = None
+
+        self.backpack = self.new_item(BACKPACK_ID, name="backpack")
+        self.backpack.parent = PLAYER_SERIAL
+        self.equipped["Backpack"] = self.backpack.Serial
+
+    # --- Bookkeeping ---
+
+    def count(self, what, amount=1):
+        self.tally[what] = self.tally.get(what, 0) + amount
+
+    def log(self, text):
+        if self.verbose:
+            print("[{:>9.1f}s] {}".format(self.clock.now / 1000.0, text))
+
+    def say(self, text):
+        """Adds a system message to the journal right now."""
+        self.journal.append(JournalEntry(text, self.clock.now))
+        self.log("journal: " + text)
+
+    def say_later(self, text, delay=SERVER_LATENCY):
+        self.clock.schedule(delay, lambda: self.say(text))
+
+    # --- Items ---
+
+    def new_item(self, item_id, amount=1, hue=0, name=None, container=None, x=None, y=None):
+        item = Item(self, self.next_item_serial, item_id, amount, hue, name)
+        self.next_item_serial += 1
+        self.items[item.Serial] = item
+        if container is not None:
+            self.put_in(item, container)
+        elif x is not None:
+            self.put_on_ground(item, x, y)
+        return item
+
+    def detach(self, item):
+        parent = self.items.get(item.parent)
+        if parent is not None and item in parent.children:
+            parent.children.remove(item)
+        for layer, serial in list(self.equipped.items()):
+            if serial == item.Serial:
+                del self.equipped[layer]
+        item.parent = 0
+
+    def delete(self, item):
+        self.detach(item)
+        for child in list(item.children):
+            self.delete(child)
+        self.items.pop(item.Serial, None)
+
+    def put_in(self, item, container):
+        """Drops item into container, stacking it onto a matching stack when possible."""
+        self.detach(item)
+        if item.ItemID in STACKABLE_IDS:
+            for other in container.children:
+                if other.ItemID == item.ItemID and other.Hue == item.Hue and other is not item:
+                    other.Amount += item.Amount
+                    self.items.pop(item.Serial, None)
+                    return other
+        item.parent = container.Serial
+        container.children.append(item)
+        return item
+
+    def put_on_ground(self, item, x, y, z=0):
+        self.detach(item)
+        item.x, item.y, item.z = x, y, z
+        return item
+
+    def split(self, item, amount):
+        """Takes amount off a stack and returns it as a new item (or the whole item)."""
+        if amount <= 0 or amount >= item.Amount or item.ItemID not in STACKABLE_IDS:
+            return item
+        item.Amount -= amount
+        piece = self.new_item(item.ItemID, amount, item.Hue, item.Name)
+        return piece
+
+    def add_to_backpack(self, item_id, amount, hue=0, name=None):
+        item = self.new_item(item_id, amount, hue, name)
+        return self.put_in(item, self.backpack)
+
+    def descendants(self, container, recursive):
+        for child in list(container.children):
+            yield child
+            if recursive and child.children:
+                for grandchild in self.descendants(child, recursive):
+                    yield grandchild
+
+    def consume(self, item_id, amount):
+        """Removes amount of item_id from the backpack (recursively). Returns False if short."""
+        stacks = [item for item in self.descendants(self.backpack, True) if item.ItemID == item_id]
+        if sum(item.Amount for item in stacks) < amount:
+            return False
+        for item in stacks:
+            used = min(item.Amount, amount)
+            item.Amount -= used
+            amount -= used
+            if item.Amount <= 0:
+                self.delete(item)
+            if amount <= 0:
+                break
+        return True
+
+    def resolve_item(self, value):
+        if isinstance(value, Item):
+            return self.items.get(value.Serial)
+        if isinstance(value, int):
+            return self.items.get(value)
+        return None
+
+    def resolve_mobile(self, value):
+        if isinstance(value, Mobile):
+            return self.mobiles.get(value.Serial)
+        if isinstance(value, int):
+            return self.mobiles.get(value)
+        return None
+
+    def is_in_backpack(self, item):
+        return item is not None and item.RootContainer == self.backpack.Serial
+
+    def use_tool(self, tool):
+        """Wears a tool down by one use, destroying it when it runs out."""
+        tool.uses -= 1
+        if tool.uses <= 0:
+            self.say_later("You have worn out your tool!")
+            self.delete(tool)
+
+    # --- Player and map ---
+
+    def player_position(self):
+        self.update_walk()
+        return Point3D(self.x, self.y, 0)
+
+    def distance_to(self, x, y):
+        self.update_walk()
+        return max(abs(self.x - x), abs(self.y - y))
+
+    def update_walk(self):
+        """Moves the player along a path started with Player.PathFindTo."""
+        if self.walk is None:
+            return
+        path, started = self.walk
+        steps = min(len(path), (self.clock.now - started) // STEP_TIME)
+        if steps > 0:
+            self.x, self.y = path[steps - 1]
+        if steps >= len(path):
+            self.walk = None
+
+    def land_id(self, x, y):
+        return WATER_LAND_ID if (x, y) in self.water else GRASS_LAND_ID
+
+    def is_walkable(self, x, y):
+        if (x, y) in self.water:
+            return False
+        for tile in self.statics.get((x, y), []):
+            if tile.StaticID in TREE_STATIC_IDS or tile.StaticID == ROCK_STATIC_ID:
+                return False
+        return True
+
+    def find_path(self, x, y, max_nodes=40000):
+        """Breadth-first search over walkable tiles. Returns a list of steps or None."""
+        self.update_walk()
+        start = (self.x, self.y)
+        goal = (x, y)
+        if start == goal:
+            return []
+        if not self.is_walkable(x, y):
+            return None
+        previous = {start: None}
+        frontier = [start]
+        while frontier and len(previous) < max_nodes:
+            next_frontier = []
+            for cx, cy in frontier:
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        step = (cx + dx, cy + dy)
+                        if step in previous or not self.is_walkable(step[0], step[1]):
+                            continue
+                        previous[step] = (cx, cy)
+                        if step == goal:
+                            path = [step]
+                            while previous[path[-1]] != start:
+                                path.append(previous[path[-1]])
+                            return path[::-1]
+                        next_frontier.append(step)
+            frontier = next_frontier
+        return None
+
+    def skill(self, name):
+        return self.skills.get(name, 0.0)
+
+    def check_skill(self, name, chance):
+        """Rolls a skill check with the RunUO gain formula. Returns True on success."""
+        success = self.rng.random() < chance
+        value = self.skill(name)
+        if value < self.skill_cap and 0.0 < chance < 1.0:
+            gain_chance = (self.skill_cap - value) / self.skill_cap
+            gain_chance += (1.0 - chance) * (0.5 if success else 0.2)
+            gain_chance = max(0.01, gain_chance / 2.0)
+            if self.rng.random() < gain_chance:
+                self.skills[name] = round(value + 0.1, 1)
+                self.count("skill gain (" + name + ")", 0.1)
+                self.say_later("Your skill in {} has increased by 0.1. It is now {:.1f}.".format(name, self.skills[name]))
+        return success
+
+    def weight(self):
+        total = self.backpack.Weight
+        for layer, serial in self.equipped.items():
+            if layer != "Backpack" and serial in self.items:
+                total += self.items[serial].Weight
+        return int(math.ceil(total))
+
+    def max_weight(self):
+        return int(40 + 3.5 * self.strength)
+
+    # --- Gumps ---
+
+    def open_gump(self, gump_id, delay=SERVER_LATENCY):
+        def show():
+            self.gumps[gump_id] = True
+            self.last_gump = gump_id
+            self.log("gump 0x{:08X} opened".format(gump_id))
+        self.clock.schedule(delay, show)
+
+    def close_gump(self, gump_id):
+        self.gumps.pop(gump_id, None)
+
+    # --- Server rules ---
+
+    def chop(self, x, y, axe):
+        if self.clock.now < self.action_busy_until:
+            self.say_later("You must wait to perform another action.")
+            return
+        if self.distance_to(x, y) > 2:
+            self.say_later("That is too far away.")
+            return
+        tree = self.trees.get((x, y))
+        if tree is None:
+            self.say_later("You can't use an axe on that.")
+            return
+        self.action_busy_until = self.clock.now + CHOP_TIME
+        self.use_tool(axe)
+
+        def finish():
+            if self.clock.now >= tree["respawn_at"] and tree["logs"] <= 0:
+                tree["logs"] = self.rng.randint(*LOGS_PER_TREE)
+            if tree["logs"] <= 0:
+                self.say("There's not enough wood here to harvest.")
+                return
+            if self.check_skill("Lumberjacking", min(1.0, self.skill("Lumberjacking") / 100.0)):
+                amount = min(LOGS_PER_CHOP, tree["logs"])
+                tree["logs"] -= amount
+                if tree["logs"] <= 0:
+                    tree["respawn_at"] = self.clock.now + TREE_RESPAWN
+                self.add_to_backpack(LOG_ID, amount, name="logs")
+                self.count("logs", amount)
+                self.say("You put some logs into your backpack.")
+            else:
+                self.say("You hack at the tree for a while, but fail to produce any useable wood.")
+        self.clock.schedule(CHOP_TIME, finish)
+
+    def make_boards(self, logs, axe):
+        if not self.is_in_backpack(logs):
+            self.say_later("That is too far away.")
+            return
+        self.use_tool(axe)
+
+        def finish():
+            if logs.Serial in self.items:
+                amount = logs.Amount
+                self.delete(logs)
+                self.add_to_backpack(BOARD_ID, amount, name="boards")
+                self.count("boards", amount)
+        self.clock.schedule(SERVER_LATENCY, finish)
+
+    def destroy_with_axe(self, item, axe):
+        if not self.is_in_backpack(item):
+            self.say_later("That is too far away.")
+            return
+        self.use_tool(axe)
+        self.clock.schedule(SERVER_LATENCY, lambda: self.delete(item) if item.Serial in self.items else None)
+        self.count("items destroyed")
+
+    def smelt_ore(self, ore, forge):
+        if forge is None or forge.ItemID != FORGE_ID:
+            self.say_later("That is not a forge.")
+            return
+        if self.distance_to(forge.x, forge.y) > 2:
+            self.say_later("The forge is too far away.")
+            return
+        if self.clock.now < self.action_busy_until:
+            self.say_later("You must wait to perform another action.")
+            return
+        ingots = int(ore.Amount * INGOTS_PER_ORE.get(ore.ItemID, 1.0))
+        if ingots < 1:
+            self.say_later("There is not enough metal-bearing ore in this pile to make an ingot.")
+            return
+        self.action_busy_until = self.clock.now + SMELT_ORE_TIME
+
+        def finish():
+            if ore.Serial not in self.items:
+                return
+            if self.check_skill("Mining", min(1.0, self.skill("Mining") / 100.0 + 0.3)):
+                self.delete(ore)
+                self.add_to_backpack(INGOT_ID, ingots, ore.Hue, "ingots")
+                self.count("ingots", ingots)
+                self.say("You smelt the ore removing the impurities and put the metal in your backpack.")
+            else:
+                ore.Amount = ore.Amount // 2
+                if ore.Amount <= 0:
+                    self.delete(ore)
+                self.say("You burn away the impurities but are left with less useable metal.")
+        self.clock.schedule(SMELT_ORE_TIME, finish)
+
+    def craft_skill(self, tool):
+        return "Carpentry" if tool.ItemID in CARPENTRY_TOOL_IDS else "Blacksmith"
+
+    def craft_material(self, skill_name):
+        return BOARD_ID if skill_name == "Carpentry" else INGOT_ID
+
+    def recipes(self):
+        """Recipes come from the training_plan table of the script being run."""
+        return self.tables.get("training_plan") or {}
+
+    def find_recipe(self, button):
+        category = self.craft["category"]
+        fallback = None
+        for name, details in self.recipes().items():
+            if details.get("item_gump") == button:
+                if details.get("category_gump") == category:
+                    return name, details
+                fallback = fallback or (name, details)
+        return fallback
+
+    def craft_button(self, button):
+        tool = self.items.get(self.craft["tool"] or 0)
+        if tool is None:
+            return
+        smelt_button = self.tables.get("SMELT_BUTTON_ID", DEFAULT_SMELT_BUTTON_ID)
+        categories = set(details.get("category_gump") for details in self.recipes().values())
+        if button == 0:
+            return
+        if button == smelt_button:
+            self.target_mode = ("smelt_item", tool)
+            return
+        recipe = None
+        if button == MAKE_LAST_BUTTON_ID:
+            recipe = self.craft["last_recipe"]
+        if recipe is None:
+            recipe = self.find_recipe(button)
+        if recipe is None and button in categories:
+            self.craft["category"] = button
+            self.open_gump(CRAFT_GUMP_ID)
+            return
+        if recipe is None:
+            self.open_gump(CRAFT_GUMP_ID)
+            return
+        self.start_craft(tool, recipe)
+
+    def start_craft(self, tool, recipe):
+        name, details = recipe
+        skill_name = self.craft_skill(tool)
+        material = self.craft_material(skill_name)
+        needed = details.get("boards", details.get("ingots", 1))
+        self.craft["last_recipe"] = recipe
+        self.craft["category"] = details.get("category_gump")
+        if self.clock.now < self.action_busy_until:
+            self.say_later("You must wait to perform another action.")
+            self.open_gump(CRAFT_GUMP_ID)
+            return
+        stock = sum(item.Amount for item in self.descendants(self.backpack, True) if item.ItemID == material)
+        if stock < needed:
+            self.say_later("You do not have sufficient material to make that.")
+            self.open_gump(CRAFT_GUMP_ID)
+            return
+        self.action_busy_until = self.clock.now + CRAFT_TIME
+
+        def finish():
+            if tool.Serial not in self.items:
+                return
+            # The item's own skill range when the plan gives it, otherwise a guess from its band.
+            low = details.get("craft_min", details.get("min_skill", 0.0) - 25.0)
+            high = details.get("craft_max", low + 50.0)
+            chance = max(0.0, min(1.0, (self.skill(skill_name) - low) / (high - low)))
+            if self.check_skill(skill_name, chance):
+                self.consume(material, needed)
+                # Crafted items go next to the tool, like on most shards.
+                container = self.items.get(tool.parent, self.backpack)
+                self.new_item(details.get("graphic", 0x0F52), name=name, container=container)
+                self.count("items crafted")
+                self.count("materials used", needed)
+                self.say("You create the item.")
+            else:
+                self.consume(material, max(1, needed // 2))
+                self.count("materials used", max(1, needed // 2))
+                self.say("You fail to create the item, and some of your materials are lost.")
+            self.use_tool(tool)
+            if tool.Serial in self.items:
+                self.open_gump(CRAFT_GUMP_ID, 0)
+        self.clock.schedule(CRAFT_TIME, finish)
+
+    def smeltable_ingots(self, item):
+        if item.ItemID == SAMPLE_SMELT_ID:
+            return 1
+        for details in self.recipes().values():
+            if details.get("graphic") == item.ItemID:
+                return max(1, details.get("ingots", details.get("boards", 2)) // 2)
+        return 0
+
+    def smelt_item(self, item, tool):
+        if not self.is_in_backpack(item):
+            self.say_later("The item must be in your backpack to smelt it.")
+            self.open_gump(CRAFT_GUMP_ID)
+            return
+        ingots = self.smeltable_ingots(item)
+        if ingots == 0:
+            self.say_later("You can't melt that down into ingots.")
+            self.open_gump(CRAFT_GUMP_ID)
+            return
+
+        def finish():
+            if item.Serial in self.items:
+                self.delete(item)
+                self.add_to_backpack(INGOT_ID, ingots, name="ingots")
+                self.count("items smelted")
+                self.say("You melt the item down into ingots.")
+            if tool.Serial in self.items:
+                self.use_tool(tool)
+            if tool.Serial in self.items:
+                self.open_gump(CRAFT_GUMP_ID, 0)
+        self.clock.schedule(SMELT_ITEM_TIME, finish)
+
+    def pick_plant(self, plant):
+        if self.distance_to(plant.x, plant.y) > 2:
+            self.say_later("You are too far away to do that.")
+            return
+        if self.clock.now < self.action_busy_until:
+            self.say_later("You must wait to perform another action.")
+            return
+        self.action_busy_until = self.clock.now + PICK_TIME
+
+        def finish():
+            if plant.Serial not in self.items or plant.ItemID == PICKED_PLANT_ID:
+                return
+            plant.uses -= 1
+            self.new_item(COTTON_ID, 1, name="cotton", x=plant.x, y=plant.y)
+            if plant.uses <= 0:
+                plant.ItemID = PICKED_PLANT_ID
+                self.clock.schedule(PLANT_RESPAWN, lambda: self.regrow_plant(plant))
+        self.clock.schedule(PICK_TIME, finish)
+
+    def regrow_plant(self, plant):
+        if plant.Serial in self.items:
+            plant.ItemID = self.rng.choice(COTTON_PLANT_IDS)
+            plant.uses = self.rng.randint(*COTTON_PER_PLANT)
+
+    def start_taming(self, mobile):
+        if mobile is None:
+            self.say_later("That cannot be tamed.")
+            return
+        if mobile.owner:
+            self.say_later("That animal looks tame already.")
+            return
+        if max(abs(self.x - mobile.x), abs(self.y - mobile.y)) > 6:
+            self.say_later("That is too far away.")
+            return
+
+        def tick(ticks_left):
+            if mobile.Serial not in self.mobiles:
+                return
+            if self.distance_to(mobile.x, mobile.y) > 6:
+                self.say("You are too far away to continue taming.")
+                return
+            if ticks_left > 0:
+                self.say("I've always wanted a pet like you.")
+                self.clock.schedule(TAME_TICK_TIME, lambda: tick(ticks_left - 1))
+                return
+            difficulty = mobile.difficulty + mobile.owners * 6.0
+            chance = max(0.0, min(1.0, (self.skill("Animal Taming") - (difficulty - 25.0)) / 50.0))
+            if self.check_skill("Animal Taming", chance):
+                mobile.owner = PLAYER_SERIAL
+                mobile.owners += 1
+                self.followers += 1
+                self.count("animals tamed")
+                self.say("It seems to accept you as master.")
+            else:
+                self.say("You fail to tame the creature.")
+        self.clock.schedule(TAME_TICK_TIME, lambda: tick(2))
+
+    def release(self, mobile):
+        if mobile is not None and mobile.owner == PLAYER_SERIAL:
+            mobile.owner = 0
+            self.followers = max(0, self.followers - 1)
+            self.count("animals released")
+            # Released pets wander off; another animal turns up later.
+            self.clock.schedule(SERVER_LATENCY, lambda: self.mobiles.pop(mobile.Serial, None))
+            self.clock.schedule(30000, self.spawn_animal)
+
+    def spawn_animal(self):
+        tameables = self.tables.get("tameable_data") or DEFAULT_TAMEABLES
+        skill = self.skill("Animal Taming")
+        bodies = [body for body, difficulty in tameables.items() if difficulty <= skill + 10.0]
+        body = self.rng.choice(bodies or list(tameables))
+        for _ in range(50):
+            x = self.x + self.rng.randint(-10, 10)
+            y = self.y + self.rng.randint(-10, 10)
+            if self.is_walkable(x, y):
+                break
+        mobile = Mobile(self, self.next_mobile_serial, body, "a creature", x, y, tameables[body])
+        self.next_mobile_serial += 1
+        self.mobiles[mobile.Serial] = mobile
+
+    def spawn_corpses(self):
+        for _ in range(self.rng.randint(*CORPSE_WAVE)):
+            self.spawn_corpse(repeat=False)
+        self.clock.schedule(CORPSE_WAVE_INTERVAL, self.spawn_corpses)
+
+    def spawn_corpse(self, repeat=True):
+        x = self.x + self.rng.choice((-1, 0, 1))
+        y = self.y + self.rng.choice((-1, 1))
+        corpse = self.new_item(CORPSE_ID, name="a corpse", x=x, y=y)
+        self.new_item(GOLD_ID, self.rng.randint(20, 300), name="gold", container=corpse)
+        for _ in range(self.rng.randint(0, 2)):
+            self.new_item(self.rng.choice(GEM_IDS), 1, name="gem", container=corpse)
+        for _ in range(self.rng.randint(2, 10)):
+            props = self.rng.choice(CORPSE_ITEM_PROPS)
+            loot = self.new_item(0x1400 + self.rng.randint(0, 64), name=props[0], container=corpse)
+            loot.props = [loot.Name] + props[1:]
+            loot.props_ready_at = self.clock.now + self.rng.randint(500, 3000)
+        self.clock.schedule(CORPSE_DECAY, lambda: self.delete(corpse) if corpse.Serial in self.items else None)
+        if repeat:
+            self.clock.schedule(CORPSE_INTERVAL, self.spawn_corpse)
+
+    def ambient_damage(self):
+        self.hits = max(1, self.hits - self.rng.randint(5, 20))
+        self.clock.schedule(self.rng.randint(8000, 20000), self.ambient_damage)
+
+
+# --- Razor Enhanced API Stand-ins ---
+
+class ItemFilter(object):
+    def __init__(self):
+        self.Enabled = True
+        self.Serials = GenericList()
+        self.Graphics = GenericList()
+        self.Hues = GenericList()
+        self.Name = ""
+        self.RangeMin = -1
+        self.RangeMax = -1
+        self.OnGround = -1
+        self.IsCorpse = -1
+        self.IsContainer = -1
+        self.Movable = -1
+        self.CheckIgnoreObject = False
+
+
+class MobileFilter(object):
+    def __init__(self):
+        self.Enabled = True
+        self.Serials = GenericList()
+        self.Bodies = GenericList()
+        self.Notorieties = GenericList()
+        self.Name = ""
+        self.RangeMin = -1
+        self.RangeMax = -1
+        self.IsHuman = -1
+        self.IsGhost = -1
+        self.Warmode = -1
+        self.Friend = -1
+        self.CheckIgnoreObject = False
+
+
+class MiscAPI(object):
+    def __init__(self, world):
+        self._world = world
+
+    def Pause(self, ms):
+        self._world.clock.advance(ms)
+
+    def SendMessage(self, message, color=0, wait=True):
+        message = str(message)
+        self._world.messages.append(message)
+        self._world.last_message = message
+        self._world.log("message: " + message)
+
+    def IgnoreObject(self, obj):
+        serial = obj.Serial if hasattr(obj, "Serial") else int(obj)
+        self._world.ignored.add(serial)
+
+    def UnIgnoreObject(self, obj):
+        serial = obj.Serial if hasattr(obj, "Serial") else int(obj)
+        self._world.ignored.discard(serial)
+
+    def CheckIgnoreObject(self, obj):
+        serial = obj.Serial if hasattr(obj, "Serial") else int(obj)
+        return serial in self._world.ignored
+
+    def ClearIgnore(self):
+        self._world.ignored.clear()
+
+    def PetRename(self, mobile, name):
+        mobile = self._world.resolve_mobile(mobile)
+        if mobile is not None and mobile.owner == PLAYER_SERIAL:
+            mobile.Name = name
+
+    def WaitForContext(self, mobile, delay, show_context=False):
+        world = self._world
+        mobile = world.resolve_mobile(mobile)
+        world.clock.advance(SERVER_LATENCY)
+        if mobile is None:
+            return GenericList()
+        world.context_target = mobile.Serial
+        entries = GenericList([ContextEntry(1, "Command: Follow"), ContextEntry(2, "Command: Stay")])
+        if mobile.owner == PLAYER_SERIAL:
+            entries.Add(ContextEntry(9, "Release"))
+        return entries
+
+    def ContextReply(self, mobile, response):
+        world = self._world
+        mobile = world.resolve_mobile(mobile)
+        if mobile is not None and response == 9 and mobile.owner == PLAYER_SERIAL:
+            world.context_target = mobile.Serial
+            world.open_gump(RELEASE_GUMP_ID)
+
+    def ScriptStopAll(self):
+        raise SimulationFinished("script stopped itself")
+
+
+class ItemsAPI(object):
+    def __init__(self, world):
+        self._world = world
+
+    def Filter(self):
+        return ItemFilter()
+
+    def ApplyFilter(self, item_filter):
+        world = self._world
+        found = GenericList()
+        for item in list(world.items.values()):
+            if item is world.backpack:
+                continue
+            if item_filter.Graphics and item.ItemID not in item_filter.Graphics:
+                continue
+            if item_filter.Hues and item.Hue not in item_filter.Hues:
+                continue
+            if item_filter.OnGround == 1 and not item.OnGround:
+                continue
+            if item_filter.OnGround == 0 and item.OnGround:
+                continue
+            if item_filter.IsCorpse == 1 and not item.IsCorpse:
+                continue
+            if item_filter.IsContainer == 1 and not item.IsContainer:
+                continue
+            if item_filter.CheckIgnoreObject and item.Serial in world.ignored:
+                continue
+            if item_filter.RangeMax >= 0 or item_filter.RangeMin >= 0:
+                position = item.Position
+                distance = world.distance_to(position.X, position.Y)
+                if item_filter.RangeMax >= 0 and distance > item_filter.RangeMax:
+                    continue
+                if item_filter.RangeMin >= 0 and distance < item_filter.RangeMin:
+                    continue
+            found.Add(item)
+        return found
+
+    def FindBySerial(self, serial):
+        return self._world.items.get(int(serial))
+
+    def FindByID(self, item_id, color, container, recursive=False, consider_ignore=True):
+        world = self._world
+        if isinstance(container, Item):
+            container = container.Serial
+        if container == -1:
+            candidates = list(world.items.values())
+        else:
+            parent = world.items.get(container)
+            if parent is None:
+                return None
+            candidates = world.descendants(parent, bool(recursive))
+        for item in candidates:
+            if item.ItemID != item_id or (color != -1 and item.Hue != color):
+                continue
+            if consider_ignore and item.Serial in world.ignored:
+                continue
+            return item
+        return None
+
+    def ContainerCount(self, container, item_id, color=-1, recursive=True):
+        world = self._world
+        if isinstance(container, Item):
+            container = container.Serial
+        parent = world.items.get(container)
+        if parent is None:
+            return 0
+        return sum(item.Amount for item in world.descendants(parent, recursive)
+                   if item.ItemID == item_id and (color == -1 or item.Hue == color))
+
+    def UseItem(self, item, target=None, wait=True):
+        world = self._world
+        item = world.resolve_item(item)
+        if item is None:
+            return
+        if item.ItemID in AXE_IDS:
+            world.target_mode = ("axe", item)
+        elif item.ItemID in SMITH_TOOL_IDS or item.ItemID in CARPENTRY_TOOL_IDS:
+            world.craft["tool"] = item.Serial
+            world.open_gump(CRAFT_GUMP_ID)
+        elif item.ItemID in ORE_IDS:
+            world.target_mode = ("ore", item)
+        elif item.ItemID == BANDAGE_ID:
+            world.target_mode = ("bandage", item)
+        elif item.ItemID in COTTON_PLANT_IDS or item.ItemID == PICKED_PLANT_ID:
+            if item.ItemID == PICKED_PLANT_ID:
+                world.say_later("There is nothing here to harvest.")
+            else:
+                world.pick_plant(item)
+
+    def Move(self, source, destination, amount=-1, x=-1, y=-1):
+        world = self._world
+        item = world.resolve_item(source)
+        if isinstance(destination, Item):
+            destination = destination.Serial
+        target = world.items.get(int(destination))
+        if item is None or target is None:
+            return
+        if world.clock.now < world.drag_ready_at:
+            world.say_later("You must wait to perform another action.")
+            return
+        world.drag_ready_at = world.clock.now + DRAG_COOLDOWN
+        root = world.items.get(target.RootContainer)
+        if root is not None and root.OnGround and world.distance_to(root.x, root.y) > 2:
+            world.say_later("That is too far away.")
+            return
+        source_root = world.items.get(item.RootContainer)
+        if source_root is not None and source_root.OnGround and world.distance_to(source_root.x, source_root.y) > 2:
+            world.say_later("That is too far away.")
+            return
+
+        def finish():
+            if item.Serial not in world.items or target.Serial not in world.items:
+                return
+            piece = world.split(item, amount)
+            container = target
+            if source_root is not None and source_root.IsCorpse and world.is_in_backpack(target):
+                world.count("items looted")
+                if piece.ItemID == GOLD_ID:
+                    world.count("gold looted", piece.Amount)
+            if not container.IsContainer:
+                if container.ItemID == piece.ItemID and container.Hue == piece.Hue and piece.ItemID in STACKABLE_IDS:
+                    container.Amount += piece.Amount
+                    world.delete(piece)
+                    return
+                container = world.items.get(container.parent) or world.backpack
+            if container.ItemID == TRASH_BARREL_ID:
+                world.delete(piece)
+                world.count("items trashed")
+                return
+            if piece.ItemID == COTTON_ID and world.is_in_backpack(container):
+                world.count("cotton", piece.Amount)
+            world.put_in(piece, container)
+        world.clock.schedule(SERVER_LATENCY, finish)
+
+    def MoveOnGround(self, source, amount, x, y, z):
+        world = self._world
+        item = world.resolve_item(source)
+        if item is None:
+            return
+        if world.distance_to(x, y) > 2 or not world.is_walkable(x, y):
+            world.say_later("You can not drop that there.")
+            return
+
+        def finish():
+            if item.Serial in world.items:
+                piece = world.split(item, amount)
+                world.put_on_ground(piece, x, y, z)
+                world.count("items dropped")
+        world.clock.schedule(SERVER_LATENCY, finish)
+
+    def WaitForContents(self, container, delay):
+        self._world.clock.advance(SERVER_LATENCY)
+        return True
+
+    def WaitForProps(self, item, delay):
+        world = self._world
+        item = world.resolve_item(item)
+        if item is None:
+            return False
+        # Asking for properties makes them arrive after a normal round trip.
+        item.props_ready_at = min(item.props_ready_at, world.clock.now + world.rng.randint(*PROPS_LATENCY))
+        return world.clock.wait_until(lambda: item.PropsUpdated, delay)
+
+    def GetPropStringList(self, item):
+        item = self._world.resolve_item(item)
+        if item is None or not item.PropsUpdated:
+            return GenericList()
+        return GenericList(item.props)
+
+    def GetPropValue(self, item, name):
+        for line in self.GetPropStringList(item):
+            if line.lower().startswith(name.lower()):
+                numbers = re.findall(r"\d+", line)
+                return float(numbers[0]) if numbers else 1.0
+        return 0.0
+
+    def SingleClick(self, item):
+        pass
+
+
+class MobilesAPI(object):
+    def __init__(self, world):
+        self._world = world
+
+    def Filter(self):
+        return MobileFilter()
+
+    def ApplyFilter(self, mobile_filter):
+        world = self._world
+        found = GenericList()
+        for mobile in list(world.mobiles.values()):
+            if mobile_filter.Bodies and mobile.Body not in mobile_filter.Bodies:
+                continue
+            if mobile_filter.Notorieties and mobile.Notoriety not in mobile_filter.Notorieties:
+                continue
+            if mobile_filter.IsHuman == 1 and not mobile.IsHuman:
+                continue
+            if mobile_filter.IsGhost == 1 and not mobile.IsGhost:
+                continue
+            if mobile_filter.CheckIgnoreObject and mobile.Serial in world.ignored:
+                continue
+            distance = world.distance_to(mobile.x, mobile.y)
+            if mobile_filter.RangeMax >= 0 and distance > mobile_filter.RangeMax:
+                continue
+            if mobile_filter.RangeMin >= 0 and distance < mobile_filter.RangeMin:
+                continue
+            found.Add(mobile)
+        return found
+
+    def FindBySerial(self, serial):
+        return self._world.mobiles.get(int(serial))
+
+    def Select(self, mobiles, selector):
+        if not mobiles:
+            return None
+        world = self._world
+        if selector == "Nearest":
+            return min(mobiles, key=lambda mobile: world.distance_to(mobile.x, mobile.y))
+        if selector == "Farthest":
+            return max(mobiles, key=lambda mobile: world.distance_to(mobile.x, mobile.y))
+        return world.rng.choice(list(mobiles))
+
+    def SingleClick(self, mobile):
+        pass
+
+
+class PlayerAPI(object):
+    def __init__(self, world):
+        self._world = world
+
+    Serial = property(lambda self: PLAYER_SERIAL)
+    Name = property(lambda self: "Simulated Player")
+    Position = property(lambda self: self._world.player_position())
+    Map = property(lambda self: self._world.map_id)
+    Backpack = property(lambda self: self._world.backpack)
+    Hits = property(lambda self: self._world.hits)
+    HitsMax = property(lambda self: self._world.hits_max)
+    Mana = property(lambda self: self._world.mana)
+    ManaMax = property(lambda self: self._world.mana_max)
+    Str = property(lambda self: self._world.strength)
+    Weight = property(lambda self: self._world.weight())
+    MaxWeight = property(lambda self: self._world.max_weight())
+    Followers = property(lambda self: self._world.followers)
+    FollowersMax = property(lambda self: 5)
+    IsGhost = property(lambda self: False)
+    WarMode = property(lambda self: self._world.war_mode)
+
+    def DistanceTo(self, obj):
+        position = obj.Position
+        return self._world.distance_to(position.X, position.Y)
+
+    def InRangeMobile(self, mobile, tiles):
+        return self.DistanceTo(mobile) <= tiles
+
+    def InRangeItem(self, item, tiles):
+        return self.DistanceTo(item) <= tiles
+
+    def GetItemOnLayer(self, layer):
+        return self._world.items.get(self._world.equipped.get(layer, 0))
+
+    def EquipItem(self, item):
+        world = self._world
+        item = world.resolve_item(item)
+        if item is None:
+            return
+        current = world.items.get(world.equipped.get("RightHand", 0))
+        if current is not None and current is not item:
+            world.put_in(current, world.backpack)
+        world.detach(item)
+        item.parent = PLAYER_SERIAL
+        world.equipped["RightHand"] = item.Serial
+
+    def GetSkillValue(self, name):
+        return self._world.skill(name)
+
+    def GetRealSkillValue(self, name):
+        return self._world.skill(name)
+
+    def GetSkillCap(self, name):
+        return self._world.skill_cap
+
+    def UseSkill(self, name, target=None, wait=True):
+        world = self._world
+        if world.clock.now < world.skill_busy_until:
+            world.say_later("You must wait a few moments to use another skill.")
+            return
+        world.skill_busy_until = world.clock.now + SKILL_DELAY
+        if name == "Animal Taming":
+            world.target_mode = ("tame", None)
+
+    def SetWarMode(self, warflag):
+        self._world.war_mode = bool(warflag)
+
+    def PathFindTo(self, x, y, z=0):
+        world = self._world
+        path = world.find_path(x, y)
+        if path:
+            world.walk = (path, world.clock.now)
+
+    def Run(self, direction):
+        world = self._world
+        world.update_walk()
+        offsets = {
+            "North": (0, -1), "South": (0, 1), "East": (1, 0), "West": (-1, 0),
+            "Up": (-1, -1), "Down": (1, 1), "Left": (-1, 1), "Right": (1, -1),
+        }
+        dx, dy = offsets.get(direction, (0, 0))
+        if world.is_walkable(world.x + dx, world.y + dy):
+            world.x += dx
+            world.y += dy
+        return True
+
+    Walk = Run
+
+
+class StaticsAPI(object):
+    def __init__(self, world):
+        self._world = world
+
+    def GetStaticsTileInfo(self, x, y, map_id):
+        return GenericList(self._world.statics.get((x, y), []))
+
+    def GetLandID(self, x, y, map_id):
+        return self._world.land_id(x, y)
+
+    def GetLandFlag(self, land_id, flag):
+        return flag == "Impassable" and land_id == WATER_LAND_ID
+
+    def GetTileFlag(self, static_id, flag):
+        return flag == "Impassable" and (static_id in TREE_STATIC_IDS or static_id == ROCK_STATIC_ID)
+
+
+class JournalAPI(object):
+    def __init__(self, world):
+        self._world = world
+
+    def Clear(self, text=None):
+        if text is None:
+            del self._world.journal[:]
+        else:
+            self._world.journal[:] = [entry for entry in self._world.journal if text not in entry.Text]
+
+    def Search(self, text):
+        return any(text in entry.Text for entry in self._world.journal)
+
+    def SearchByName(self, text, name):
+        return any(text in entry.Text and entry.Name == name for entry in self._world.journal)
+
+    def GetLineText(self, text, add_name=False):
+        for entry in reversed(self._world.journal):
+            if text in entry.Text:
+                return entry.Text
+        return ""
+
+    def GetTextByType(self, entry_type, add_name=False):
+        return GenericList(entry.Text for entry in self._world.journal if entry.Type == entry_type)
+
+    def GetJournalEntry(self, after_timestamp=-1):
+        return GenericList(entry for entry in self._world.journal if entry.Timestamp > after_timestamp)
+
+    def WaitJournal(self, text, delay):
+        return self._world.clock.wait_until(lambda: self.Search(text), delay)
+
+
+class TargetAPI(object):
+    def __init__(self, world):
+        self._world = world
+        self.last_attack = 0
+
+    def PromptTarget(self, message="", color=0):
+        world = self._world
+        world.clock.advance(500)
+        prompt = (message or world.last_message).lower()
+        for keyword, serial in world.prompt_answers.items():
+            if re.search(r"\b" + re.escape(keyword) + r"\b", prompt):
+                return serial
+        return 0
+
+    def HasTarget(self, target_flag="Any"):
+        return self._world.target_mode is not None
+
+    def WaitForTarget(self, delay, noshow=False):
+        world = self._world
+        return world.clock.wait_until(lambda: world.target_mode is not None, delay)
+
+    def Cancel(self):
+        self._world.target_mode = None
+
+    def TargetExecute(self, *args):
+        world = self._world
+        mode = world.target_mode
+        world.target_mode = None
+        if mode is None:
+            return
+        kind, source = mode
+        if len(args) >= 3:
+            x, y = args[0], args[1]
+            if kind == "axe" and source.Serial in world.items:
+                world.chop(x, y, source)
+            return
+        target = args[0]
+        item = world.resolve_item(target)
+        mobile = world.resolve_mobile(target)
+        if kind == "axe":
+            if item is not None and item.ItemID == LOG_ID:
+                world.make_boards(item, source)
+            elif item is not None:
+                world.destroy_with_axe(item, source)
+        elif kind == "ore":
+            if source.Serial in world.items:
+                world.smelt_ore(source, item)
+        elif kind == "smelt_item":
+            if item is not None:
+                world.smelt_item(item, source)
+        elif kind == "tame":
+            world.start_taming(mobile)
+        elif kind == "bandage":
+            if target == PLAYER_SERIAL:
+                self.Self()
+
+    def TargetExecuteRelative(self, serial, offset):
+        self.TargetExecute(serial)
+
+    def Self(self):
+        world = self._world
+        mode = world.target_mode
+        world.target_mode = None
+        if mode is not None and mode[0] == "bandage" and world.consume(BANDAGE_ID, 1):
+            def heal():
+                world.hits = min(world.hits_max, world.hits + world.rng.randint(15, 30))
+                world.count("bandages used")
+            world.clock.schedule(BANDAGE_TIME, heal)
+
+    def GetLastAttack(self):
+        return self.last_attack
+
+    def ClearLastAttack(self):
+        self.last_attack = 0
+
+    def SetLast(self, serial):
+        pass
+
+
+class GumpsAPI(object):
+    def __init__(self, world):
+        self._world = world
+
+    def HasGump(self, gump_id=0):
+        if gump_id:
+            return gump_id in self._world.gumps
+        return bool(self._world.gumps)
+
+    def CurrentGump(self):
+        return self._world.last_gump if self._world.last_gump in self._world.gumps else 0
+
+    def WaitForGump(self, gump_id, delay):
+        world = self._world
+        if gump_id:
+            return world.clock.wait_until(lambda: gump_id in world.gumps, delay)
+        return world.clock.wait_until(lambda: bool(world.gumps), delay)
+
+    def CloseGump(self, gump_id):
+        self._world.close_gump(gump_id)
+
+    def SendAction(self, gump_id, button_id):
+        world = self._world
+        if gump_id not in world.gumps:
+            return
+        world.close_gump(gump_id)
+        if gump_id == CRAFT_GUMP_ID:
+            world.craft_button(button_id)
+        elif gump_id == RELEASE_GUMP_ID and button_id == 2:
+            world.release(world.mobiles.get(world.context_target))
+
+
+class TimerAPI(object):
+    def __init__(self, world):
+        self._world = world
+
+    def Create(self, name, ms):
+        self._world.timers[name] = self._world.clock.now + ms
+
+    def Check(self, name):
+        """True while the timer is still running, like in Razor Enhanced."""
+        return self._world.clock.now < self._world.timers.get(name, 0)
+
+    def Remaining(self, name):
+        return max(0, self._world.timers.get(name, 0) - self._world.clock.now)
+
+
+class PathFindingAPI(object):
+    def __init__(self, world):
+        self._world = world
+
+    def GetPath(self, x, y, ignore_mob=True):
+        path = self._world.find_path(x, y)
+        return None if path is None else GenericList(path)
+
+    def RunPath(self, path, timeout=-1, debug_message=False, use_resync=True):
+        world = self._world
+        if path is None:
+            return False
+        world.walk = None
+        steps = list(path)
+        allowed = len(steps) if timeout is None or timeout < 0 else int(timeout * 1000) // STEP_TIME
+        for x, y in steps[:allowed]:
+            world.clock.advance(STEP_TIME)
+            world.x, world.y = x, y
+        return allowed >= len(steps)
+
+    def Go(self, x, y, z=0):
+        return self.RunPath(self.GetPath(x, y))
+
+
+class SpellsAPI(object):
+    def __init__(self, world):
+        self._world = world
+
+    def CastMagery(self, name, target=None, wait=True):
+        world = self._world
+        if world.clock.now < world.spell_busy_until:
+            world.say_later("You have not yet recovered from casting a spell.")
+            return
+        cost = {"Greater Heal": 11, "Energy Bolt": 20}.get(name, 10)
+        if world.mana < cost:
+            world.say_later("Insufficient mana for this spell.")
+            return
+        world.mana -= cost
+        world.spell_busy_until = world.clock.now + 1500
+        if name == "Greater Heal":
+            world.clock.schedule(1500, lambda: setattr(world, "hits", min(world.hits_max, world.hits + 25)))
+
+
+class CallCounter(object):
+    """Wraps an API object so that every method call is counted."""
+
+    def __init__(self, world, name, target):
+        self._world = world
+        self._name = name
+        self._target = target
+
+    def __getattr__(self, attribute):
+        value = getattr(self._target, attribute)
+        if not callable(value) or isinstance(value, type):
+            return value
+        world = self._world
+        key = "{}.{}".format(self._name, attribute)
+
+        def counted(*args, **kwargs):
+            world.api_calls[key] = world.api_calls.get(key, 0) + 1
+            world.total_calls += 1
+            if world.total_calls > MAX_API_CALLS:
+                raise SimulationFinished("API call budget exhausted")
+            return value(*args, **kwargs)
+        return counted
+
+
+# --- World Setup ---
+
+def read_script_tables(source):
+    """Reads the literal configuration values (training_plan, tameable_data, ...) from a script."""
+    tables = {}
+    for node in ast.parse(source).body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+        if not isinstance(node.targets[0], ast.Name):
+            continue
+        try:
+            tables[node.targets[0].id] = ast.literal_eval(node.value)
+        except (ValueError, SyntaxError, TypeError):
+            pass
+    return tables
+
+
+def build_forest(world):
+    """Scatters trees and a pond around the start, leaving a clearing for the work stations."""
+    rng = world.rng
+    for x in range(START_X - 30, START_X + 26):
+        for y in range(START_Y - 50, START_Y + 28):
+            if abs(x - START_X) <= 3 and abs(y - START_Y) <= 3:
+                continue
+            if rng.random() < 0.12:
+                world.statics[(x, y)] = [StaticTile(rng.choice(TREE_STATIC_IDS))]
+                world.trees[(x, y)] = {"logs": rng.randint(*LOGS_PER_TREE), "respawn_at": 0}
+            elif rng.random() < 0.01:
+                world.statics[(x, y)] = [StaticTile(ROCK_STATIC_ID)]
+    for x in range(START_X - 16, START_X - 11):
+        for y in range(START_Y + 12, START_Y + 16):
+            world.water.add((x, y))
+            world.statics.pop((x, y), None)
+            world.trees.pop((x, y), None)
+
+
+def clear_tile(world, x, y):
+    world.statics.pop((x, y), None)
+    world.trees.pop((x, y), None)
+    world.water.discard((x, y))
+
+
+def stock_world(world, script_name, scenarios=()):
+    """Gives the player the tools and stations the script expects, and answers its target prompts."""
+    rng = world.rng
+    tables = world.tables
+    pack = world.backpack
+    answers = world.prompt_answers
+
+    # Lumberjacking: an equipped axe, spares in the pack and a weapon for ChopandDrop.py.
+    axe = world.new_item(0x0F49, name="axe")
+    axe.uses = AXE_USES
+    equip_item(world, axe)
+    for _ in range(2):
+        spare = world.new_item(0x0F49, name="axe", container=pack)
+        spare.uses = AXE_USES
+    answers["axe"] = axe.Serial
+    answers["weapon"] = world.new_item(WEAPON_ID, name="katana", container=pack).Serial
+
+    # The house crate Lumberjacking_auto.py deposits into, five steps north of HOUSE_X/Y.
+    house_x = tables.get("HOUSE_X", START_X + 13)
+    house_y = tables.get("HOUSE_Y", START_Y - 47)
+    for dy in range(-6, 1):
+        clear_tile(world, house_x, house_y + dy)
+    crate = world.new_item(CRATE_ID, name="secure crate", x=house_x + 1, y=house_y - 5)
+    if "CRATE_SERIAL" in tables:
+        del world.items[crate.Serial]
+        crate.Serial = tables["CRATE_SERIAL"]
+        world.items[crate.Serial] = crate
+    forest_x = tables.get("FOREST_RETURN_X")
+    if forest_x is not None:
+        clear_tile(world, forest_x, tables.get("FOREST_RETURN_Y"))
+
+    # Work stations next to the start.
+    forge = world.new_item(FORGE_ID, name="forge", x=START_X + 1, y=START_Y)
+    answers["forge"] = forge.Serial
+
+    if script_name == "Ore_Smelter":
+        ore_crate = world.new_item(CRATE_ID, name="ore crate", x=START_X - 1, y=START_Y)
+        hues = [0x0000, 0x0973, 0x0966, 0x096D, 0x0972, 0x08A5, 0x0979, 0x089F, 0x08AB]
+        if "ore-bags" in scenarios:
+            # Ore in the crate stacks, but piles kept in bags inside it do not, and a lone
+            # small ore is too little to smelt until it is merged with another pile.
+            ore_bags = [world.new_item(BAG_ID, name="ore bag", container=ore_crate) for _ in range(2)]
+            for hue in hues[:5]:
+                for ore_id in ORE_IDS:
+                    for container in [ore_crate] + ore_bags:
+                        if rng.random() < 0.6:
+                            amount = 1 if ore_id == 0x19B7 else rng.randint(1, 40)
+                            world.new_item(ore_id, amount, hue, "ore", container=container)
+        else:
+            for hue in hues[:5]:
+                for ore_id in ORE_IDS:
+                    for _ in range(rng.randint(1, 3)):
+                        world.new_item(ore_id, rng.randint(1, 40), hue, "ore", container=ore_crate)
+        answers["ore"] = ore_crate.Serial
+
+    if script_name in ("Smith_Smelt", "Smelter"):
+        for _ in range(10):
+            hammer = world.new_item(SMITH_TOOL_IDS[0], name="smith's hammer", container=pack)
+            hammer.uses = CRAFT_TOOL_USES
+        answers["smithing tool"] = pack.children[-1].Serial
+        if script_name == "Smith_Smelt" and "restock" in scenarios:
+            # Ingots are kept in a crate next to the anvil and pulled in as they run out.
+            ingot_box = world.new_item(CRATE_ID, name="ingot crate", x=START_X + 1, y=START_Y)
+            world.new_item(INGOT_ID, 5000, name="ingots", container=ingot_box)
+        else:
+            ingot_box = world.new_item(BAG_ID, name="ingot bag", container=pack)
+            world.new_item(INGOT_ID, 1500 if script_name == "Smith_Smelt" else 10, name="ingots", container=ingot_box)
+        answers["ingot"] = ingot_box.Serial
+        if script_name == "Smelter":
+            # More daggers than one hammer can smelt, some of them kept in a bag.
+            dagger_bag = world.new_item(BAG_ID, name="dagger bag", container=pack)
+            for _ in range(100):
+                world.new_item(SAMPLE_SMELT_ID, name="dagger", container=dagger_bag)
+            for _ in range(200):
+                world.new_item(SAMPLE_SMELT_ID, name="dagger", container=pack)
+            answers["smelt"] = pack.children[-1].Serial
+
+    if script_name == "Train_Carpenter":
+        board_crate = world.new_item(CRATE_ID, name="board crate", x=START_X - 1, y=START_Y)
+        world.new_item(BOARD_ID, 20000 if "restock" in scenarios else 5000, name="boards", container=board_crate)
+        pouch = world.new_item(POUCH_ID, name="tool pouch", container=pack)
+        for _ in range(10):
+            saw = world.new_item(CARPENTRY_TOOL_IDS[0], name="saw", container=pouch)
+            saw.uses = CRAFT_TOOL_USES
+        hatchet = world.new_item(0x0F43, name="hatchet", container=pack)
+        hatchet.uses = AXE_USES * 3
+        barrel = world.new_item(TRASH_BARREL_ID, name="trash barrel", x=START_X, y=START_Y + 1)
+        answers["board"] = board_crate.Serial
+        answers["pouch"] = pouch.Serial
+        answers["trash"] = barrel.Serial
+        answers["axe"] = hatchet.Serial
+
+    if script_name == "Cotton_Picking":
+        placed = 0
+        while placed < 30:
+            x = START_X + rng.randint(-14, 14)
+            y = START_Y + rng.randint(-14, 14)
+            if world.is_walkable(x, y) and (x, y) != (START_X, START_Y):
+                plant = world.new_item(rng.choice(COTTON_PLANT_IDS), name="cotton plant", x=x, y=y)
+                plant.uses = rng.randint(*COTTON_PER_PLANT)
+                placed += 1
+
+    if script_name == "Auto_tamer":
+        for _ in range(TAMEABLE_COUNT):
+            world.spawn_animal()
+
+    if script_name == "Corpse_Looter":
+        world.clock.schedule(1000, world.spawn_corpses if "corpse-waves" in scenarios else world.spawn_corpse)
+
+    if script_name == "Auto_Bandage":
+        world.new_item(BANDAGE_ID, 100, name="bandages", container=pack)
+        world.clock.schedule(2000, world.ambient_damage)
+
+
+def equip_item(world, item):
+    """Puts item in the player's right hand."""
+    world.detach(item)
+    item.parent = PLAYER_SERIAL
+    world.equipped["RightHand"] = item.Serial
+
+
+# --- Running Scripts ---
+
+def make_time_module(world):
+    """A stand-in for the time module that reads the virtual clock."""
+    epoch = real_time.time()
+    fake = types.ModuleType("time")
+    fake.time = lambda: epoch + world.clock.now / 1000.0
+    fake.monotonic = lambda: world.clock.now / 1000.0
+    fake.perf_counter = lambda: world.clock.now / 1000.0
+    fake.sleep = lambda seconds: world.clock.advance(seconds * 1000)
+    fake.localtime = lambda seconds=None: real_time.localtime(fake.time() if seconds is None else seconds)
+    fake.strftime = lambda fmt, t=None: real_time.strftime(fmt, t or fake.localtime())
+    return fake
+
+
+def make_system_modules():
+    """Stand-ins for the .NET modules IronPython scripts import."""
+    system = types.ModuleType("System")
+    system.Int32 = int
+    system.Byte = int
+    system.UInt32 = int
+    system.String = str
+    collections_module = types.ModuleType("System.Collections")
+    generic = types.ModuleType("System.Collections.Generic")
+    generic.List = GenericList
+    system.Collections = collections_module
+    collections_module.Generic = generic
+    return {"System": system, "System.Collections": collections_module, "System.Collections.Generic": generic}
+
+
+def make_namespace(world, script_dir):
+    """Builds the globals a Razor Enhanced script sees."""
+    fake_modules = make_system_modules()
+    fake_modules["time"] = make_time_module(world)
+    real_import = builtins.__import__
+
+    def script_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if name in fake_modules:
+            module = fake_modules[name]
+            if not fromlist and "." in name:
+                return fake_modules[name.split(".")[0]]
+            return module
+        helper_path = os.path.join(script_dir, name + ".py")
+        if level == 0 and os.path.isfile(helper_path):
+            # Helper modules next to the script (e.g. API_Profiler.py) also run on the
+            # virtual clock, so they are loaded here instead of by the normal import system.
+            module = types.ModuleType(name)
+            module.__file__ = helper_path
+            module.__builtins__ = script_builtins
+            fake_modules[name] = module
+            with open(helper_path, "r") as helper_file:
+                exec(compile(helper_file.read(), helper_path, "exec"), module.__dict__)
+            return module
+        return real_import(name, globals, locals, fromlist, level)
+
+    script_builtins = dict(builtins.__dict__)
+    script_builtins["__import__"] = script_import
+    namespace = {"__name__": "__main__", "__builtins__": script_builtins}
+    apis = {
+        "Misc": MiscAPI(world), "Items": ItemsAPI(world), "Mobiles": MobilesAPI(world),
+        "Player": PlayerAPI(world), "Statics": StaticsAPI(world), "Journal": JournalAPI(world),
+        "Target": TargetAPI(world), "Gumps": GumpsAPI(world), "Timer": TimerAPI(world),
+        "PathFinding": PathFindingAPI(world), "Spells": SpellsAPI(world),
+    }
+    for name, api in apis.items():
+        namespace[name] = CallCounter(world, name, api)
+    return namespace
+
+
+def run_script(script_path, hours=1.0, seed=1, skills=None, verbose=False, state_dir=None, scenarios=None):
+    """Runs a script against a fresh simulated world and returns (world, outcome, real_seconds)."""
+    with open(script_path, "r") as script_file:
+        source = script_file.read()
+    script_name = os.path.splitext(os.path.basename(script_path))[0]
+    clock = VirtualClock(int(hours * 3600 * 1000))
+    world = World(random.Random(seed), clock, read_script_tables(source), verbose)
+    build_forest(world)
+    stock_world(world, script_name, set(scenarios or ()))
+    for name, value in (skills or {}).items():
+        world.skills[name] = value
+
+    namespace = make_namespace(world, os.path.dirname(os.path.abspath(script_path)))
+    code = compile(source, os.path.abspath(script_path), "exec")
+    work_dir = state_dir or tempfile.mkdtemp(prefix="razor_sim_")
+    if not os.path.isdir(work_dir):
+        os.makedirs(work_dir)
+    old_cwd = os.getcwd()
+    started = real_time.time()
+    try:
+        os.chdir(work_dir)
+        exec(code, namespace)
+        outcome = "script finished on its own"
+    except SimulationFinished as finished:
+        outcome = str(finished)
+    except SystemExit:
+        outcome = "script called sys.exit()"
+    except NameError as error:
+        if "'Stop'" in str(error):
+            outcome = "script stopped itself (Stop)"
+        else:
+            raise
+    finally:
+        os.chdir(old_cwd)
+    return world, outcome, real_time.time() - started
+
+
+def report(world, outcome, real_seconds, script_path):
+    """Prints resources per hour and API call counts."""
+    hours = max(world.clock.now, 1) / 3600000.0
+    print("Script:         {}".format(script_path))
+    print("Outcome:        {}".format(outcome))
+    print("Simulated time: {:.2f} h ({:.1f} s of real time)".format(hours, real_seconds))
+    print("")
+    print("Resources and events per simulated hour:")
+    if not world.tally:
+        print("  (none)")
+    for name in sorted(world.tally):
+        total = world.tally[name]
+        print("  {:<32} {:>10.1f}/h   (total {:g})".format(name, total / hours, round(total, 1)))
+    print("")
+    print("API calls ({} total, {:.0f} per simulated hour):".format(world.total_calls, world.total_calls / hours))
+    for name, count in sorted(world.api_calls.items(), key=lambda entry: -entry[1]):
+        print("  {:<32} {:>10}".format(name, count))
+
+
+def parse_skills(values):
+    skills = {}
+    for value in values or []:
+        name, _, level = value.partition("=")
+        skills[name.strip()] = float(level)
+    return skills
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a Razor Enhanced script against a simulated world.")
+    parser.add_argument("script", help="path of the script to run, e.g. Lumberjacking_auto.py")
+    parser.add_argument("--hours", type=float, default=1.0, help="simulated hours to run (default 1)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the world (default 1)")
+    parser.add_argument("--skill", action="append", metavar="NAME=VALUE", help="set a starting skill")
+    parser.add_argument("--state-dir", help="folder for files the script saves (default: a new temp folder)")
+    parser.add_argument("--verbose", action="store_true", help="print script messages and journal lines")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="stock the world differently: " + "; ".join(
+                            "{}: {}".format(name, text) for name, text in sorted(SCENARIOS.items())))
+    args = parser.parse_args(argv)
+    world, outcome, real_seconds = run_script(
+        args.script, args.hours, args.seed, parse_skills(args.skill), args.verbose, args.state_dir,
+        args.scenario
+    )
+    report(world, outcome, real_seconds, args.script)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,202 @@
-# Razor Enhanced Auto-Smelting Script (v3)
-#
-# What it does:
-# 1. Prompts you to target your smithing tool (e.g., a smith's hammer or tongs).
-# 2. Prompts you to target an example of the item you want to smelt from your backpack.
-# 3. Automatically finds all items of that type in your backpack and smelts them one by one.
-#
-# How to use:
-# 1. Place this script in your Razor Enhanced 'Scripts' folder.
-# 2. Make sure you have your smithing tool and the items to be smelted in your backpack.
-# 3. Stand near a forge or anvil.
-# 4. Run the script from within Razor Enhanced.
-# 5. Follow the in-game target prompts.
-
-from System.Collections.Generic import List
-
-# --- Configuration ---
-# Adjust this delay (in milliseconds) to match your server's speed and prevent issues.
-# A value between 1000ms and 2000ms is usually safe.
-smelting_delay = 1500
-
-# --- Script Start ---
-
-Misc.SendMessage(">> Starting Auto-Smelting Script...", 68)
-
-# 1. Get the smithing tool
-Misc.SendMessage(">> Please target your smithing tool.", 68)
-smith_tool_serial = Target.PromptTarget()
-if smith_tool_serial == 0:
-    Misc.SendMessage(">> Canceled. No tool selected.", 33)
-    Stop
-smith_tool = Items.FindBySerial(smith_tool_serial)
-if smith_tool is None:
-    Misc.SendMessage(">> Canceled. Invalid tool selected.", 33)
-    Stop
-
-# 2. Get the item type to smelt
-Misc.SendMessage(">> Please target an item in your backpack to smelt.", 68)
-item_to_smelt_serial = Target.PromptTarget()
-if item_to_smelt_serial == 0:
-    Misc.SendMessage(">> Canceled. No item selected.", 33)
-    Stop
-
-item_to_smelt_example = Items.FindBySerial(item_to_smelt_serial)
-if item_to_smelt_example is None or item_to_smelt_example.RootContainer != Player.Backpack.Serial:
-    Misc.SendMessage(">> Canceled. You must target an item inside your backpack.", 33)
-    Stop
-
-# Store the ItemID (also known as Graphics ID) of the selected item
-item_id_to_smelt = item_to_smelt_example.ItemID
-item_name = item_to_smelt_example.Name or "item" # Use a generic name if none exists
-Misc.SendMessage(">> Preparing to smelt all '{}' items.".format(item_name), 68)
-Misc.Pause(500)
-
-# 3. Find all items of that type in the backpack first
-# This creates a list of all items we need to process.
-smelt_filter = Items.Filter()
-smelt_filter.Graphics.Add(item_id_to_smelt)
-# Apply the filter to all items Razor knows about
-all_matching_items = Items.ApplyFilter(smelt_filter)
-
-# Now, create a final list containing only items in the player's backpack
-items_to_smelt = []
-for item in all_matching_items:
-    # item.RootContainer gets the top-level container (e.g., your backpack)
-    if item.RootContainer == Player.Backpack.Serial:
-        items_to_smelt.append(item)
-
-if not items_to_smelt:
-    Misc.SendMessage(">> No '{}' items found in your backpack.".format(item_name), 33)
-    Stop
-
-Misc.SendMessage(">> Found {} '{}' items to smelt.".format(len(items_to_smelt), item_name), 68)
-Misc.Pause(1000)
-
-# 4. Main smelting loop
-# Use the smithing tool ONCE to open the gump
-Items.UseItem(smith_tool)
-
-# Wait for the initial gump to appear
-if not Gumps.WaitForGump(0, 3000):
-    Misc.SendMessage(">> Error: Smithing gump did not appear.", 33)
-    Stop
-
-for item in items_to_smelt:
-    # Before each attempt, ensure the main smithing gump is present.
-    # On many servers, the gump returns to the main menu after each craft/smelt.
-    if not Gumps.HasGump():
-        Misc.SendMessage(">> Smithing gump closed unexpectedly. Stopping script.", 33)
-        break
-
-    # Check if the item still exists (it might have been smelted already in a stack)
-    if Items.FindBySerial(item.Serial) is None:
-        continue
-
-    Misc.SendMessage(">> Attempting to smelt {}...".format(item_name), 78)
-
-    # Press the "Smelt Item" button. This is button #27 on many servers.
-    Gumps.SendAction(Gumps.CurrentGump(), 27)
-
-    # After clicking the smelt button, a target cursor appears
-    if Target.WaitForTarget(2000):
-        Target.TargetExecute(item.Serial)
-    else:
-        Misc.SendMessage(">> Error: Timed out waiting for item target.", 33)
-        break
-
-    # Wait for the action to complete before starting the next item
-    Misc.Pause(smelting_delay)
-
-Misc.SendMessage(">> Auto-smelting script finished.", 68)
-# --- Script End ---
+# Razor Enhanced Auto-Smelting Script (v3)
+#
+# What it does:
+# 1. Prompts you to target your smithing tool (e.g., a smith's hammer or tongs).
+# 2. Prompts you to target an example of the item you want to smelt from your backpack.
+# 3. Automatically finds all items of that type in your backpack (and bags inside it) and
+#    smelts them one by one, as fast as the server allows.
+# 4. Reopens the smithing gump if it closes, switching to another tool of the same kind
+#    if the first one breaks.
+#
+# How to use:
+# 1. Place this script in your Razor Enhanced 'Scripts' folder.
+#    Action_Pacing.py, Journal_Matching.py and Razor_API.py go in the same folder.
+# 2. Make sure you have your smithing tool and the items to be smelted in your backpack.
+# 3. Stand near a forge or anvil.
+# 4. Run the script from within Razor Enhanced.
+# 5. Follow the in-game target prompts.
+
+from System.Collections.Generic import List
+
+# The helper modules below get the Razor Enhanced objects from this script.
+import Razor_API
+Razor_API.install(globals())
+from Action_Pacing import paced_wait
+from Journal_Matching import compile_journal_outcomes, sync_journal_cursor, poll_journal
+
+# --- Configuration ---
+# Adjust this delay (in milliseconds) to match your server's speed and prevent issues.
+# A value between 1000ms and 2000ms is usually safe.
+smelting_delay = 1500
+
+# The "Smelt Item" button on the smithing gump. This is button #27 on many servers.
+SMELT_BUTTON_ID = 27
+
+# Also smelt matching items kept in bags inside your backpack.
+SEARCH_SUBCONTAINERS = True
+
+# How long (in milliseconds) to wait for a bag's contents to load.
+CONTENTS_TIMEOUT = 1000
+
+# How long (in milliseconds) to wait for the smithing gump to open, and how many times to
+# try opening it again when it has closed before giving up.
+GUMP_TIMEOUT = 3000
+GUMP_REOPEN_ATTEMPTS = 3
+
+# How many times to try smelting one item before skipping it.
+SMELT_ATTEMPTS = 3
+
+# Journal lines that end a smelt attempt without the item going away, grouped by result.
+SMELT_OUTCOMES = {
+    "failed": ["You can't melt that down", "You cannot melt that down", "The item must be in your backpack"],
+    "must_wait": ["You must wait"],
+}
+
+# Delays are learned while the script runs: after each action the script waits only until
+# its result shows up, and never more than twice the delay configured above. How the delays
+# are learned is set in Action_Pacing.py.
+
+# --- Helper Functions ---
+
+def find_items_to_smelt(item_id):
+    """Returns every item with this ItemID in the backpack, looking inside bags if enabled."""
+    found = []
+    pending = [Player.Backpack]
+    while pending:
+        container = pending.pop()
+        if not container.Contains:
+            Items.WaitForContents(container, CONTENTS_TIMEOUT)
+        for item in container.Contains:
+            if item.ItemID == item_id:
+                found.append(item)
+            elif SEARCH_SUBCONTAINERS and item.IsContainer:
+                pending.append(item)
+    return found
+
+def open_smithing_gump():
+    """Makes sure the smithing gump is open. Returns False if it could not be opened."""
+    global smith_tool_serial
+    for attempt in range(GUMP_REOPEN_ATTEMPTS):
+        if Gumps.HasGump():
+            return True
+        tool = Items.FindBySerial(smith_tool_serial)
+        if tool is None:
+            # The tool wore out. Carry on with another one of the same kind.
+            tool = Items.FindByID(smith_tool_id, -1, Player.Backpack.Serial, True)
+            if tool is None:
+                Misc.SendMessage(">> No smithing tools left.", 33)
+                return False
+            smith_tool_serial = tool.Serial
+            Misc.SendMessage(">> Smithing tool broke. Switching to another one.", 138)
+        Items.UseItem(tool)
+        if Gumps.WaitForGump(0, GUMP_TIMEOUT):
+            return True
+    return False
+
+def smelt_result(serial):
+    """Returns "smelted" once the item is gone and the gump is back, a journal result if the
+    server refused, otherwise None."""
+    result = poll_journal(smelt_matcher)
+    if result is None and Items.FindBySerial(serial) is None and Gumps.HasGump():
+        result = "smelted"
+    return result
+
+# --- Script Start ---
+
+Misc.SendMessage(">> Starting Auto-Smelting Script...", 68)
+
+# 1. Get the smithing tool
+Misc.SendMessage(">> Please target your smithing tool.", 68)
+smith_tool_serial = Target.PromptTarget()
+if smith_tool_serial == 0:
+    Misc.SendMessage(">> Canceled. No tool selected.", 33)
+    Stop
+smith_tool = Items.FindBySerial(smith_tool_serial)
+if smith_tool is None:
+    Misc.SendMessage(">> Canceled. Invalid tool selected.", 33)
+    Stop
+# Remember what kind of tool it is, so a broken one can be replaced
+smith_tool_id = smith_tool.ItemID
+
+# 2. Get the item type to smelt
+Misc.SendMessage(">> Please target an item in your backpack to smelt.", 68)
+item_to_smelt_serial = Target.PromptTarget()
+if item_to_smelt_serial == 0:
+    Misc.SendMessage(">> Canceled. No item selected.", 33)
+    Stop
+
+item_to_smelt_example = Items.FindBySerial(item_to_smelt_serial)
+if item_to_smelt_example is None or item_to_smelt_example.RootContainer != Player.Backpack.Serial:
+    Misc.SendMessage(">> Canceled. You must target an item inside your backpack.", 33)
+    Stop
+
+# Store the ItemID (also known as Graphics ID) of the selected item
+item_id_to_smelt = item_to_smelt_example.ItemID
+item_name = item_to_smelt_example.Name or "item" # Use a generic name if none exists
+Misc.SendMessage(">> Preparing to smelt all '{}' items.".format(item_name), 68)
+Misc.Pause(500)
+
+# 3. Find all items of that type in the backpack first
+# This creates a list of all items we need to process.
+items_to_smelt = find_items_to_smelt(item_id_to_smelt)
+
+if not items_to_smelt:
+    Misc.SendMessage(">> No '{}' items found in your backpack.".format(item_name), 33)
+    Stop
+
+Misc.SendMessage(">> Found {} '{}' items to smelt.".format(len(items_to_smelt), item_name), 68)
+Misc.Pause(1000)
+
+# 4. Main smelting loop
+smelt_matcher = compile_journal_outcomes(SMELT_OUTCOMES)
+smelted_count = 0
+skipped_count = 0
+gump_lost = False
+
+for item in items_to_smelt:
+    for attempt in range(SMELT_ATTEMPTS):
+        # Check if the item still exists (it might have been smelted already in a stack)
+        if Items.FindBySerial(item.Serial) is None:
+            if attempt > 0:
+                # Smelted, but the gump did not come back in time (the tool probably broke)
+                smelted_count += 1
+            break
+
+        # Before each attempt, ensure the main smithing gump is present. On many servers the
+        # gump returns to the main menu after each smelt, but it closes when the tool breaks.
+        if not open_smithing_gump():
+            gump_lost = True
+            break
+
+        Misc.SendMessage(">> Attempting to smelt {}...".format(item_name), 78)
+
+        # Press the "Smelt Item" button
+        sync_journal_cursor()
+        Gumps.SendAction(Gumps.CurrentGump(), SMELT_BUTTON_ID)
+
+        # After clicking the smelt button, a target cursor appears
+        if not Target.WaitForTarget(2000):
+            Misc.SendMessage(">> Timed out waiting for item target. Trying again.", 138)
+            continue
+        Target.TargetExecute(item.Serial)
+
+        # Wait for the item to disappear and the gump to come back before starting the next one
+        result = paced_wait("smelt", smelting_delay, lambda: smelt_result(item.Serial))
+        if result == "smelted":
+            smelted_count += 1
+            break
+        if result == "failed":
+            Misc.SendMessage(">> This item cannot be smelted. Skipping it.", 138)
+            skipped_count += 1
+            break
+        # The server asked us to wait, or did not answer in time: try this item again
+    else:
+        skipped_count += 1
+
+    if gump_lost:
+        Misc.SendMessage(">> Could not reopen the smithing gump. Stopping script.", 33)
+        break
+
+Misc.SendMessage(">> Smelted {} items, skipped {}.".format(smelted_count, skipped_count), 68)
+Misc.SendMessage(">> Auto-smelting script finished.", 68)
+# --- Script End ---
@@ -3,26 +3,49 @@
 # What it does:
 # 1. Automatically determines which item to craft based on your real blacksmithing skill.
 # 2. Automatically finds a new smithing hammer from your backpack if the current one breaks.
-# 3. Crafts that item repeatedly until you run out of ingots or your skill is high enough for the next item.
-# 4. Before switching to a new item, it closes any open gumps, then smelts ALL previously crafted items.
+# 3. Crafts that item repeatedly until your skill is high enough for the next item.
+# 4. Before switching to a new item, it smelts ALL previously crafted items, reusing the open smithing gump.
+#    It also smelts them when you get too heavy, and before pulling more ingots from your ingot container.
 # 5. Continues this cycle until you stop the script or run out of materials/tools.
 #
 # How to use:
 # 1. IMPORTANT: Carefully fill out the 'training_plan' dictionary and other configuration variables below.
 #    You MUST use Razor's Gump Inspector tool to find the correct gump button IDs for your server.
 # 2. Place this script in your Razor Enhanced 'Scripts' folder.
+#    Action_Pacing.py, Craft_Training.py, Journal_Matching.py and Razor_API.py go in the
+#    same folder.
 # 3. Stand near a forge or anvil.
 # 4. Have your smithing tool(s) in your backpack and a container with ingots nearby.
 # 5. Run the script. It will only ask for your initial tool and ingot container once.
 
+from collections import deque
 from System.Collections.Generic import List
 
+# The helper modules below get the Razor Enhanced objects from this script.
+import Razor_API
+Razor_API.install(globals())
+from Action_Pacing import paced_wait
+from Journal_Matching import compile_journal_outcomes, sync_journal_cursor, poll_journal
+from Craft_Training import SkillPlanner, open_craft_session, send_craft, unit_weights, measure_unit_weight
+
 # --- Configuration ---
 
 # The ItemID for the smithing tool you are using.
 # 0x13E3 is a standard Smith's Hammer. 0x0FB4 is for Tongs.
 SMITH_TOOL_ID = 0x13E3
 
+# The ItemID of the ingots to craft with.
+INGOT_ID = 0x1BF2
+
+# When you run out of ingots, more are pulled from the ingot container in a single move:
+# enough for as many crafts as you can carry while keeping this much weight free.
+WEIGHT_BUFFER = 50
+
+# Weights (in stones) to assume until the script has measured them from your weight: one
+# ingot, and one crafted item (crafted items stay in your backpack until they are smelted).
+INGOT_WEIGHT_GUESS = 1.0
+CRAFTED_WEIGHT_GUESS = 15.0
+
 # The Gump Button ID for the "Smelt Item" action in the smithing gump.
 SMELT_BUTTON_ID = 27
 
@@ -30,100 +53,129 @@ SMELT_BUTTON_ID = 27
 # You MUST fill this out with the correct values for your server.
 training_plan = {
     "Mace": {
+        "craft_min": 14.5, "craft_max": 64.5,
         "min_skill": 40.0, "max_skill": 45.0, "ingots": 6, "graphic": 0x0F5C,
         "category_gump": 8, "item_gump": 22
     },
     "Maul": {
+        "craft_min": 19.4, "craft_max": 69.4,
         "min_skill": 45.0, "max_skill": 50.0, "ingots": 8, "graphic": 0x143B,
         "category_gump": 8, "item_gump": 29
     },
     "Cutlass": {
+        "craft_min": 24.3, "craft_max": 74.3,
         "min_skill": 50.0, "max_skill": 55.0, "ingots": 10, "graphic": 0x1441,
         "category_gump": 9, "item_gump": 30
     },
     "Longsword": {
+        "craft_min": 28.0, "craft_max": 78.0,
         "min_skill": 55.0, "max_skill": 59.5, "ingots": 12, "graphic": 0x0F61,
         "category_gump": 9, "item_gump": 28
     },
     "Scimitar": {
+        "craft_min": 31.7, "craft_max": 81.7,
         "min_skill": 59.5, "max_skill": 70.5, "ingots": 13, "graphic": 0x13B6,
         "category_gump": 61, "item_gump": 162
     },
     "Platemail Gorget": {
+        "craft_min": 56.4, "craft_max": 106.4,
         "min_skill": 70.5, "max_skill": 106.4, "ingots": 10, "graphic": 0x1413,
         "category_gump": 1, "item_gump": 182
     },
     "Platemail Gloves": {
+        "craft_min": 58.9, "craft_max": 108.9,
         "min_skill": 106.4, "max_skill": 108.9, "ingots": 12, "graphic": 0x1414,
         "category_gump": 12, "item_gump": 50
     },
     "Platemail Arms": {
+        "craft_min": 66.3, "craft_max": 116.3,
         "min_skill": 108.9, "max_skill": 116.3, "ingots": 18, "graphic": 0x1410,
         "category_gump": 12, "item_gump": 49
     },
     "Platemail Legs": {
+        "craft_min": 68.8, "craft_max": 118.8,
         "min_skill": 116.3, "max_skill": 118.8, "ingots": 20, "graphic": 0x1411,
         "category_gump": 12, "item_gump": 52
     },
     "Platemail Tunic": {
+        "craft_min": 75.0, "craft_max": 125.0,
         "min_skill": 118.8, "max_skill": 120.0, "ingots": 25, "graphic": 0x1415,
         "category_gump": 12, "item_gump": 53
     }
 }
 
+# Let the script pick the item that trains fastest at your current skill, instead of using
+# the min_skill/max_skill bands of the training plan. It works out each item's success and
+# gain chances from its craft_min/craft_max range (the server's own skill range for the item:
+# no chance at craft_min, always succeeds at craft_max) using the standard RunUO/ServUO rules.
+USE_SKILL_PLANNER = True
+# What the planner makes the most of: "time" for skill per hour, "materials" for skill per ingot.
+PLAN_OBJECTIVE = "time"
+# Rough seconds per craft attempt. An item can override it with a "seconds" entry.
+PLAN_CRAFT_SECONDS = 3.0
+# How much of your total skill cap is still unused, from 0.0 to 1.0. Gains slow down as it fills.
+PLAN_TOTAL_SKILL_ROOM = 0.5
+# Extra gain chance on a failed craft: 0.0 on AOS and later shards, 0.2 on older ones.
+PLAN_FAILURE_GAIN_BONUS = 0.0
 # Delays (in milliseconds)
 CRAFT_TIMEOUT = 8000
 SMELT_DELAY = 2000 # Pause after each smelt action.
+CONTENTS_TIMEOUT = 1000 # How long to wait for a bag's contents to load.
 
-# --- Helper Functions ---
+# How many times to try smelting one crafted item before leaving it in your backpack.
+SMELT_ATTEMPTS = 3
 
-def wait_for_journal_message(messages, timeout_ms):
-    timer_name = "journal_wait_timer"
-    Timer.Create(timer_name, timeout_ms)
-    while not Timer.Check(timer_name):
-        for msg in messages:
-            if Journal.Search(msg):
-                return True
-        Misc.Pause(100)
-    return False
+# Delays are learned while the script runs: after each action the script waits only until
+# its result shows up, and never more than twice the delay configured above. How the delays
+# are learned is set in Action_Pacing.py.
+
+# Journal lines that end a craft attempt, grouped by result.
+CRAFT_OUTCOMES = {
+    "success": ["You have made progress", "you have made progress", "You create"],
+    "failed": ["You fail to create", "You failed to create"],
+    "no_materials": ["You do not have sufficient"],
+    "must_wait": ["You must wait"],
+}
+
+# --- Helper Functions ---
 
 def get_ingot_count(container_serial):
-    ingot_id = 0x1BF2
-    return Items.ContainerCount(container_serial, ingot_id, -1, True)
-
-def get_item_to_craft():
-    current_skill = Player.GetRealSkillValue("Blacksmith")
-    for item_name, details in training_plan.items():
-        if current_skill >= details["min_skill"] and current_skill < details["max_skill"]:
-            Misc.SendMessage(">> Skill is {:.1f}. Next item: {}".format(current_skill, item_name), 68)
-            return item_name, details
-    return None, None
+    return Items.ContainerCount(container_serial, INGOT_ID, -1, True)
     
-def find_any_crafted_item():
-    """Finds a single instance of any item from the training plan in the backpack."""
-    for details in training_plan.values():
-        item = Items.FindByID(details["graphic"], -1, Player.Backpack.Serial, True)
-        if item is not None:
-            return item
-    return None
+def find_crafted_items():
+    """Walks the backpack (and the bags inside it) once and returns every training plan item found."""
+    found = deque()
+    pending = [Player.Backpack]
+    while pending:
+        container = pending.pop()
+        if not container.Contains:
+            Items.WaitForContents(container, CONTENTS_TIMEOUT)
+        for item in container.Contains:
+            if item.ItemID in crafted_graphics:
+                found.append(item)
+            elif item.IsContainer:
+                pending.append(item)
+    return found
 
 def smelt_all_crafted_items(tool_serial):
-    """Smelts all crafted items, one by one, in a robust loop."""
+    """Smelts all crafted items, one by one, from a single search of the backpack."""
+    global smelt_pending
     Misc.SendMessage(">> Starting batch smelting process...", 68)
+    # Measure how much the crafted items weigh while they are smelted.
+    weight_before = Player.Weight
+    ingots_before = get_ingot_count(Player.Backpack.Serial)
+    smelted = {}
+    attempts = {}
+    smelt_queue = find_crafted_items()
+    smelt_pending = False
     
-    while True:
-        # Close any leftover gumps before every single attempt.
-        if Gumps.HasGump():
-            Gumps.CloseGump(Gumps.CurrentGump())
-            Misc.Pause(1000)
-            
-        # Find the next item to smelt
-        item_to_smelt = find_any_crafted_item()
-        
-        # If no items are left, we're done.
-        if item_to_smelt is None:
-            Misc.SendMessage(">> No more crafted items found to smelt.", 78)
-            break
+    while smelt_queue:
+        item_to_smelt = smelt_queue.popleft()
+        # Skip items that are gone since the search (smelted, moved away or destroyed).
+        current = Items.FindBySerial(item_to_smelt.Serial)
+        if current is None or current.RootContainer != Player.Backpack.Serial:
+            continue
+        attempts[item_to_smelt.Serial] = attempts.get(item_to_smelt.Serial, 0) + 1
             
         # Check for a valid smithing tool before every smelt attempt
         if Items.FindBySerial(tool_serial) is None:
@@ -137,25 +189,97 @@ def smelt_all_crafted_items(tool_serial):
                 Misc.SendMessage(">> Out of smithing tools! Cannot continue smelting.", 33)
                 return tool_serial
         
-        # Use the tool to open the gump
-        Items.UseItem(tool_serial)
-        if Gumps.WaitForGump(0, 2000):
-            Gumps.SendAction(Gumps.CurrentGump(), SMELT_BUTTON_ID)
-        else:
+        # Reuse the open smithing gump, or open it with the tool
+        session = open_craft_session(tool_serial)
+        if session is None:
             Misc.SendMessage(">> Error: Smelting gump failed to open.", 33)
-            continue
-            
-        # Target the item to smelt
-        if Target.WaitForTarget(2000):
-            Target.TargetExecute(item_to_smelt.Serial)
-            Misc.Pause(SMELT_DELAY)
         else:
-            Misc.SendMessage(">> Error: Timed out waiting for smelt target.", 33)
-            Misc.Pause(SMELT_DELAY)
+            Gumps.SendAction(session["gump_id"], SMELT_BUTTON_ID)
+            # The gump comes back on its main page after a smelt.
+            session["category"] = None
+                
+            # Target the item to smelt
+            if Target.WaitForTarget(2000):
+                Target.TargetExecute(item_to_smelt.Serial)
+                if paced_wait("smelt", SMELT_DELAY, lambda: True if Items.FindBySerial(item_to_smelt.Serial) is None else None) is True:
+                    smelted[item_to_smelt.ItemID] = smelted.get(item_to_smelt.ItemID, 0) + 1
+                    continue
+            else:
+                Misc.SendMessage(">> Error: Timed out waiting for smelt target.", 33)
+                Misc.Pause(SMELT_DELAY)
+
+        # Not smelted this time. Try it again after the others.
+        if attempts[item_to_smelt.Serial] < SMELT_ATTEMPTS:
+            smelt_queue.append(item_to_smelt)
+        else:
+            Misc.SendMessage(">> Could not smelt {}. Leaving it.".format(item_to_smelt.Name or "an item"), 138)
             
+    Misc.SendMessage(">> No more crafted items found to smelt.", 78)
+    # Player.Weight can lag behind the smelts. Only measure once it has changed.
+    if len(smelted) == 1 and Player.Weight != weight_before:
+        # You got lighter by the items smelted, less the ingots they gave back.
+        item_id, count = list(smelted.items())[0]
+        ingots_returned = get_ingot_count(Player.Backpack.Serial) - ingots_before
+        measure_unit_weight(item_id, count, weight_before - Player.Weight +
+                            ingots_returned * unit_weights.get(INGOT_ID, INGOT_WEIGHT_GUESS))
     Misc.SendMessage(">> Batch smelting complete.", 68)
     return tool_serial
 
+def restock_ingots(container_serial, details, top_up=False):
+    """Pulls ingots from the ingot container in a single move. Returns False if none could be pulled."""
+    container = Items.FindBySerial(container_serial)
+    if container is None or container_serial == Player.Backpack.Serial or container.RootContainer == Player.Backpack.Serial:
+        # Ingots kept in your backpack are already there to craft with.
+        return False
+    if not top_up:
+        Misc.SendMessage(">> Restocking ingots...", 68)
+        Items.UseItem(container_serial)
+        Items.WaitForContents(container, CONTENTS_TIMEOUT)
+    ingots_in_container = Items.FindByID(INGOT_ID, -1, container_serial, True)
+    if ingots_in_container is None:
+        Misc.SendMessage(">> Ingot container is empty!", 33)
+        return False
+
+    ingots_before = get_ingot_count(Player.Backpack.Serial)
+    guessed = INGOT_ID not in unit_weights
+    ingots_to_move = plan_restock(ingots_before, details, ingots_in_container.Amount)
+    if ingots_to_move <= 0:
+        if not top_up:
+            Misc.SendMessage(">> Cannot carry enough ingots for another craft.", 138)
+        return False
+
+    Misc.SendMessage(">> Attempting to move {} ingots...".format(ingots_to_move), 78)
+    weight_before = Player.Weight
+    Items.Move(ingots_in_container.Serial, Player.Backpack.Serial, ingots_to_move)
+    # Wait for the ingots to arrive so the weight is up to date.
+    paced_wait("restock", 1500, lambda: True if get_ingot_count(Player.Backpack.Serial) > ingots_before else None)
+    measure_unit_weight(INGOT_ID, get_ingot_count(Player.Backpack.Serial) - ingots_before, Player.Weight - weight_before)
+    if guessed and INGOT_ID in unit_weights:
+        # The first move was planned with the guessed weight. Top up now that it is known.
+        restock_ingots(container_serial, details, True)
+    return get_ingot_count(Player.Backpack.Serial) > ingots_before
+
+# --- Restock Planner ---
+
+# unit_weights holds the weights measured so far (see Craft_Training.py).
+def plan_restock(carried, details, in_stock):
+    """Returns how many ingots to pull for as many whole crafts as you can carry without going past WEIGHT_BUFFER."""
+    free_weight = Player.MaxWeight - Player.Weight - WEIGHT_BUFFER
+    if free_weight <= 0:
+        return 0
+    ingot_weight = unit_weights.get(INGOT_ID, INGOT_WEIGHT_GUESS)
+    crafted_weight = unit_weights.get(details["graphic"], CRAFTED_WEIGHT_GUESS)
+    # Each craft turns its ingots into an item that stays in the backpack, so a craft needs
+    # room for whichever of the two is heavier.
+    crafts = int(free_weight / max(details["ingots"] * ingot_weight, crafted_weight))
+    crafts = min(crafts, (carried + in_stock) // details["ingots"])
+    return max(crafts * details["ingots"] - carried, 0)
+
+# --- Skill Planner ---
+
+skill_planner = SkillPlanner("Blacksmith", training_plan, "ingots", USE_SKILL_PLANNER, PLAN_OBJECTIVE,
+                             PLAN_CRAFT_SECONDS, PLAN_TOTAL_SKILL_ROOM, PLAN_FAILURE_GAIN_BONUS)
+
 # --- Main Logic ---
 
 Misc.SendMessage(">> Starting Advanced Blacksmith Training Script...", 68)
@@ -169,7 +293,12 @@ ingot_container_serial = Target.PromptTarget()
 if ingot_container_serial == 0: Stop
 
 # Main Training Loop
-current_item_name, craft_details = get_item_to_craft()
+craft_matcher = compile_journal_outcomes(CRAFT_OUTCOMES)
+# Every item the training plan can make, for finding them again to smelt.
+crafted_graphics = set(details["graphic"] for details in training_plan.values())
+# True while crafted items may be waiting in the backpack, so it is only searched when it can pay off.
+smelt_pending = True
+current_item_name, craft_details = skill_planner.get_item_to_craft()
 if not current_item_name:
     Misc.SendMessage(">> Your skill is outside the defined training plan. Stopping.", 33)
     Stop
@@ -187,7 +316,7 @@ while True:
             Misc.SendMessage(">> Out of smithing tools! Stopping script.", 33)
             break
 
-    new_item_name, new_craft_details = get_item_to_craft()
+    new_item_name, new_craft_details = skill_planner.get_item_to_craft()
     if not new_item_name:
         Misc.SendMessage(">> You have completed the training plan!", 68)
         smith_tool_serial = smelt_all_crafted_items(smith_tool_serial)
@@ -200,34 +329,34 @@ while True:
         craft_details = new_craft_details
         Misc.Pause(2000)
         
-    if get_ingot_count(ingot_container_serial) < craft_details["ingots"]:
-        Misc.SendMessage(">> Out of ingots! Smelting remaining items.", 33)
+    # Smelting the crafted items makes room and gives back some ingots.
+    if Player.Weight >= Player.MaxWeight - WEIGHT_BUFFER and smelt_pending:
+        Misc.SendMessage(">> Getting heavy. Smelting crafted items.", 78)
         smith_tool_serial = smelt_all_crafted_items(smith_tool_serial)
-        break
+
+    if get_ingot_count(Player.Backpack.Serial) < craft_details["ingots"]:
+        smith_tool_serial = smelt_all_crafted_items(smith_tool_serial)
+        if (not restock_ingots(ingot_container_serial, craft_details) and
+                get_ingot_count(Player.Backpack.Serial) < craft_details["ingots"]):
+            Misc.SendMessage(">> Out of ingots! Stopping script.", 33)
+            break
+        continue
         
     # Crafting Process
-    Journal.Clear()
-    Items.UseItem(smith_tool_serial)
-    if not Gumps.WaitForGump(0, 2000):
+    sync_journal_cursor()
+    if not send_craft(smith_tool_serial, craft_details):
         Misc.SendMessage(">> Error: Smithing gump did not appear. Stopping.", 33)
         break
-    current_gump_id = Gumps.CurrentGump()
-    Gumps.SendAction(current_gump_id, craft_details["category_gump"])
-    Misc.Pause(750)
-    if Gumps.HasGump():
-        current_gump_id = Gumps.CurrentGump()
-    else:
-        Misc.SendMessage(">> Error: Gump closed after category selection. Stopping.", 33)
-        break
-    Gumps.SendAction(current_gump_id, craft_details["item_gump"])
     
-    craft_success_messages = ["You have made progress", "you have made progress"]
-    if wait_for_journal_message(craft_success_messages, CRAFT_TIMEOUT):
+    # Returns as soon as the journal shows how the craft went.
+    craft_result = paced_wait("craft", CRAFT_TIMEOUT, lambda: poll_journal(craft_matcher))
+    if craft_result == "success":
         Misc.SendMessage(">> Craft successful.", 78)
-        Misc.Pause(1000)
-    else:
+        smelt_pending = True
+    elif craft_result is None:
         Misc.SendMessage(">> Craft failed (no journal message). Continuing...", 138)
-        Misc.Pause(1000)
+    else:
+        Misc.SendMessage(">> Craft failed ({}). Continuing...".format(craft_result.replace("_", " ")), 138)
 
 Misc.SendMessage(">> Blacksmith training script finished.", 68)
 # --- Script End ---
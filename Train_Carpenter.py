@@ -4,13 +4,15 @@
 # 1. Restocks boards from a specified crate when you run low.
 # 2. Finds and uses saws from a specified tool pouch.
 # 3. Automatically selects the correct item to craft based on your Carpentry skill.
-# 4. After crafting, it intelligently disposes of the item by either destroying it with an axe or moving it to a trash barrel.
+# 4. Crafts a batch of items back to back, then disposes of the whole batch in one pass by either destroying it with an axe or moving it to a trash barrel.
 # 5. Automatically finds a new saw or axe if one breaks.
 # 6. Runs continuously until you run out of materials or tools.
 #
 # How to use:
 # 1. IMPORTANT: Fill out the 'training_plan' dictionary below with the correct gump button IDs for your server.
 # 2. Place this script in your Razor Enhanced 'Scripts' folder.
+#    Action_Pacing.py, Craft_Training.py, Journal_Matching.py and Razor_API.py go in the
+#    same folder.
 # 3. Have a crate with boards, a pouch with saws, an axe, and a trash barrel nearby.
 # 4. Run the script and follow the prompts to target your items.
 # 5. To stop, you must manually stop it from the Razor Enhanced scripts tab.
@@ -18,6 +20,13 @@
 import sys
 import math
 
+# The helper modules below get the Razor Enhanced objects from this script.
+import Razor_API
+Razor_API.install(globals())
+from Action_Pacing import paced_wait
+from Journal_Matching import compile_journal_outcomes, sync_journal_cursor, poll_journal
+from Craft_Training import SkillPlanner, send_craft, unit_weights, measure_unit_weight
+
 # --- Configuration ---
 
 # The ItemID for the tools and materials we will use.
@@ -31,55 +40,113 @@ BOARD_RESTOCK_THRESHOLD = 30
 # The weight to leave free when restocking to ensure you can walk.
 WEIGHT_BUFFER = 50
 
+# The weight of one board (in stones) to assume until it has been measured. The script
+# learns the real weight from how much heavier each restock makes you, and then pulls
+# as many boards as you can carry in a single move.
+BOARD_WEIGHT_GUESS = 1.0
+
 # Delay in milliseconds after each craft/destroy attempt.
 ACTION_DELAY = 3000
 
+# How many items to craft back to back before disposing of them. The batch is cut short
+# when you run out of boards or get within WEIGHT_BUFFER of your maximum weight.
+# Set to 1 to dispose of every item right after it is made.
+CRAFT_BATCH_SIZE = 10
+
+# The whole batch is disposed of in one pass, without waiting on each item. Items the server
+# refused are tried again, up to this many passes in total.
+DISPOSE_PASSES = 3
+
+# Delay in milliseconds between two items moved to the trash barrel. It shrinks while the
+# server accepts the moves and grows again when it asks you to wait.
+TRASH_MOVE_DELAY = 600
+
+# How long (in milliseconds) to wait for the contents of a bag to arrive when looking inside it.
+CONTENTS_TIMEOUT = 1000
+
+# Delays are learned while the script runs: after each action the script waits only until
+# its result shows up, and never more than twice the delay configured above. How the delays
+# are learned is set in Action_Pacing.py.
+
+# Journal lines that end a craft, grouped by result.
+CRAFT_OUTCOMES = {
+    "success": ["You have made progress", "you have made progress", "You create"],
+    "failed": ["You fail to create", "You failed to create"],
+    "no_materials": ["You do not have sufficient"],
+    "must_wait": ["You must wait"],
+}
+
 # This dictionary defines your entire training path.
 # You MUST fill this out with the correct gump button IDs for your server.
 # Use Razor's Gump Inspector tool to find these numbers.
 training_plan = {
     "Medium Crate": {
+        "craft_min": 31.0, "craft_max": 56.0,
         "min_skill": 30.0, "max_skill": 48.0, "boards": 20, "graphic": 0x0E3F,
         "category_gump": 41, "item_gump": 42, "disposal_method": "destroy"
     },
     "Large Crate": {
+        "craft_min": 47.3, "craft_max": 72.3,
         "min_skill": 48.0, "max_skill": 53.0, "boards": 30, "graphic": 0x0E3D,
         "category_gump": 41, "item_gump": 62, "disposal_method": "destroy"
     },
     "Wooden Shield": {
+        "craft_min": 52.6, "craft_max": 77.6,
         "min_skill": 53.0, "max_skill": 60.0, "boards": 15, "graphic": 0x1B7A,
         "category_gump": 81, "item_gump": 2, "disposal_method": "trash"
     },
     "Fukiya": {
+        "craft_min": 60.0, "craft_max": 85.0,
         "min_skill": 60.0, "max_skill": 74.0, "boards": 10, "graphic": 0x27F5,
         "category_gump": 61, "item_gump": 82, "disposal_method": "trash"
     },
     "Quarter Staff": {
+        "craft_min": 73.6, "craft_max": 98.6,
         "min_skill": 74.0, "max_skill": 79.0, "boards": 6, "graphic": 0x0E89,
         "category_gump": 61, "item_gump": 22, "disposal_method": "trash"
     },
     "Gnarled Staff": {
+        "craft_min": 78.9, "craft_max": 103.9,
         "min_skill": 79.0, "max_skill": 82.0, "boards": 7, "graphic": 0x13F8,
         "category_gump": 61, "item_gump": 42, "disposal_method": "trash"
     },
     "Black Staff": {
+        "craft_min": 81.5, "craft_max": 106.5,
         "min_skill": 82.0, "max_skill": 96.0, "boards": 8, "graphic": 0x0DF0,
         "category_gump": 61, "item_gump": 302, "disposal_method": "trash"
     },
     "Wild Staff": {
+        "craft_min": 63.8, "craft_max": 113.8,
         "min_skill": 96.0, "max_skill": 100.0, "boards": 10, "graphic": 0x27A8,
         "category_gump": 61, "item_gump": 122, "disposal_method": "trash"
     }
 }
 
+# Let the script pick the item that trains fastest at your current skill, instead of using
+# the min_skill/max_skill bands of the training plan. It works out each item's success and
+# gain chances from its craft_min/craft_max range (the server's own skill range for the item:
+# no chance at craft_min, always succeeds at craft_max) using the standard RunUO/ServUO rules.
+USE_SKILL_PLANNER = True
+# What the planner makes the most of: "time" for skill per hour, "materials" for skill per board.
+PLAN_OBJECTIVE = "time"
+# Rough seconds per craft attempt. An item can override it with a "seconds" entry.
+PLAN_CRAFT_SECONDS = 3.0
+# How much of your total skill cap is still unused, from 0.0 to 1.0. Gains slow down as it fills.
+PLAN_TOTAL_SKILL_ROOM = 0.5
+# Extra gain chance on a failed craft: 0.0 on AOS and later shards, 0.2 on older ones.
+PLAN_FAILURE_GAIN_BONUS = 0.0
 # --- Helper Functions ---
 
 def get_board_count():
     """Counts the number of boards in the player's backpack."""
     return Items.ContainerCount(Player.Backpack.Serial, BOARD_ID, -1, True)
 
-def restock_boards(crate_serial):
-    """Restocks boards from the supply crate using a single, calculated move."""
+def restock_boards(crate_serial, details):
+    """Restocks boards from the supply crate in one calculated move.
+
+    The first restock is planned with BOARD_WEIGHT_GUESS; once that move has measured the real
+    weight, one more move tops the backpack up.
+    """
     Misc.SendMessage(">> Restocking boards...", 68)
     
     # Open the supply crate
@@ -92,61 +159,98 @@ def restock_boards(crate_serial):
         Misc.SendMessage(">> Supply crate is out of boards!", 33)
         return False
 
-    # Calculate the precise number of boards to move.
-    available_weight = Player.MaxWeight - Player.Weight - WEIGHT_BUFFER
-    if available_weight <= 0:
-        Misc.SendMessage(">> You are too heavy to restock more boards.", 138)
-        return True
-
-    # Assuming 1 board = 1 stone for this calculation
-    boards_to_move = int(available_weight)
-
-    # Don't try to move more boards than are in the stack
-    if boards_to_move > boards_in_crate.Amount:
-        boards_to_move = boards_in_crate.Amount
+    # Pull enough boards for as many whole crafts as you can carry.
+    boards_before = get_board_count()
+    guessed = BOARD_ID not in unit_weights
+    boards_to_move = plan_restock(BOARD_ID, boards_before, details["boards"], boards_in_crate.Amount)
 
     if boards_to_move > 0:
         Misc.SendMessage(">> Attempting to move {} boards...".format(boards_to_move), 78)
+        weight_before = Player.Weight
         Items.Move(boards_in_crate.Serial, Player.Backpack.Serial, boards_to_move)
-        Misc.Pause(1500) # Pause to allow the item to move and weight to update
+        # Wait for the boards to arrive so the weight is up to date.
+        paced_wait("restock", 1500, lambda: True if get_board_count() > boards_before else None)
+        measure_unit_weight(BOARD_ID, get_board_count() - boards_before, Player.Weight - weight_before)
+        if guessed and BOARD_ID in unit_weights:
+            # The first move was planned with the guessed weight. Top up now that it is known.
+            return restock_boards(crate_serial, details)
     else:
         Misc.SendMessage(">> No room for more boards.", 138)
             
     Misc.SendMessage(">> Finished restocking.", 68)
     return True
-
-def get_item_to_craft():
-    """Determines which item to craft based on current skill."""
-    current_skill = Player.GetRealSkillValue("Carpentry")
-    for item_name, details in training_plan.items():
-        if current_skill >= details["min_skill"] and current_skill < details["max_skill"]:
-            Misc.SendMessage(">> Skill is {:.1f}. Next item: {}".format(current_skill, item_name), 68)
-            return item_name, details
-    return None, None
-    
-def dispose_of_item(item_graphic, pouch_serial, disposal_method, axe_serial, trash_barrel_serial):
-    """Finds and disposes of the specified item."""
-    item_to_dispose = Items.FindByID(item_graphic, -1, pouch_serial, True)
     
-    if item_to_dispose is None:
-        item_to_dispose = Items.FindByID(item_graphic, -1, Player.Backpack.Serial, True)
-
-    if item_to_dispose:
-        if disposal_method == "destroy":
-            Misc.SendMessage(">> Destroying last crafted item...", 78)
-            if Items.FindBySerial(axe_serial) is None:
-                Misc.SendMessage(">> Axe is missing! Cannot destroy item.", 33)
-                return
-            Items.UseItem(axe_serial)
-            if Target.WaitForTarget(2000):
-                Target.TargetExecute(item_to_dispose.Serial)
-                Misc.Pause(1000)
-        elif disposal_method == "trash":
-            Misc.SendMessage(">> Trashing last crafted item...", 78)
-            Items.Move(item_to_dispose.Serial, trash_barrel_serial, 0)
-            Misc.Pause(1000)
-    else:
-        Misc.SendMessage(">> Could not find crafted item to dispose of.", 138)
+def find_crafted_items(item_graphic):
+    """Walks the backpack (and the bags inside it, such as the saw pouch) once and returns every item with this graphic."""
+    found = []
+    pending = [Player.Backpack]
+    while pending:
+        container = pending.pop()
+        if not container.Contains:
+            Items.WaitForContents(container, CONTENTS_TIMEOUT)
+        for item in container.Contains:
+            if item.ItemID == item_graphic:
+                found.append(item)
+            elif item.IsContainer:
+                pending.append(item)
+    return found
+
+def dispose_of_batch(details, count, axe_serial, trash_barrel_serial):
+    """Disposes of a batch of crafted items in one pass, then waits once for all of them to be gone."""
+    batch = find_crafted_items(details["graphic"])[:count]
+    if not batch:
+        Misc.SendMessage(">> Could not find the crafted items to dispose of.", 138)
+        return
+    method = details["disposal_method"]
+    if method == "destroy" and Items.FindBySerial(axe_serial) is None:
+        Misc.SendMessage(">> Axe is missing! Cannot destroy items.", 33)
+        return
+
+    Misc.SendMessage(">> Disposing of {} crafted items...".format(len(batch)), 78)
+    for attempt in range(DISPOSE_PASSES):
+        for item in batch:
+            if method == "destroy":
+                Items.UseItem(axe_serial)
+                if not Target.WaitForTarget(2000):
+                    Misc.SendMessage(">> Error waiting for target on crafted item.", 33)
+                    break
+                # Waiting for the next target cursor is all the gap the axe needs.
+                Target.TargetExecute(item.Serial)
+            else:
+                Items.Move(item.Serial, trash_barrel_serial, 0)
+                # Only the gap the server needs between two moves. The results are checked once, below.
+                paced_wait("trash", TRASH_MOVE_DELAY)
+        paced_wait("dispose", 1000, lambda: True if all(item_gone(item.Serial) for item in batch) else None)
+        # Anything the server refused is tried again.
+        batch = [item for item in batch if not item_gone(item.Serial)]
+        if not batch:
+            return
+    Misc.SendMessage(">> Could not dispose of {} crafted items.".format(len(batch)), 138)
+
+def item_gone(serial):
+    """Returns True once an item is destroyed or no longer in the backpack, otherwise None."""
+    item = Items.FindBySerial(serial)
+    if item is None or item.RootContainer != Player.Backpack.Serial:
+        return True
+    return None
+
+# --- Restock Planner ---
+
+# unit_weights holds the weights measured so far (see Craft_Training.py).
+def plan_restock(item_id, carried, cost_per_craft, in_stock):
+    """Returns how many units to pull so you carry whole crafts' worth without going past WEIGHT_BUFFER."""
+    free_weight = Player.MaxWeight - Player.Weight - WEIGHT_BUFFER
+    if free_weight <= 0:
+        return 0
+    units = int(free_weight / unit_weights.get(item_id, BOARD_WEIGHT_GUESS))
+    # Leftovers smaller than one craft would only be carried around, so round down to whole crafts.
+    crafts = (carried + min(units, in_stock)) // cost_per_craft
+    return max(crafts * cost_per_craft - carried, 0)
+
+# --- Skill Planner ---
+
+skill_planner = SkillPlanner("Carpentry", training_plan, "boards", USE_SKILL_PLANNER, PLAN_OBJECTIVE,
+                             PLAN_CRAFT_SECONDS, PLAN_TOTAL_SKILL_ROOM, PLAN_FAILURE_GAIN_BONUS)
 
 # --- Main Script ---
 
@@ -170,71 +274,75 @@ Misc.SendMessage(">> Please target your trash barrel.", 68)
 trash_barrel_serial = Target.PromptTarget()
 if trash_barrel_serial == 0: sys.exit()
 
+craft_matcher = compile_journal_outcomes(CRAFT_OUTCOMES)
+
 # Main Loop
 while True:
     # Add a "heartbeat" pause at the start of every loop for stability.
     Misc.Pause(250)
     
-    # Check if we need to restock boards
-    if get_board_count() < BOARD_RESTOCK_THRESHOLD:
-        if not restock_boards(crate_serial):
-            Misc.SendMessage(">> Restocking failed. Stopping script.", 33)
-            break
-        # After restocking, restart the loop to re-evaluate the situation.
-        continue
-    
     # Determine which item to craft
-    item_name, craft_details = get_item_to_craft()
+    item_name, craft_details = skill_planner.get_item_to_craft()
     if not item_name:
         Misc.SendMessage(">> You have completed the training plan! Stopping.", 68)
         break
         
-    # Check if we have enough boards for the next craft
-    if get_board_count() < craft_details["boards"]:
-        Misc.SendMessage(">> Not enough boards for '{}'. Restocking...".format(item_name), 138)
-        continue # Loop back to trigger restocking
-
-    # Find a saw in the pouch
-    saw = Items.FindByID(SAW_ID, -1, saw_pouch_serial)
-    if saw is None:
-        Misc.SendMessage(">> Out of saws! Stopping script.", 33)
-        break
-        
-    # Crafting Process
-    Journal.Clear()
-    Items.UseItem(saw.Serial)
-    if not Gumps.WaitForGump(0, 2000):
-        Misc.SendMessage(">> Error: Carpentry gump did not appear.", 33)
-        continue
-        
-    current_gump_id = Gumps.CurrentGump()
-    Gumps.SendAction(current_gump_id, craft_details["category_gump"])
-    Misc.Pause(750)
-    
-    if Gumps.HasGump():
-        current_gump_id = Gumps.CurrentGump()
-    else:
-        Misc.SendMessage(">> Error: Gump closed after category selection.", 33)
-        continue
+    # Check if we need to restock boards for the next craft. With enough for a craft but no
+    # room to carry more, opening the crate would gain nothing, so keep crafting instead.
+    board_count = get_board_count()
+    no_room = (board_count >= craft_details["boards"] and
+               plan_restock(BOARD_ID, board_count, craft_details["boards"], sys.maxsize) == 0)
+    if board_count < max(BOARD_RESTOCK_THRESHOLD, craft_details["boards"]) and not no_room:
+        if not restock_boards(crate_serial, craft_details):
+            Misc.SendMessage(">> Restocking failed. Stopping script.", 33)
+            break
+        if get_board_count() < craft_details["boards"]:
+            Misc.SendMessage(">> Not enough boards for '{}'. Stopping script.".format(item_name), 33)
+            break
+
+    # Craft as many items as the boards allow (up to the batch size), keeping the gump open
+    batch_size = min(CRAFT_BATCH_SIZE, get_board_count() // craft_details["boards"])
+    crafted = 0
+    out_of_saws = False
+    for batch_index in range(batch_size):
+        # Stop early if the skill moved on to another item or we are getting too heavy
+        if batch_index > 0 and skill_planner.get_item_to_craft()[0] != item_name:
+            break
+        if Player.Weight >= Player.MaxWeight - WEIGHT_BUFFER:
+            break
 
-    Gumps.SendAction(current_gump_id, craft_details["item_gump"])
-    Misc.Pause(ACTION_DELAY)
+        # Find a saw in the pouch
+        saw = Items.FindByID(SAW_ID, -1, saw_pouch_serial)
+        if saw is None:
+            Misc.SendMessage(">> Out of saws! Stopping script.", 33)
+            out_of_saws = True
+            break
+            
+        # Crafting Process
+        sync_journal_cursor()
+        if not send_craft(saw.Serial, craft_details):
+            Misc.SendMessage(">> Error: Carpentry gump did not appear.", 33)
+            break
+
+        # Returns as soon as the journal shows how the craft went.
+        result = paced_wait("craft", ACTION_DELAY, lambda: poll_journal(craft_matcher))
+        if result == "success":
+            crafted += 1
+        elif result is None:
+            Misc.SendMessage(">> No craft result in time. Continuing...", 138)
+        else:
+            Misc.SendMessage(">> Craft failed ({}). Continuing...".format(result.replace("_", " ")), 138)
     
     # Add a dedicated pause after crafting to prevent client crashes.
     Misc.Pause(2000)
     
-    # Dispose of the crafted item if successful
-    if not Journal.Search("You fail to create"):
-        dispose_of_item(
-            craft_details["graphic"], 
-            saw_pouch_serial, 
-            craft_details["disposal_method"], 
-            axe_serial, 
-            trash_barrel_serial
-        )
-    else:
-        Misc.SendMessage(">> Craft failed. Continuing...", 138)
+    # Dispose of the whole batch in one pass
+    if crafted:
+        dispose_of_batch(craft_details, crafted, axe_serial, trash_barrel_serial)
+
+    if out_of_saws:
+        break
         
-    Misc.Pause(1000) # Final pause before next loop
+    Misc.Pause(1000) # Final pause before next batch
 
 Misc.SendMessage(">> Carpentry training script finished.", 68)
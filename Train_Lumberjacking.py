@@ -3,13 +3,15 @@
 # What it does:
 # 1. Automatically finds and uses the axe in your right hand.
 # 2. Scans for the nearest tree, finds a walkable spot next to it, pathfinds, and chops.
-# 3. Remembers which trees are depleted to avoid getting stuck.
+# 3. Remembers which trees are depleted (also across restarts) and skips them until they grow back.
 # 4. Automatically finds and equips a new axe if your current one breaks.
 # 5. When your backpack is full, it automatically converts all logs to boards.
 # 6. Stops automatically if you are full of boards or out of axes.
+# 7. Remembers where trees are in a local file, so each part of the forest is only scanned once.
 #
 # How to use:
-# 1. Place this script in your Razor Enhanced 'Scripts' folder.
+# 1. Place this script in your Razor Enhanced 'Scripts' folder. Action_Pacing.py, Gathering.py,
+#    Journal_Matching.py, Walkability.py and Razor_API.py go in the same folder.
 # 2. Equip an axe in your right hand. Have more axes in your backpack.
 # 3. Stand in a forested area and run the script.
 # 4. To stop, you must manually stop it from the Razor Enhanced scripts tab.
@@ -17,6 +19,15 @@
 import sys
 import math
 
+# The helper modules below get the Razor Enhanced objects from this script.
+import Razor_API
+Razor_API.install(globals())
+from Action_Pacing import paced_wait
+from Journal_Matching import compile_journal_outcomes, sync_journal_cursor, poll_journal
+from Gathering import (DepletedRegistry, tree_index, load_tree_index, save_tree_index, ring_tiles,
+                       get_tree_at, TREE_SEARCH_RADIUS, TREE_SEARCH_MAX_RADIUS)
+from Walkability import find_walkable_neighbor
+
 # --- Configuration ---
 
 # A list of graphic IDs for axes. The script will search for these if your current axe breaks.
@@ -24,8 +35,15 @@ import math
 AXE_GRAPHICS = [0x0F49, 0x0F47, 0x0F45, 0x13FB]
 LOG_GRAPHIC = 0x1BDD
 
-# The radius (in tiles) around the player to scan for trees.
-TREE_SEARCH_RADIUS = 15
+# How trees are searched for and remembered is set in Gathering.py.
+
+# Depleted trees are skipped until they have had time to grow back. The list is saved to
+# disk so a restarted script does not walk back to trees it already emptied. Trees that
+# cannot be reached are skipped for longer, since that rarely changes.
+DEPLETED_TREES_FILE = "depleted_trees.json"
+DEPLETED_TREES_MAX = 2000
+TREE_RESPAWN_MINUTES = 20
+UNREACHABLE_TREE_MINUTES = 240
 
 # The script will stop if your weight is this close to your maximum weight.
 # This leaves some room to walk without being over-encumbered.
@@ -34,12 +52,17 @@ WEIGHT_LIMIT_OFFSET = 25
 # Delay in milliseconds after each chop/craft attempt.
 ACTION_DELAY = 3500
 
-# A list of static tile IDs for various tree types.
-TREE_GRAPHICS = [
-    0x0CCA, 0x0CCB, 0x0CCC, 0x0CCD, 0x0CD0, 0x0CD3, 0x0CD6, 0x0CD8,
-    0x0CDA, 0x0CDD, 0x0CE0, 0x0CE3, 0x0CE6, 0x0D43, 0x0D59, 0x0D70,
-    0x0D85, 0x0D94, 0x0D98, 0x0DA4, 0x0DA8
-]
+# Delays are learned while the script runs: after each action the script waits only until
+# its result shows up, and never more than twice the delay configured above. How the delays
+# are learned is set in Action_Pacing.py.
+
+# Journal lines that end a chop, grouped by result.
+CHOP_OUTCOMES = {
+    "logs": ["You put some logs", "You chop some"],
+    "failed": ["fail to produce any useable wood"],
+    "depleted": ["There are no logs left", "That is too far away", "There's not enough wood here to harvest"],
+    "must_wait": ["You must wait"],
+}
 
 # --- Helper Functions ---
 
@@ -73,62 +96,45 @@ def make_boards(axe_serial):
         Items.UseItem(axe_serial)
         if Target.WaitForTarget(2000):
             Target.TargetExecute(logs.Serial)
-            Misc.Pause(ACTION_DELAY)
+            paced_wait("boards", ACTION_DELAY, lambda: True if Items.FindBySerial(logs.Serial) is None else None)
         else:
             Misc.SendMessage(">> Error waiting for target on logs.", 33)
             break
     return axe_serial
 
-def find_walkable_neighbor(x, y):
-    """Finds a walkable tile adjacent to the target coordinates."""
-    # Check neighbors in a specific order: N, E, S, W, etc.
-    neighbors = [(0, -1), (1, 0), (0, 1), (-1, 0), (-1, -1), (1, -1), (1, 1), (-1, 1)]
-    for dx, dy in neighbors:
-        check_x, check_y = x + dx, y + dy
-        land_id = Statics.GetLandID(check_x, check_y, Player.Map)
-        # Check if the land tile is considered impassable
-        if not Statics.GetLandFlag(land_id, 'Impassable'):
-            # Also check for blocking static items at that location
-            statics_at_neighbor = Statics.GetStaticsTileInfo(check_x, check_y, Player.Map)
-            is_blocked = False
-            for static_item in statics_at_neighbor:
-                if Statics.GetTileFlag(static_item.StaticID, 'Impassable'):
-                    is_blocked = True
-                    break
-            if not is_blocked:
-                return (check_x, check_y)
-    return (None, None)
-
-def find_closest_tree(ignore_list):
-    """Finds the closest reachable tree that is not on the ignore list."""
+def find_closest_tree():
+    """Finds the closest reachable tree that is not depleted.
+
+    Searches ring by ring outward from the player and stops at the first ring with a tree.
+    Returns (x, y, static_id, static_z), or None if there is no tree in range.
+    """
+    map_id = Player.Map
+    player_x = Player.Position.X
+    player_y = Player.Position.Y
+    known_blocks = len(tree_index)
+
     closest_tree = None
-    min_dist = float('inf')
-    tree_x, tree_y = 0, 0
-
-    # Iterate through tiles in a square radius around the player
-    for x in range(Player.Position.X - TREE_SEARCH_RADIUS, Player.Position.X + TREE_SEARCH_RADIUS + 1):
-        for y in range(Player.Position.Y - TREE_SEARCH_RADIUS, Player.Position.Y + TREE_SEARCH_RADIUS + 1):
-            # Check if this coordinate is on the ignore list
-            if (x, y) in ignore_list:
+    for radius in range(TREE_SEARCH_MAX_RADIUS + 1):
+        if radius == TREE_SEARCH_RADIUS + 1:
+            Misc.SendMessage(">> No trees within {} tiles. Widening the search...".format(TREE_SEARCH_RADIUS), 138)
+        min_dist = float('inf')
+        for x, y in ring_tiles(player_x, player_y, radius):
+            if depleted_trees.is_depleted(map_id, x, y):
                 continue
-                
-            tile_info_list = Statics.GetStaticsTileInfo(x, y, Player.Map)
-            for tile in tile_info_list:
-                if tile.StaticID in TREE_GRAPHICS:
-                    # Calculate distance manually to avoid the Point3D error
-                    dx = Player.Position.X - x
-                    dy = Player.Position.Y - y
-                    dist = math.sqrt(dx*dx + dy*dy)
-                    if dist < min_dist:
-                        min_dist = dist
-                        closest_tree = tile
-                        tree_x = x
-                        tree_y = y
-                        
-    if closest_tree:
-        return (closest_tree, tree_x, tree_y)
-    else:
-        return (None, 0, 0)
+            tree = get_tree_at(map_id, x, y)
+            if tree is None:
+                continue
+            # Every tile in a ring is the same UO distance away, so prefer the one that looks closest.
+            dist = math.sqrt((player_x - x)**2 + (player_y - y)**2)
+            if dist < min_dist:
+                min_dist = dist
+                closest_tree = (x, y, tree[0], tree[1])
+        if closest_tree is not None:
+            break
+
+    if len(tree_index) != known_blocks:
+        save_tree_index()
+    return closest_tree
 
 # --- Main Script ---
 
@@ -152,7 +158,10 @@ if equipped_axe.ItemID not in AXE_GRAPHICS:
     AXE_GRAPHICS.append(equipped_axe.ItemID)
 
 axe_serial = equipped_axe.Serial
-depleted_trees = [] # List to store coordinates of depleted trees
+load_tree_index()
+depleted_trees = DepletedRegistry(DEPLETED_TREES_FILE, DEPLETED_TREES_MAX, TREE_RESPAWN_MINUTES, "tree")
+depleted_trees.load()
+chop_matcher = compile_journal_outcomes(CHOP_OUTCOMES)
 
 # 2. Main Loop
 while True:
@@ -176,16 +185,17 @@ while True:
         continue # Restart the loop to find a new tree
 
     # Find the next tree to chop, ignoring depleted ones
-    tree, tree_x, tree_y = find_closest_tree(depleted_trees)
+    tree = find_closest_tree()
     if tree is None:
         Misc.SendMessage(">> No more trees found in range. Stopping script.", 33)
         break
+    tree_x, tree_y, tree_id, tree_z = tree
 
     # NEW: Find a walkable tile next to the tree to pathfind to.
     walk_to_x, walk_to_y = find_walkable_neighbor(tree_x, tree_y)
     if walk_to_x is None:
         Misc.SendMessage(">> No walkable spot found near the tree. Ignoring it.", 138)
-        depleted_trees.append((tree_x, tree_y))
+        depleted_trees.mark(tree_x, tree_y, UNREACHABLE_TREE_MINUTES)
         continue
 
     Misc.SendMessage(">> Moving to chop tree at X:{} Y:{}".format(tree_x, tree_y), 78)
@@ -194,13 +204,13 @@ while True:
     path = PathFinding.GetPath(walk_to_x, walk_to_y, True) # True ignores mobiles
     if not path:
         Misc.SendMessage(">> Cannot find a path to the tree. Ignoring it.", 138)
-        depleted_trees.append((tree_x, tree_y))
+        depleted_trees.mark(tree_x, tree_y, UNREACHABLE_TREE_MINUTES)
         continue
 
     # Run the calculated path. Timeout is in seconds (float).
     if not PathFinding.RunPath(path, 15.0, False, False):
         Misc.SendMessage(">> Failed to follow the path. Ignoring this tree.", 138)
-        depleted_trees.append((tree_x, tree_y))
+        depleted_trees.mark(tree_x, tree_y, UNREACHABLE_TREE_MINUTES)
         continue
         
     Misc.Pause(500) # Brief pause after arriving
@@ -213,26 +223,23 @@ while True:
         if Items.FindBySerial(axe_serial) is None:
             break # Exit inner loop to trigger finding a new axe
 
-        Journal.Clear()
+        sync_journal_cursor()
         Items.UseItem(axe_serial)
         
         if Target.WaitForTarget(2000):
             # Use the correct coordinates returned from the find_closest_tree function
-            Target.TargetExecute(tree_x, tree_y, tree.StaticZ, tree.StaticID)
+            Target.TargetExecute(tree_x, tree_y, tree_z, tree_id)
         else:
             Misc.SendMessage(">> Error: Timed out waiting for target.", 33)
             break
 
-        Misc.Pause(ACTION_DELAY)
-        
-        # Check journal messages to see if the tree is depleted
-        if (Journal.Search("There are no logs left") or 
-                Journal.Search("That is too far away") or 
-                Journal.Search("There's not enough wood here to harvest")):
+        # Stop waiting as soon as the journal shows how the chop went.
+        if paced_wait("chop", ACTION_DELAY, lambda: poll_journal(chop_matcher)) == "depleted":
             Misc.SendMessage(">> Tree depleted or out of range. Finding new tree.", 78)
-            # Add the coordinates of the depleted tree to our ignore list
-            depleted_trees.append((tree_x, tree_y))
+            # Remember the depleted tree so we skip it until it grows back
+            depleted_trees.mark(tree_x, tree_y)
             break
 
+depleted_trees.save_if_changed()
 Misc.SendMessage(">> Lumberjacking script finished.", 68)
 # --- Script End ---
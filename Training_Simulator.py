@@ -0,0 +1,347 @@
+# Offline Training Time Simulator
+#
+# What it does:
+# 1. Reads the training tables of the training scripts in this folder without running them:
+#    training_plan from Smith_Smelt.py and Train_Carpenter.py, tameable_data from Auto_tamer.py.
+# 2. Plays thousands of simulated training sessions with the standard RunUO/ServUO success and
+#    skill gain rules, spread over all CPU cores.
+# 3. Reports, for each skill milestone, how many hours and how many ingots/boards (or tamed
+#    animals) it takes on average, with the spread between lucky and unlucky sessions.
+# 4. For crafting scripts it compares the hand-written min_skill/max_skill bands with the
+#    skill planner (USE_SKILL_PLANNER), so a plan can be judged before spending anything on it.
+#
+# How to use:
+# 1. This runs on a normal Python 3 install with NumPy (pip install numpy). It does not need
+#    Razor Enhanced or Ultima Online, but Craft_Training.py and Razor_API.py must be in the same
+#    folder: the skill planner and gain rules simulated are the ones the scripts use.
+# 2. Run: python Training_Simulator.py Smith_Smelt.py --start 40 --cap 100
+#    With no script names, all three training scripts are simulated.
+# 3. Use --sessions for more precise numbers, --milestones "60,80,100" to choose the rows,
+#    --plan bands or --plan planner to only show one of the crafting plans, and --seed to make
+#    runs repeatable.
+# 4. Times only count the craft or tame attempts themselves (see the timing settings below),
+#    not restocking, walking or ingots won back by smelting.
+
+import argparse
+import ast
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from Craft_Training import SkillPlanner
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# --- Configuration ---
+
+# The scripts simulated when none are named on the command line.
+DEFAULT_SCRIPTS = ["Smith_Smelt.py", "Train_Carpenter.py", "Auto_tamer.py"]
+
+# How many sessions to simulate, and how many each worker process handles at a time.
+DEFAULT_SESSIONS = 5000
+SESSIONS_PER_TASK = 1000
+
+# Seconds one attempt takes. A crafting plan item can override it with a "seconds" entry,
+# and scripts that set PLAN_CRAFT_SECONDS use that value instead of CRAFT_SECONDS.
+CRAFT_SECONDS = 3.0
+# One taming attempt (three taming ticks plus finding the animal), and releasing it afterwards.
+TAME_SECONDS = 12.0
+RELEASE_SECONDS = 4.0
+
+# Skill gain rules, used when a script does not set its own PLAN_ values.
+TOTAL_SKILL_ROOM = 0.5
+FAILURE_GAIN_BONUS = 0.0
+
+# The skill each script works on.
+SCRIPT_SKILLS = {
+    "Smith_Smelt": "Blacksmith",
+    "Train_Carpenter": "Carpentry",
+    "Auto_tamer": "Animal Taming",
+}
+
+# --- Helper Functions ---
+
+def read_script_tables(path):
+    """Reads the literal configuration values (training_plan, tameable_data, ...) from a script."""
+    with open(path) as script_file:
+        source = script_file.read()
+    tables = {}
+    for node in ast.parse(source).body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+        if not isinstance(node.targets[0], ast.Name):
+            continue
+        try:
+            tables[node.targets[0].id] = ast.literal_eval(node.value)
+        except (ValueError, SyntaxError, TypeError):
+            pass
+    return tables
+
+
+def success_chance(skill, low, high):
+    """Returns the chance of a skill check over [low, high), or None if it cannot give a gain."""
+    if skill < low or skill >= high:
+        return None
+    return (skill - low) / (high - low)
+
+
+def craft_range(details):
+    """Returns the server's skill range for a plan item, guessing it from the band if missing."""
+    low = details.get("craft_min", details.get("min_skill", 0.0) - 25.0)
+    return low, details.get("craft_max", low + 50.0)
+
+
+def guessed_craft_ranges(plan):
+    """Returns the names of the plan items without their own craft_min/craft_max, in plan order."""
+    return [name for name, details in plan.items() if "craft_min" not in details or "craft_max" not in details]
+
+
+def material_name(plan):
+    """Returns the material a crafting plan uses, as named in its entries."""
+    for details in plan.values():
+        for name in ("ingots", "boards"):
+            if name in details:
+                return name
+    return "materials"
+
+
+def band_item(plan, skill):
+    """Returns the plan item whose min_skill/max_skill band holds this skill, like the scripts did."""
+    for name, details in plan.items():
+        if details["min_skill"] <= skill < details["max_skill"]:
+            return name
+    return None
+
+
+def make_planner(skill_name, plan, settings):
+    """Returns the script's skill planner for the plan items that have a craft range."""
+    craftable = dict((name, details) for name, details in plan.items()
+                     if "craft_min" in details and "craft_max" in details)
+    return SkillPlanner(skill_name, craftable, settings.get("material"), True, settings["objective"],
+                        settings["seconds"], settings["room"], settings["bonus"])
+
+
+def craft_steps(plan, mode, start, cap, settings):
+    """Returns one row per 0.1 of skill from start: (item, success, gain on success, gain on
+    failure, seconds per attempt, extra seconds per success, cost on success, cost on failure).
+    Stops at the first skill where the plan has nothing left that can give a gain."""
+    steps = []
+    material = settings["material"]
+    planner = settings["planner"]
+    if mode == "planner":
+        planner.build_plan(cap)
+    for tenths in range(int(round(start * 10)), int(round(cap * 10))):
+        skill = tenths / 10.0
+        if mode == "bands":
+            name = band_item(plan, skill)
+        else:
+            name = planner.plan_item(skill)
+        if name is None:
+            break
+        details = plan[name]
+        chance = success_chance(skill, *craft_range(details))
+        if chance is None:
+            break
+        cost = float(details.get(material, 0))
+        steps.append((name, chance,
+                      planner.gain_chance(skill, cap, chance, True),
+                      planner.gain_chance(skill, cap, chance, False),
+                      details.get("seconds", settings["seconds"]), 0.0, cost, cost / 2.0))
+    return steps
+
+
+def taming_steps(tameable_data, start, cap, settings):
+    """Returns the same rows as craft_steps for Auto_tamer.py, which always tames the hardest
+    animal in its range. A "cost" here is one tamed animal."""
+    steps = []
+    planner = settings["planner"]
+    difficulties = sorted(set(tameable_data.values()))
+    for tenths in range(int(round(start * 10)), int(round(cap * 10))):
+        skill = tenths / 10.0
+        in_range = [difficulty for difficulty in difficulties
+                    if settings["min_difficulty"] <= difficulty <= skill + settings["offset"]]
+        if not in_range:
+            break
+        difficulty = in_range[-1]
+        chance = success_chance(skill, difficulty - 25.0, difficulty + 25.0)
+        if chance is None:
+            break
+        steps.append(("difficulty {:.1f}".format(difficulty), chance,
+                      planner.gain_chance(skill, cap, chance, True),
+                      planner.gain_chance(skill, cap, chance, False),
+                      TAME_SECONDS, RELEASE_SECONDS, 1.0, 0.0))
+    return steps
+
+
+def simulate_sessions(task):
+    """Runs one batch of sessions through the steps and returns the hours and costs at each
+    milestone as two (sessions, milestones) arrays. Runs in a worker process."""
+    steps, milestone_steps, sessions, seed = task
+    rng = np.random.default_rng(seed)
+    seconds = np.zeros(sessions)
+    cost = np.zeros(sessions)
+    hours_at = np.full((sessions, len(milestone_steps)), np.nan)
+    cost_at = np.full((sessions, len(milestone_steps)), np.nan)
+    milestone_columns = dict((step, column) for column, step in enumerate(milestone_steps))
+
+    for index, (name, chance, gain_success, gain_failure, attempt_seconds,
+                success_seconds, success_cost, failure_cost) in enumerate(steps):
+        # The skill only changes on a gain, so every attempt at this step has the same odds
+        # and the number of attempts until the next 0.1 is geometric.
+        gain = chance * gain_success + (1.0 - chance) * gain_failure
+        attempts = rng.geometric(gain, sessions)
+        # Whether the gaining attempt succeeded, then how many of the others did.
+        last_success = rng.random(sessions) < chance * gain_success / gain
+        other_chance = chance * (1.0 - gain_success) / (1.0 - gain) if gain < 1.0 else 0.0
+        other_successes = rng.binomial(attempts - 1, min(max(other_chance, 0.0), 1.0))
+        successes = other_successes + last_success
+        failures = attempts - successes
+        seconds += attempts * attempt_seconds + successes * success_seconds
+        cost += successes * success_cost + failures * failure_cost
+        column = milestone_columns.get(index + 1)
+        if column is not None:
+            hours_at[:, column] = seconds / 3600.0
+            cost_at[:, column] = cost
+    return hours_at, cost_at
+
+
+def run_simulation(steps, milestone_steps, sessions, seed, workers):
+    """Splits the sessions into tasks for a process pool and joins the results."""
+    seeds = np.random.SeedSequence(seed).spawn((sessions + SESSIONS_PER_TASK - 1) // SESSIONS_PER_TASK)
+    tasks = []
+    remaining = sessions
+    for task_seed in seeds:
+        batch = min(SESSIONS_PER_TASK, remaining)
+        remaining -= batch
+        tasks.append((steps, milestone_steps, batch, task_seed))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(simulate_sessions, tasks))
+    hours = np.concatenate([result[0] for result in results])
+    cost = np.concatenate([result[1] for result in results])
+    return hours, cost
+
+
+def report(title, steps, start, milestones, hours, cost, cost_name):
+    """Prints one table row per milestone."""
+    print("")
+    print("=== {} ===".format(title))
+    if not steps:
+        print("Nothing in the plan can train this skill from {:.1f}.".format(start))
+        return
+    print("{:>7} {:>9} {:>8} {:>8} {:>8} {:>12} {:>10}  {}".format(
+        "Skill", "Hours", "SD", "P10", "P90", cost_name.capitalize(), "SD", "Item at milestone"))
+    for column, milestone in enumerate(milestones):
+        step = int(round((milestone - start) * 10))
+        if step > len(steps):
+            print("{:>7.1f}  not reached: the plan stops at {:.1f}".format(milestone, start + len(steps) / 10.0))
+            continue
+        milestone_hours = hours[:, column]
+        milestone_cost = cost[:, column]
+        item = steps[min(step, len(steps) - 1)][0] if step < len(steps) else "(done)"
+        print("{:>7.1f} {:>9.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>12.0f} {:>10.0f}  {}".format(
+            milestone, milestone_hours.mean(), milestone_hours.std(),
+            np.percentile(milestone_hours, 10), np.percentile(milestone_hours, 90),
+            milestone_cost.mean(), milestone_cost.std(), item))
+
+
+def default_milestones(start, cap):
+    """Returns every 10 points of skill above start, and the cap."""
+    milestones = []
+    value = (int(start) // 10 + 1) * 10.0
+    while value < cap:
+        milestones.append(value)
+        value += 10.0
+    milestones.append(cap)
+    return milestones
+
+
+def simulate_script(path, args):
+    """Simulates every plan found in one script and prints the reports."""
+    tables = read_script_tables(path)
+    script_name = os.path.splitext(os.path.basename(path))[0]
+    skill_name = SCRIPT_SKILLS.get(script_name, "skill")
+    settings = {
+        "room": tables.get("PLAN_TOTAL_SKILL_ROOM", TOTAL_SKILL_ROOM) if args.total_room is None else args.total_room,
+        "bonus": tables.get("PLAN_FAILURE_GAIN_BONUS", FAILURE_GAIN_BONUS) if args.failure_bonus is None else args.failure_bonus,
+        "objective": tables.get("PLAN_OBJECTIVE", "time"),
+        "seconds": tables.get("PLAN_CRAFT_SECONDS", CRAFT_SECONDS),
+    }
+
+    runs = []
+    if "training_plan" in tables:
+        plan = tables["training_plan"]
+        settings["material"] = material_name(plan)
+        settings["planner"] = make_planner(skill_name, plan, settings)
+        guessed = guessed_craft_ranges(plan)
+        if guessed:
+            # The guess can be far off, so the results for these rows are only rough.
+            print("Warning: {} has no craft_min/craft_max for {} of {} items. Guessing craft_min = min_skill - 25 and craft_max = craft_min + 50 where missing:".format(
+                path, len(guessed), len(plan)))
+            for name in guessed:
+                low, high = craft_range(plan[name])
+                print("  {:<28} {:.1f} to {:.1f}".format(name, low, high))
+        # By default start where the plan starts, but no lower than where crafting can give a gain.
+        plan_start = max(min(details["min_skill"] for details in plan.values()),
+                         min(craft_range(details)[0] for details in plan.values()))
+        start = args.start if args.start is not None else plan_start
+        modes = ["bands", "planner"] if args.plan == "both" else [args.plan]
+        for mode in modes:
+            if mode == "planner" and not any("craft_min" in details for details in plan.values()):
+                continue
+            runs.append((mode, start, craft_steps(plan, mode, start, args.cap, settings), settings["material"]))
+    elif "tameable_data" in tables:
+        settings["min_difficulty"] = tables.get("minimumTamingDifficulty", 0.0)
+        settings["offset"] = tables.get("maximumDifficultyOffset", 0.0)
+        # Taming gains follow the same skill check, so the planner only supplies the gain chance.
+        settings["planner"] = make_planner(skill_name, {}, settings)
+        start = args.start if args.start is not None else max(settings["min_difficulty"], 0.0)
+        runs.append(("taming", start, taming_steps(tables["tameable_data"], start, args.cap, settings), "tames"))
+    else:
+        print("{} has no training_plan or tameable_data table. Skipping it.".format(path))
+        return
+
+    for mode, start, steps, cost_name in runs:
+        if args.milestones:
+            milestones = [float(value) for value in args.milestones.split(",")]
+        else:
+            milestones = default_milestones(start, args.cap)
+        milestones = [value for value in milestones if value > start]
+        milestone_steps = [int(round((value - start) * 10)) for value in milestones]
+        hours, cost = run_simulation(steps, milestone_steps, args.sessions, args.seed, args.workers)
+        title = "{} ({}): {} {:.1f} to {:.1f}, {} sessions".format(
+            os.path.basename(path), mode, skill_name, start, args.cap, args.sessions)
+        report(title, steps, start, milestones, hours, cost, cost_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict training time and materials for the training scripts.")
+    parser.add_argument("scripts", nargs="*", help="training scripts to simulate (default: all three)")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help="sessions to simulate per plan")
+    parser.add_argument("--start", type=float, help="starting skill (default: where the plan starts)")
+    parser.add_argument("--cap", type=float, default=100.0, help="skill cap to train up to")
+    parser.add_argument("--milestones", help="comma separated skill values to report")
+    parser.add_argument("--plan", choices=["both", "bands", "planner"], default="both",
+                        help="which crafting plan to simulate")
+    parser.add_argument("--total-room", type=float, help="share of the total skill cap still unused")
+    parser.add_argument("--failure-bonus", type=float, help="extra gain chance on a failed attempt")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    args = parser.parse_args()
+
+    if np is None:
+        sys.exit("Training_Simulator.py needs NumPy. Install it with: pip install numpy")
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for script in args.scripts or DEFAULT_SCRIPTS:
+        path = script if os.path.exists(script) else os.path.join(folder, script)
+        if not os.path.exists(path):
+            print("Cannot find {}. Skipping it.".format(script))
+            continue
+        simulate_script(path, args)
+
+
+if __name__ == "__main__":
+    main()
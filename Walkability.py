@@ -0,0 +1,81 @@
+# Shared Walkability Cache
+#
+# What it does:
+# 1. Answers whether a tile can be walked on, asking the client only the first time a tile is seen.
+# 2. Remembers the answers in small blocks, one bit per tile, and keeps only the most recently
+#    used blocks so the cache stays small on long runs.
+# 3. Finds a walkable tile next to a target such as a tree or a plant.
+#
+# How to use:
+# 1. Place this file in your Razor Enhanced 'Scripts' folder, together with Razor_API.py.
+# 2. In the script, import what it needs:
+#        from Walkability import is_walkable, find_walkable_neighbor
+
+from collections import OrderedDict
+
+from Razor_API import Player, Statics
+
+# --- Configuration ---
+
+# Walkable tiles are remembered in small blocks so the same tile is never probed twice.
+# Only the most recently used blocks are kept.
+WALKABLE_BLOCK_SIZE = 8
+WALKABLE_CACHE_BLOCKS = 256
+
+# --- Walkability Cache ---
+
+# Walkability of tiles seen so far, keyed by (map, block_x, block_y) -> [known_bits, walkable_bits].
+# Each block covers WALKABLE_BLOCK_SIZE x WALKABLE_BLOCK_SIZE tiles, one bit per tile.
+walkable_blocks = OrderedDict()
+impassable_land_ids = {}
+impassable_static_ids = {}
+
+def is_impassable_land(land_id):
+    """Returns True if the land tile graphic blocks movement. Answers are remembered."""
+    if land_id not in impassable_land_ids:
+        impassable_land_ids[land_id] = Statics.GetLandFlag(land_id, 'Impassable')
+    return impassable_land_ids[land_id]
+
+def is_impassable_static(static_id):
+    """Returns True if the static graphic blocks movement. Answers are remembered."""
+    if static_id not in impassable_static_ids:
+        impassable_static_ids[static_id] = Statics.GetTileFlag(static_id, 'Impassable')
+    return impassable_static_ids[static_id]
+
+def probe_walkable(map_id, x, y):
+    """Asks the client whether a tile can be walked on."""
+    if is_impassable_land(Statics.GetLandID(x, y, map_id)):
+        return False
+    for static_item in Statics.GetStaticsTileInfo(x, y, map_id):
+        if is_impassable_static(static_item.StaticID):
+            return False
+    return True
+
+def is_walkable(x, y):
+    """Returns True if the tile can be walked on, probing the client only the first time."""
+    map_id = Player.Map
+    key = (map_id, x // WALKABLE_BLOCK_SIZE, y // WALKABLE_BLOCK_SIZE)
+    block = walkable_blocks.get(key)
+    if block is None:
+        block = [0, 0]
+        walkable_blocks[key] = block
+        # Forget the least recently used block once the cache is full.
+        if len(walkable_blocks) > WALKABLE_CACHE_BLOCKS:
+            walkable_blocks.popitem(last=False)
+    else:
+        walkable_blocks.move_to_end(key)
+    bit = 1 << ((y % WALKABLE_BLOCK_SIZE) * WALKABLE_BLOCK_SIZE + (x % WALKABLE_BLOCK_SIZE))
+    if not block[0] & bit:
+        block[0] |= bit
+        if probe_walkable(map_id, x, y):
+            block[1] |= bit
+    return bool(block[1] & bit)
+
+def find_walkable_neighbor(x, y):
+    """Finds a walkable tile adjacent to the target coordinates."""
+    # Check neighbors in a specific order: N, E, S, W, etc.
+    neighbors = [(0, -1), (1, 0), (0, 1), (-1, 0), (-1, -1), (1, -1), (1, 1), (-1, 1)]
+    for dx, dy in neighbors:
+        if is_walkable(x + dx, y + dy):
+            return (x + dx, y + dy)
+    return (None, None)